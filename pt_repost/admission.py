@@ -0,0 +1,80 @@
+"""
+admission of new rss_item by live state of qBittorrent,
+in addition to static `max-processing-size` and `max-processing-per-node`.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from collections.abc import Sequence
+
+# eta reported by qBittorrent for torrent without progress
+QB_ETA_INFINITY = 8640000
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class InFlight:
+    amount_left: int
+    eta: int
+
+
+def admission_budget(
+    *,
+    free_space: int,
+    min_free_space: int,
+    in_flight: Sequence[InFlight],
+    dl_rate: int,
+    lookahead: int,
+) -> int:
+    """
+    bytes of new torrents that can be added now.
+
+    disk: free space minus data in-flight torrents will still write, keep `min_free_space`.
+    pipeline: at current download rate, torrents being downloaded should finish in `lookahead` seconds,
+    new torrents are only added for the rest of that time.
+    stalled torrents (eta infinity) don't limit pipeline, they may never finish.
+    """
+    disk = free_space - min_free_space - sum(t.amount_left for t in in_flight)
+
+    active = [t for t in in_flight if t.amount_left > 0 and t.eta < QB_ETA_INFINITY]
+    if dl_rate <= 0 or not active:
+        return max(disk, 0)
+
+    pipeline = dl_rate * lookahead - sum(t.amount_left for t in active)
+    return max(min(disk, pipeline), 0)
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class Capacity:
+    """
+    bytes left for new torrents on each qBittorrent instance.
+
+    instances on same disk share budget of the disk, all instances share `max-processing-size` of node.
+    """
+
+    rooms: dict[str, int]
+    # None if node has no `max-processing-size`
+    node: int | None = None
+    # instance name -> disk, only with adaptive admission
+    disk_of: dict[str, str] = dataclasses.field(default_factory=dict)
+    disks: dict[str, int] = dataclasses.field(default_factory=dict)
+
+    def left(self, name: str) -> int:
+        left = self.rooms[name]
+        if self.node is not None:
+            left = min(left, self.node)
+        if name in self.disk_of:
+            left = min(left, self.disks[self.disk_of[name]])
+        return left
+
+    def best(self) -> tuple[str, int]:
+        """instance with most room left"""
+        name = max(self.rooms, key=self.left)
+        return name, self.left(name)
+
+    def take(self, name: str, size: int) -> None:
+        if self.node is not None:
+            self.node -= size
+        self.rooms[name] -= size
+        if name in self.disk_of:
+            self.disks[self.disk_of[name]] -= size
@@ -0,0 +1,77 @@
+from pt_repost.admission import QB_ETA_INFINITY, Capacity, InFlight, admission_budget
+
+GiB = 1024**3
+MiB = 1024**2
+
+
+def test_admission_disk() -> None:
+    assert (
+        admission_budget(
+            free_space=100 * GiB,
+            min_free_space=10 * GiB,
+            in_flight=[InFlight(amount_left=30 * GiB, eta=QB_ETA_INFINITY)],
+            dl_rate=0,
+            lookahead=3600,
+        )
+        == 60 * GiB
+    )
+
+    assert (
+        admission_budget(
+            free_space=5 * GiB,
+            min_free_space=10 * GiB,
+            in_flight=[],
+            dl_rate=0,
+            lookahead=3600,
+        )
+        == 0
+    )
+
+
+def test_admission_pipeline() -> None:
+    # 10MiB/s for an hour, 20GiB still downloading
+    budget = admission_budget(
+        free_space=1000 * GiB,
+        min_free_space=10 * GiB,
+        in_flight=[
+            InFlight(amount_left=20 * GiB, eta=2048),
+            InFlight(amount_left=5 * GiB, eta=QB_ETA_INFINITY),
+        ],
+        dl_rate=10 * MiB,
+        lookahead=3600,
+    )
+    assert budget == 10 * MiB * 3600 - 20 * GiB
+
+    # pipeline is full
+    assert (
+        admission_budget(
+            free_space=1000 * GiB,
+            min_free_space=10 * GiB,
+            in_flight=[InFlight(amount_left=50 * GiB, eta=5120)],
+            dl_rate=10 * MiB,
+            lookahead=3600,
+        )
+        == 0
+    )
+
+
+def test_capacity() -> None:
+    c = Capacity(
+        node=100 * GiB,
+        rooms={"a": 50 * GiB, "b": 40 * GiB, "c": 30 * GiB},
+        disk_of={"a": "disk1", "b": "disk1", "c": "disk2"},
+        disks={"disk1": 45 * GiB, "disk2": 30 * GiB},
+    )
+
+    # a and b share disk1
+    assert c.best() == ("a", 45 * GiB)
+    c.take("a", 20 * GiB)
+    assert c.left("b") == 25 * GiB
+    assert c.best() == ("c", 30 * GiB)
+
+    c.take("c", 25 * GiB)
+    # node has 55GiB left, disk1 25GiB
+    assert c.best() == ("a", 25 * GiB)
+
+    c.take("a", 25 * GiB)
+    assert c.best() == ("c", 5 * GiB)
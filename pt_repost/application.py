@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import dataclasses
 import enum
 import functools
@@ -10,33 +11,38 @@ import sys
 import tempfile
 import time
 import uuid
-from datetime import datetime, timedelta, timezone
-from email.utils import parsedate_to_datetime as _parsedate_to_datetime
-from pathlib import Path
-from typing import Annotated, Any, TypeVar, cast
-from xml.etree import ElementTree
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Any, TypeVar, cast
 
-import annotated_types
 import bencode2
 import guessit
 import httpx
 import orjson
 import packaging.version
 import qbittorrentapi
-import xxhash
 import yarl
-from pydantic import Field
-from qbittorrentapi import TorrentState
 from rich.console import Console
 from rich.table import Table
 from sslog import logger
 from uuid_utils import uuid7
 
+from pt_repost import picker
+from pt_repost.admission import Capacity, InFlight, admission_budget
+from pt_repost.catalog import RssCatalogSource, TargetCatalog, TargetRelease
 from pt_repost.config import Config, video_ext
 from pt_repost.const import (
     DEFAULT_HEADERS,
-    LOCK_KEY_SCHEDULE_RSS,
+    DEFAULT_REMOVED_MESSAGES,
+    EARLY_MEDIAINFO_SIZE,
+    FETCH_RESULT_UPDATED,
+    NOTIFY_CHANNEL_TORRENT_FINISHED,
+    PICK_BATCH_SIZE,
+    PICK_KNAPSACK_CANDIDATES,
+    PICK_ORDER_SCORE,
+    PICK_STRATEGY_KNAPSACK,
     QB_CATEGORY,
+    RSS_INGEST_BATCH_SIZE,
     RSS_ITEM_STATUS_DONE,
     RSS_ITEM_STATUS_DOWNLOADING,
     RSS_ITEM_STATUS_FAILED,
@@ -46,16 +52,48 @@ from pt_repost.const import (
     RSS_ITEM_STATUS_REMOVED_FROM_SITE,
     RSS_ITEM_STATUS_SKIPPED,
     RSS_ITEM_STATUS_UPLOADING,
-    SSD_REMOVED_MESSAGE,
+    SCREENSHOT_COUNT,
+    SKIP_REASON_DUPLICATED_INFO_HASH,
+    SKIP_REASON_DUPLICATED_RELEASE,
+    SKIP_REASON_EXCLUDE_RSS,
+    SKIP_REASON_ON_TARGET,
+    SKIP_REASON_PREFLIGHT,
+    SKIP_REASON_TOO_LARGE,
     TASK_STATUS_FAILED,
-    TASK_STATUS_RUNNING,
     TASK_STATUS_SUCCESS,
 )
-from pt_repost.db import Database
+from pt_repost.db import Connection, Database, Listener
 from pt_repost.douban import DoubanSubject
+from pt_repost.filters import FilterRules, TitleFilter, compile_filter
 from pt_repost.hardcode_subtitle import check_hardcode_chinese_subtitle
 from pt_repost.mediainfo import extract_mediainfo_from_file, parse_mediainfo_json
 from pt_repost.patterns import pattern_2160p, pattern_dovi, pattern_web_dl
+from pt_repost.picker import Pick
+from pt_repost.preflight import preflight
+from pt_repost.qb import (
+    QB_FILE_PRIORITY_MAXIMAL,
+    Qb,
+    QbFile,
+    QbTorrent,
+    header_ready,
+    local_file,
+    main_video_file,
+    main_video_index,
+    removed_messages,
+)
+from pt_repost.release import release_key
+from pt_repost.rss import (
+    FeedValidators,
+    RssItem,
+    Watermark,
+    fetch_torznab_page,
+    iter_rss_items,
+    open_feed,
+    rss_item_columns,
+)
+from pt_repost.schedule import RssTask, adaptive_interval, claim_due_rss
+from pt_repost.seen import SeenCache
+from pt_repost.snapshot import FeedRecorder
 from pt_repost.tmdb import (
     FullSubjectInfo,
     TMDBMovieDetail,
@@ -64,10 +102,13 @@ from pt_repost.tmdb import (
     TMDBTvDetail,
     TMDBTvSearchResult,
 )
+from pt_repost.torrent import parse_torrent_info
 from pt_repost.utils import (
     an2cn,
+    batched,
     generate_images,
     get_info_hash_v1_from_content,
+    get_total_size_from_content,
     human_readable_size,
     parse_json_as,
     parse_obj_as,
@@ -84,11 +125,25 @@ def format_exc(e: Exception) -> str:
 
 
 class Skip(Exception):
-    def __init__(self, guid: str, website: str, reason: str = ""):
+    def __init__(self, guid: str, website: str, reason: str = "", size: int = 0, detail: str = ""):
         super().__init__()
         self.guid: str = guid
         self.website: str = website
+        # one of `SKIP_REASON_*`, saved in rss_item.skip_reason
         self.reason: str = reason
+        # about this item, only logged
+        self.detail: str = detail
+        # size of torrent not downloaded, 0 if unknown
+        self.size: int = size
+
+
+class NoRoom(Exception):
+    """no qBittorrent instance has room for the torrent, rss_item is released back to pending"""
+
+    def __init__(self, size: int):
+        super().__init__()
+        # real size of torrent, rss may have a wrong one
+        self.size: int = size
 
 
 class Status(enum.IntEnum):
@@ -97,39 +152,6 @@ class Status(enum.IntEnum):
     done = 3
 
 
-@dataclasses.dataclass(frozen=True, kw_only=True)
-class QbFile:
-    index: int
-    name: str
-    size: int
-    priority: int
-    progress: float
-
-
-@dataclasses.dataclass(kw_only=True, frozen=True)
-class QbTorrent:
-    name: str
-    hash: str
-    state: TorrentState
-
-    save_path: str  # final download path
-    completed: int
-
-    uploaded: int
-
-    total_size: int
-    size: int
-    amount_left: int
-
-    num_seeds: int
-
-
-@dataclasses.dataclass(kw_only=True, frozen=True)
-class QbTracker:
-    msg: str
-    tier: int
-
-
 console = Console(emoji=False, force_terminal=True, no_color=False, legacy_windows=True)
 
 
@@ -142,10 +164,17 @@ class Processing:
 class Application:
     db: Database
     config: Config
-    qb: qbittorrentapi.Client
+    # by `Qb.name`, state of each instance is refreshed at start of each tick
+    qb_instances: dict[str, Qb]
 
     tmdb_client: httpx.Client
 
+    seen: SeenCache
+    # tracker messages of torrent removed by target website
+    removed_messages: frozenset[str] = DEFAULT_REMOVED_MESSAGES
+    recorder: FeedRecorder | None = None
+    catalog: TargetCatalog | None = None
+
     douban_client: httpx.Client = dataclasses.field(default_factory=httpx.Client)
 
     @classmethod
@@ -158,20 +187,24 @@ class Application:
             },
         )
 
+        qb_instances = [Qb.new(i, cfg.tracker_check_interval) for i in cfg.qb_instances]
+
         return Application(
             config=cfg,
             db=Database(cfg),
-            qb=qbittorrentapi.Client(
-                host=str(cfg.qb_url),
-                password=cfg.qb_url.password,
-                username=cfg.qb_url.username,
-                SIMPLE_RESPONSES=True,
-                FORCE_SCHEME_FROM_HOST=True,
-                VERBOSE_RESPONSE_LOGGING=False,
-                RAISE_NOTIMPLEMENTEDERROR_FOR_UNIMPLEMENTED_API_ENDPOINTS=True,
-                REQUESTS_ARGS={"timeout": 10},
-            ),
+            qb_instances={qb.name: qb for qb in qb_instances},
             tmdb_client=tmdb_client,
+            seen=SeenCache(cfg.seen_cache_size),
+            removed_messages=removed_messages(cfg.target_website),
+            recorder=FeedRecorder(cfg.data_dir.joinpath("feeds")) if cfg.record_feeds else None,
+            catalog=(
+                TargetCatalog(
+                    RssCatalogSource(cfg.target_catalog_url, cfg.http_proxy),
+                    cfg.target_catalog_interval,
+                )
+                if cfg.target_catalog_url
+                else None
+            ),
         )
 
     def __post_init__(self) -> None:
@@ -187,30 +220,93 @@ class Application:
             print("executing {}".format(sql_file.name))
             self.db.execute(sql_file.read_text(encoding="utf-8"))
 
-        try:
-            version = packaging.version.parse(self.qb.app_version())
-        except Exception as e:
-            print("failed to connect to qBittorrent", e)
-            sys.exit(1)
+    def __check_qb(self) -> None:
+        for qb in self.qb_instances.values():
+            try:
+                version = packaging.version.parse(qb.client.app_version())
+            except Exception as e:
+                print("failed to connect to qBittorrent {}".format(qb.name), e)
+                sys.exit(1)
 
-        print("successfully connect to qBittorrent")
-        if version < packaging.version.parse("v4.5.0"):
-            print("qb版本太旧，请升级到 >=4.5.0")
-            sys.exit(1)
+            print("successfully connect to qBittorrent {}".format(qb.name))
+            if version < packaging.version.parse("v4.5.0"):
+                print("qb版本太旧，请升级到 >=4.5.0")
+                sys.exit(1)
+
+    def get_qb(self, name: str) -> Qb | None:
+        """
+        qBittorrent instance holding a rss_item, rows added before multiple instances have no name.
+
+        None if the instance is renamed or removed from config.
+        """
+        if not name:
+            return next(iter(self.qb_instances.values()))
+        return self.qb_instances.get(name)
 
     def start(self) -> None:
+        # qBittorrent is only required by daemon, `replay` works without it.
+        self.__check_qb()
+
         for rss_id, rss in enumerate(self.config.rss):
             self.db.execute(
                 """
-            insert into rss (id, url, exclude_url, website, includes, excludes, interval_seconds)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
+            insert into rss (
+                id, url, exclude_url, website, includes, excludes, interval_seconds,
+                adaptive, min_interval_seconds, max_interval_seconds, effective_interval_seconds,
+                priority, rules_version
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $7, $11, $12)
             on conflict (id) do update set
                 url = excluded.url,
                 exclude_url = excluded.exclude_url,
                 website = excluded.website,
                 includes = excluded.includes,
                 excludes = excluded.excludes,
-                interval_seconds = excluded.interval_seconds
+                interval_seconds = excluded.interval_seconds,
+                adaptive = excluded.adaptive,
+                min_interval_seconds = excluded.min_interval_seconds,
+                max_interval_seconds = excluded.max_interval_seconds,
+                priority = excluded.priority,
+                rules_version = excluded.rules_version,
+                effective_interval_seconds = case
+                    when excluded.adaptive and rss.adaptive then rss.effective_interval_seconds
+                    else excluded.interval_seconds
+                end,
+                -- changed rules may accept items before watermark, fetch and parse the whole feed again
+                etag = case
+                    when rss.url = excluded.url and rss.rules_version = excluded.rules_version
+                    then rss.etag
+                    else ''
+                end,
+                last_modified = case
+                    when rss.url = excluded.url and rss.rules_version = excluded.rules_version
+                    then rss.last_modified
+                    else ''
+                end,
+                body_hash = case
+                    when rss.url = excluded.url and rss.rules_version = excluded.rules_version
+                    then rss.body_hash
+                    else ''
+                end,
+                exclude_etag = case
+                    when rss.exclude_url = excluded.exclude_url then rss.exclude_etag else ''
+                end,
+                exclude_last_modified = case
+                    when rss.exclude_url = excluded.exclude_url then rss.exclude_last_modified
+                    else ''
+                end,
+                exclude_body_hash = case
+                    when rss.exclude_url = excluded.exclude_url then rss.exclude_body_hash else ''
+                end,
+                watermark_pub_date = case
+                    when rss.url = excluded.url and rss.rules_version = excluded.rules_version
+                    then rss.watermark_pub_date
+                end,
+                watermark_guid = case
+                    when rss.url = excluded.url and rss.rules_version = excluded.rules_version
+                    then rss.watermark_guid
+                    else ''
+                end
             """,
                 [
                     rss_id,
@@ -220,23 +316,142 @@ class Application:
                     json.dumps(rss.includes),
                     json.dumps(rss.excludes),
                     rss.interval,
+                    rss.adaptive,
+                    rss.min_interval,
+                    rss.max_interval,
+                    rss.priority,
+                    FilterRules.new(
+                        includes=rss.includes,
+                        excludes=cast(list[str], rss.excludes),
+                        global_includes=self.global_rules.global_includes,
+                        global_excludes=self.global_rules.global_excludes,
+                    ).version,
                 ],
             )
 
+        self.refresh_filter_verdicts()
+        self.__fill_release_keys()
+        self.__warm_seen_cache()
+
+        listener = self.db.listen(NOTIFY_CHANNEL_TORRENT_FINISHED)
+
         interval = 1
         while True:
             self.__heart_beat()
-            time.sleep(interval)
+            # polling is still a fallback of notification
+            self.__wait_finished(listener, interval)
             interval = 60
             try:
                 self.__run_at_interval()
             except Exception as e:
                 print("failed to run", e)
 
+    @functools.cached_property
+    def global_rules(self) -> FilterRules:
+        return FilterRules.new(
+            global_includes=self.config.includes,
+            global_excludes=self.config.excludes,
+        )
+
+    def __fill_release_keys(self) -> None:
+        """
+        items ingested before release key was added.
+
+        some titles have no release key, so rows are visited once by primary key
+        instead of selecting rows with empty key until none left.
+        """
+        after: tuple[str, str] | None = None
+        while True:
+            rows: list[tuple[str, str, str]] = self.db.fetch_all(
+                """
+                select guid, website, title from rss_item
+                where release_key = ''
+                and ($1::text is null or (guid, website) > ($1, $2))
+                order by guid, website
+                limit 1000
+                """,
+                [*(after or (None, ""))],
+            )
+            if not rows:
+                return
+
+            after = (rows[-1][0], rows[-1][1])
+            self.db.execute(
+                """
+                update rss_item set release_key = t.release_key
+                from unnest($1::text[], $2::text[], $3::text[]) as t(guid, website, release_key)
+                where rss_item.guid = t.guid and rss_item.website = t.website
+                """,
+                [
+                    [guid for guid, _, _ in rows],
+                    [website for _, website, _ in rows],
+                    [release_key(title) for _, _, title in rows],
+                ],
+            )
+
+    def refresh_filter_verdicts(self) -> None:
+        """re-evaluate global filter on pending items ingested with another version of rules"""
+        rules = self.global_rules
+        title_filter = compile_filter(rules)
+
+        total = 0
+        after: tuple[str, str] | None = None
+        while True:
+            rows: list[tuple[str, str, str]] = self.db.fetch_all(
+                """
+                select guid, website, title from rss_item
+                where status = $1 and filter_version != $2
+                and ($3::text is null or (guid, website) > ($3, $4))
+                order by guid, website
+                limit 1000
+                """,
+                [RSS_ITEM_STATUS_PENDING, rules.version, *(after or (None, ""))],
+            )
+            if not rows:
+                break
+
+            after = (rows[-1][0], rows[-1][1])
+
+            self.db.execute(
+                """
+                update rss_item set filter_passed = t.passed, filter_version = $1
+                from unnest($2::text[], $3::text[], $4::bool[]) as t(guid, website, passed)
+                where rss_item.guid = t.guid and rss_item.website = t.website
+                """,
+                [
+                    rules.version,
+                    [guid for guid, _, _ in rows],
+                    [website for _, website, _ in rows],
+                    [title_filter.match(title) for _, _, title in rows],
+                ],
+            )
+            total += len(rows)
+
+        if total:
+            logger.info("re-evaluate global filter of {} pending items", total)
+
+    def __warm_seen_cache(self) -> None:
+        if self.seen.capacity <= 0:
+            return
+
+        rows: list[tuple[str, str]] = self.db.fetch_all(
+            "select guid, website from rss_item order by released_at desc limit $1",
+            [self.seen.capacity],
+        )
+
+        # add oldest first, so newest items are evicted last
+        for guid, website in reversed(rows):
+            self.seen.add(website, [guid])
+
+        logger.info("warm seen cache with {} items", len(rows))
+
     def __run_at_interval(self) -> None:
+        for qb in self.qb_instances.values():
+            qb.state.sync()
         self.__process_local_uploading()
         self.__process_local_downloading()
         self.__fetch_rss()
+        self.__sync_target_catalog()
         self.__pick_rss_item()
         self.__debug_report()
 
@@ -280,39 +495,21 @@ class Application:
 
         console.print(table)
 
-    def process_task(self, t: QbTorrent) -> None:
-        files = [parse_obj_as(QbFile, x) for x in self.qb.torrents_files(t.hash)]
-        files = [f for f in files if f.name.lower().endswith(video_ext)]
-        files.sort(key=lambda x: x.size, reverse=True)
-        if not files:
+    def process_task(self, qb: Qb, t: QbTorrent) -> None:
+        files = parse_obj_as(list[QbFile], qb.client.torrents_files(t.hash))
+        video = main_video_file(files)
+        if video is None:
             logger.error("can't find video files for torrent {}", t.hash)
             return
 
-        first_video_file = files[0]
-        video_file = Path(t.save_path, first_video_file.name)
-        if not video_file.exists():
-            logger.error("can't find local file {}".format(video_file))
+        video_file = local_file(t, video)
+        if video_file is None:
+            logger.error("can't find local file {}".format(Path(t.save_path, video.name)))
             return
 
-        mediainfo_row = self.db.fetch_one(
-            "select mediainfo_text, mediainfo_json from mediainfo where info_hash = $1",
-            [t.hash],
-        )
-        if mediainfo_row:
-            mediainfo_text, mediainfo_json = mediainfo_row
-        else:
-            logger.info("generating media info")
-            mediainfo_text, mediainfo_json = extract_mediainfo_from_file(video_file)
-            self.db.execute(
-                """
-                 insert into mediainfo (info_hash, mediainfo_text, mediainfo_json)
-                 values ($1, $2, $3)
-                 on conflict (info_hash) do nothing
-                 """,
-                [t.hash, mediainfo_text, mediainfo_json],
-            )
+        mediainfo_text, mediainfo_json = self.__ensure_mediainfo(t.hash, video_file, video)
 
-        count = 4
+        images = self.__ensure_images(t.hash, video_file)
 
         # should save db in early and get description from db
         title, meta_info, hard_code_chinese_subtitle, douban_id, imdb_id = cast(
@@ -325,68 +522,9 @@ class Application:
 
         info = parse_json_as(FullSubjectInfo, meta_info)
 
-        images = [
-            t[0] for t in self.db.fetch_all("select url from image where info_hash = $1", [t.hash])
-        ]
-
-        if len(images) < count:
-            images = []
-            self.db.execute("delete from image where info_hash = $1", [t.hash])
-            with tempfile.TemporaryDirectory(prefix="pt-repost-") as tempdir:
-                image_format = "png"
-                if (
-                    pattern_web_dl.search(title)
-                    and (pattern_any_hdr10.search(title) or pattern_dovi.search(title))
-                    and pattern_2160p.search(title)
-                ):
-                    image_format = "jpg"
-                elif "CN" in info.origin_country and pattern_ssd_jpg_whitelist.search(title):
-                    image_format = "jpg"
-
-                image_files = list(
-                    generate_images(
-                        video_file,
-                        count=count,
-                        tmpdir=Path(tempdir),
-                        image_format=image_format,
-                    )
-                )
-
-                hard_code_chinese_subtitle = check_hardcode_chinese_subtitle(image_files)
-                if hard_code_chinese_subtitle:
-                    self.db.execute(
-                        """update rss_item set hard_code_chinese_subtitle = true where info_hash = $1""",
-                        [t.hash],
-                    )
-
-                for file in image_files:
-                    retry_count = 0
-
-                    while True:
-                        try:
-                            url = self.upload_image(file, self.config.target_website)
-                            break
-                        except Exception as e:
-                            retry_count += 1
-                            logger.warning(
-                                "failed to upload image, retry count {}: {}",
-                                retry_count,
-                                e,
-                            )
-
-                            if retry_count >= 5:
-                                raise
-
-                    logger.info("uploaded image url {!r}", url)
-                    self.db.execute(
-                        "insert into image (info_hash, url, uuid) values ($1, $2, $3)",
-                        [t.hash, url, str(uuid7())],
-                    )
-                    images.append(url)
-
         site_implement = SSD(self.config)
 
-        tc = self.export_torrent(t.hash)
+        tc = self.export_torrent(qb, t.hash)
 
         logger.info("create post")
 
@@ -421,7 +559,7 @@ class Application:
             info=info,
         )
 
-        self.qb.torrents_add(
+        qb.client.torrents_add(
             torrent_files=new_torrent,
             save_path=t.save_path,
             is_skip_checking=True,
@@ -432,6 +570,16 @@ class Application:
 
         new_info_hash = get_info_hash_v1_from_content(new_torrent)
 
+        self.save_target_releases(
+            [
+                TargetRelease(
+                    source_id=new_info_hash,
+                    name=title,
+                    size=get_total_size_from_content(new_torrent),
+                )
+            ]
+        )
+
         self.db.execute(
             """
             update rss_item set
@@ -444,6 +592,123 @@ class Application:
             [RSS_ITEM_STATUS_UPLOADING, new_info_hash, t.hash],
         )
 
+    def __ensure_mediainfo(
+        self, info_hash: str, video_file: Path, video: QbFile
+    ) -> tuple[str, str]:
+        """
+        mediainfo of main video file, generated once and saved in db.
+
+        mediainfo of incomplete file is provisional, it's regenerated once the file is complete.
+        """
+        provisional = video.progress < 1
+        mediainfo_row = self.db.fetch_one(
+            """
+            select mediainfo_text, mediainfo_json, provisional from mediainfo
+            where info_hash = $1
+            """,
+            [info_hash],
+        )
+        if mediainfo_row and (provisional or not mediainfo_row[2]):
+            mediainfo_text, mediainfo_json, _ = mediainfo_row
+        else:
+            logger.info("generating media info")
+            name = PurePosixPath(video.name).name
+            if video_file.name == name:
+                mediainfo_text, mediainfo_json = extract_mediainfo_from_file(video_file)
+            else:
+                # incomplete file with `.!qB` extension, file name is shown in mediainfo
+                with tempfile.TemporaryDirectory(prefix="pt-repost-") as tempdir:
+                    link = Path(tempdir, name)
+                    link.symlink_to(video_file)
+                    mediainfo_text, mediainfo_json = extract_mediainfo_from_file(link)
+            self.db.execute(
+                """
+                 insert into mediainfo (info_hash, mediainfo_text, mediainfo_json, provisional)
+                 values ($1, $2, $3, $4)
+                 on conflict (info_hash) do update set
+                    mediainfo_text = excluded.mediainfo_text,
+                    mediainfo_json = excluded.mediainfo_json,
+                    provisional = excluded.provisional
+                 where mediainfo.provisional
+                 """,
+                [info_hash, mediainfo_text, mediainfo_json, provisional],
+            )
+
+        return mediainfo_text, mediainfo_json
+
+    def __ensure_images(self, info_hash: str, video_file: Path) -> list[str]:
+        """screenshots of main video file, generated and uploaded once and saved in db"""
+        title, meta_info = cast(
+            tuple[str, Any],
+            self.db.fetch_one(
+                "select title, meta_info from rss_item where info_hash = $1 limit 1",
+                [info_hash],
+            ),
+        )
+
+        info = parse_json_as(FullSubjectInfo, meta_info)
+
+        images = [
+            t[0]
+            for t in self.db.fetch_all("select url from image where info_hash = $1", [info_hash])
+        ]
+
+        if len(images) < SCREENSHOT_COUNT:
+            images = []
+            self.db.execute("delete from image where info_hash = $1", [info_hash])
+            with tempfile.TemporaryDirectory(prefix="pt-repost-") as tempdir:
+                image_format = "png"
+                if (
+                    pattern_web_dl.search(title)
+                    and (pattern_any_hdr10.search(title) or pattern_dovi.search(title))
+                    and pattern_2160p.search(title)
+                ):
+                    image_format = "jpg"
+                elif "CN" in info.origin_country and pattern_ssd_jpg_whitelist.search(title):
+                    image_format = "jpg"
+
+                image_files = list(
+                    generate_images(
+                        video_file,
+                        count=SCREENSHOT_COUNT,
+                        tmpdir=Path(tempdir),
+                        image_format=image_format,
+                    )
+                )
+
+                if check_hardcode_chinese_subtitle(image_files):
+                    self.db.execute(
+                        """update rss_item set hard_code_chinese_subtitle = true where info_hash = $1""",
+                        [info_hash],
+                    )
+
+                for file in image_files:
+                    retry_count = 0
+
+                    while True:
+                        try:
+                            url = self.upload_image(file, self.config.target_website)
+                            break
+                        except Exception as e:
+                            retry_count += 1
+                            logger.warning(
+                                "failed to upload image, retry count {}: {}",
+                                retry_count,
+                                e,
+                            )
+
+                            if retry_count >= 5:
+                                raise
+
+                    logger.info("uploaded image url {!r}", url)
+                    self.db.execute(
+                        "insert into image (info_hash, url, uuid) values ($1, $2, $3)",
+                        [info_hash, url, str(uuid7())],
+                    )
+                    images.append(url)
+
+        return images
+
     def __process_local_downloading(self) -> None:
         """
         may move torrent from download status to uploading status
@@ -461,15 +726,43 @@ class Application:
                 self.config.node_id,
             ],
         )
-        downloading = {
-            row[0]
-            for row in self.db.fetch_all(
-                """select info_hash from rss_item where status = $1""",
-                [RSS_ITEM_STATUS_DOWNLOADING],
+        rows: list[tuple[str, str]] = self.db.fetch_all(
+            """
+            select info_hash, qb_instance from rss_item
+            where status = $1 and picked_node = $2
+            """,
+            [RSS_ITEM_STATUS_DOWNLOADING, self.config.node_id],
+        )
+
+        downloading = self.__group_by_instance(rows)
+        for qb in self.qb_instances.values():
+            self.__process_instance_downloading(qb, downloading.get(qb.name, set()))
+
+    def __group_by_instance(self, rows: list[tuple[str, str]]) -> dict[str, set[str]]:
+        """
+        (info_hash, qb_instance) rows to info hashes by `Qb.name`.
+
+        rows on unknown instance are left as they are, instead of checked on another instance.
+        """
+        result: dict[str, set[str]] = {}
+        unknown: dict[str, int] = {}
+        for info_hash, name in rows:
+            qb = self.get_qb(name)
+            if qb is None:
+                unknown[name] = unknown.get(name, 0) + 1
+                continue
+            result.setdefault(qb.name, set()).add(info_hash)
+
+        for name, count in unknown.items():
+            logger.warning(
+                "{} rss items on unknown qBittorrent instance {!r}, renamed or removed from config?",
+                count,
+                name,
             )
-        }
+        return result
 
-        local_torrents = parse_obj_as(list[QbTorrent], self.qb.torrents_info(category=QB_CATEGORY))
+    def __process_instance_downloading(self, qb: Qb, downloading: set[str]) -> None:
+        local_torrents = qb.state.torrents(category=QB_CATEGORY)
         local_hashes = {t.hash for t in local_torrents}
 
         missing_in_local_downloads = {h for h in downloading if h not in local_hashes}
@@ -486,50 +779,187 @@ class Application:
                 ],
             )
 
+        local_torrents = [t for t in local_torrents if t.hash in downloading]
+
+        try:
+            self.__update_progress([t for t in local_torrents if not t.state.is_uploading])
+        except Exception as e:
+            logger.warning("failed to update torrent progress {}", e)
+
         for t in local_torrents:
-            if t.hash not in downloading:
-                continue
             if not t.state.is_uploading:
-                # with contextlib.suppress(Exception):
-                try:
-                    self.db.execute(
-                        "update rss_item set progress = $1 where info_hash = $2",
-                        [t.completed / t.total_size, t.hash],
-                    )
-                except Exception as e:
-                    logger.warning("failed to update torrent progress {}", e)
+                if self.config.early_processing:
+                    self.__process_early(qb, t)
                 continue
 
-            try:
-                self.process_task(t=t)
-            except Exception as e:
-                logger.warning("failed to process task {!r} {}", e, e)
-                self.db.execute(
-                    """
-                    update rss_item set status = $1,
-                     failed_reason = $2,
-                     updated_at = current_timestamp
-                    where info_hash = $3
-                    """,
-                    [
-                        RSS_ITEM_STATUS_FAILED,  # 1
-                        format_exc(e),  # 2
-                        t.hash,
-                    ],
+            self.__process_downloaded(qb, t)
+
+    def __process_early(self, qb: Qb, t: QbTorrent) -> None:
+        """
+        generate mediainfo and screenshots of main video file before torrent finished.
+
+        main video file is downloaded first, mediainfo is generated when head and tail pieces exist,
+        screenshots when the file is complete. post is created by `process_task` after torrent finished.
+        """
+        # checked before any call to qBittorrent, most torrents are already done
+        has_mediainfo, image_count = cast(
+            tuple[bool, int],
+            self.db.fetch_one(
+                """
+                select exists(select 1 from mediainfo where info_hash = $1),
+                    (select count(*) from image where info_hash = $1)
+                """,
+                [t.hash],
+            ),
+        )
+        if has_mediainfo and image_count >= SCREENSHOT_COUNT:
+            return
+
+        try:
+            files = parse_obj_as(list[QbFile], qb.client.torrents_files(t.hash))
+            video = main_video_file(files)
+            if video is None:
+                return
+
+            # torrent added before main video file is prioritized at add time
+            if video.priority != QB_FILE_PRIORITY_MAXIMAL:
+                qb.client.torrents_file_priority(
+                    t.hash, file_ids=video.index, priority=QB_FILE_PRIORITY_MAXIMAL
                 )
 
-    def __process_local_uploading(self) -> None:
-        uploading = {
-            x[0]
-            for x in self.db.fetch_all(
-                "select target_info_hash from rss_item where picked_node = $1 and status = $2",
-                [self.config.node_id, RSS_ITEM_STATUS_UPLOADING],
-            )
-        }
+            # added paused for prioritizing, resume failed or torrent was not found yet
+            if t.state.is_stopped and not t.completed:
+                qb.client.torrents_resume(t.hash)
 
-        local_hashes = {t["hash"] for t in self.qb.torrents_info(category=QB_CATEGORY)}
+            video_file = local_file(t, video)
+            if video_file is None:
+                return
 
-        local_removed = {t for t in uploading if t not in local_hashes}
+            if video.progress >= 1:
+                self.__ensure_mediainfo(t.hash, video_file, video)
+                self.__ensure_images(t.hash, video_file)
+                return
+
+            # screenshots need complete file
+            if has_mediainfo:
+                return
+
+            piece_size = cast(int, qb.client.torrents_properties(t.hash)["piece_size"])
+            if header_ready(
+                cast(list[int], qb.client.torrents_piece_states(t.hash)),
+                video.piece_range,
+                pieces=-(-EARLY_MEDIAINFO_SIZE // piece_size),
+            ):
+                self.__ensure_mediainfo(t.hash, video_file, video)
+        except Exception as e:
+            logger.warning("failed to process {!r} before finished: {}", t.name, e)
+
+    def __process_downloaded(self, qb: Qb, t: QbTorrent) -> None:
+        try:
+            self.process_task(qb, t)
+        except Exception as e:
+            logger.warning("failed to process task {!r} {}", e, e)
+            self.db.execute(
+                """
+                update rss_item set status = $1,
+                 failed_reason = $2,
+                 updated_at = current_timestamp
+                where info_hash = $3
+                """,
+                [
+                    RSS_ITEM_STATUS_FAILED,  # 1
+                    format_exc(e),  # 2
+                    t.hash,
+                ],
+            )
+
+    def process_finished(self, info_hashes: list[str]) -> None:
+        """
+        process torrents finished downloading now, instead of waiting for next tick.
+
+        unknown torrents and torrents not finished in qBittorrent are left to polling.
+        """
+        rows: list[tuple[str, str]] = self.db.fetch_all(
+            """
+            select info_hash, qb_instance from rss_item
+            where status = $1 and picked_node = $2 and info_hash = any($3)
+            """,
+            [
+                RSS_ITEM_STATUS_DOWNLOADING,
+                self.config.node_id,
+                [h.lower() for h in info_hashes],
+            ],
+        )
+
+        for name, hashes in self.__group_by_instance(rows).items():
+            qb = self.qb_instances[name]
+            qb.state.sync()
+            for info_hash in hashes:
+                t = qb.state.get(info_hash)
+                if t is None or not t.state.is_uploading:
+                    continue
+                logger.info("process finished torrent {!r}", t.name)
+                self.__process_downloaded(qb, t)
+
+    def __wait_finished(self, listener: Listener, timeout: float) -> None:
+        """wait for next tick, finished torrents notified meanwhile are processed immediately"""
+        deadline = time.monotonic() + timeout
+        while (rest := deadline - time.monotonic()) > 0:
+            try:
+                info_hashes = listener.wait(rest)
+            except Exception as e:
+                logger.warning("failed to listen for finished torrents: {}", e)
+                time.sleep(max(deadline - time.monotonic(), 0))
+                return
+
+            if not info_hashes:
+                continue
+
+            try:
+                self.process_finished(info_hashes)
+            except Exception as e:
+                print("failed to process finished torrents", e)
+
+    def __update_progress(self, torrents: list[QbTorrent]) -> None:
+        """update progress of all downloading torrents in one statement, unchanged rows are skipped"""
+        if not torrents:
+            return
+
+        self.db.execute(
+            """
+            update rss_item
+            set progress = t.progress, qb_state = t.state, eta = t.eta
+            from unnest($1::text[], $2::float8[], $3::text[], $4::int8[])
+                as t(info_hash, progress, state, eta)
+            where rss_item.info_hash = t.info_hash
+            and (rss_item.progress, rss_item.qb_state, rss_item.eta)
+                is distinct from (t.progress, t.state, t.eta)
+            """,
+            [
+                [t.hash for t in torrents],
+                [t.progress for t in torrents],
+                [t.state.value for t in torrents],
+                [t.eta for t in torrents],
+            ],
+        )
+
+    def __process_local_uploading(self) -> None:
+        rows: list[tuple[str, str]] = self.db.fetch_all(
+            """
+            select target_info_hash, qb_instance from rss_item
+            where picked_node = $1 and status = $2
+            """,
+            [self.config.node_id, RSS_ITEM_STATUS_UPLOADING],
+        )
+
+        uploading = self.__group_by_instance(rows)
+        for qb in self.qb_instances.values():
+            self.__process_instance_uploading(qb, uploading.get(qb.name, set()))
+
+    def __process_instance_uploading(self, qb: Qb, uploading: set[str]) -> None:
+        local_hashes = {t.hash for t in qb.state.torrents(category=QB_CATEGORY)}
+
+        local_removed = {t for t in uploading if t not in local_hashes}
 
         if local_removed:
             self.db.execute(
@@ -541,17 +971,13 @@ class Application:
             )
 
         removed_torrents = set()
-
-        for t in parse_obj_as(list[QbTorrent], self.qb.torrents_info(status_filter="seeding")):
+        qb.trackers.retain(uploading)
+        for t in qb.state.seeding():
             if t.hash not in uploading:
                 continue
-            for tracker in parse_obj_as(list[QbTracker], self.qb.torrents_trackers(t.hash)):
-                if tracker.tier < 0:
-                    continue
-                if tracker.msg == SSD_REMOVED_MESSAGE:
-                    logger.info("removed by website: {!r}", t.name)
-                    removed_torrents.add(t.hash)
-                    break
+            if not self.removed_messages.isdisjoint(qb.trackers.messages(t)):
+                logger.info("removed by website: {!r}", t.name)
+                removed_torrents.add(t.hash)
 
         if removed_torrents:
             self.db.execute(
@@ -565,7 +991,7 @@ class Application:
 
         done_torrents = set()
 
-        for t in parse_obj_as(list[QbTorrent], self.qb.torrents_info(status_filter="seeding")):
+        for t in qb.state.seeding():
             if t.hash not in uploading:
                 continue
             if t.uploaded <= t.total_size:
@@ -797,8 +1223,8 @@ class Application:
             [self.config.node_id, datetime.now(tz=timezone.utc)],
         )
 
-    def export_torrent(self, info_hash: str) -> bytes:
-        return self.qb.torrents_export(info_hash)
+    def export_torrent(self, qb: Qb, info_hash: str) -> bytes:
+        return qb.client.torrents_export(info_hash)
 
     def upload_image(self, file: Path, _site: str) -> str:
         return self.upload_cmct(file)
@@ -859,71 +1285,79 @@ class Application:
 
     def __fetch_rss(self) -> None:
         logger.info("schedule for fetch rss job")
-        process_rss_task = None
-        run_id = None
-        with (
-            self.db.lock(LOCK_KEY_SCHEDULE_RSS),
-            self.db.connection() as conn,
-            conn.transaction(),
-        ):
-            conn.execute("SET TRANSACTION ISOLATION LEVEL SERIALIZABLE")
-            for rss_id, url, exclude_url, website, includes, excludes, interval in cast(
-                list[tuple[int, str, str, str, list[str | list[str]], list[str], int]],
-                conn.execute(
-                    "select id,url,exclude_url,website,includes,excludes,interval_seconds from rss order by id"
-                ).fetchall(),
-            ):
-                if not conn.fetch_val(
-                    "select count(1) from rss_run where rss_id = $1 and created_at > $2",
-                    [
-                        rss_id,
-                        datetime.now().astimezone() - timedelta(seconds=interval),
-                    ],
-                ):
-                    run_id = conn.fetch_val(
-                        """
-                        insert into rss_run (rss_id, node_id, created_at, status)
-                         values ($1, $2, $3, $4)
-                        returning id
-                        """,
-                        [
-                            rss_id,
-                            self.config.node_id,
-                            datetime.now().astimezone(),
-                            TASK_STATUS_RUNNING,
-                        ],
-                    )
-                    process_rss_task = (
-                        rss_id,
-                        url,
-                        exclude_url,
-                        website,
-                        includes,
-                        excludes,
-                    )
-                    break
+        now = datetime.now().astimezone()
 
-        if process_rss_task is not None:
-            rss_id, url, exclude_url, website, includes, excludes = process_rss_task
-            try:
-                logger.info("fetch rss {} {}", website, rss_id)
-                self.process_rss_run(url, exclude_url, website, includes, excludes)
-                logger.info("fetch successfully {} {}", website, rss_id)
-                self.db.execute(
-                    """
-                    update rss_run set status = $1 where id=$2
-                    """,
-                    [TASK_STATUS_SUCCESS, run_id],
-                )
-            except Exception as e:
-                console.print_exception()
-                print("failed to fetch rss {}", e)
-                self.db.execute(
-                    """
-                    update rss_run set status = $1, failed_reason = $2 where id=$3
-                    """,
-                    [TASK_STATUS_FAILED, format_exc(e), run_id],
-                )
+        with self.db.connection() as conn:
+            tasks = claim_due_rss(conn, now, self.config.node_id)
+
+        if not tasks:
+            return
+
+        logger.info("fetch {} rss", len(tasks))
+
+        # each rss has its own http timeout, a slow website only occupies one worker.
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.config.rss_fetch_concurrency,
+            thread_name_prefix="fetch-rss",
+        ) as executor:
+            for task in tasks:
+                executor.submit(self.__run_rss_task, task)
+
+    def __run_rss_task(self, task: RssTask) -> None:
+        try:
+            logger.info("fetch rss {} {}", task.website, task.rss_id)
+            fetch_result, new_items = self.process_rss_run(
+                task.rss_id,
+                task.url,
+                task.exclude_url,
+                task.website,
+                task.includes,
+                task.excludes,
+            )
+            logger.info("fetch successfully {} {} {}", task.website, task.rss_id, fetch_result)
+            self.db.execute(
+                """
+                update rss_run set status = $1, fetch_result = $2, new_items = $3 where id=$4
+                """,
+                [TASK_STATUS_SUCCESS, fetch_result, new_items, task.run_id],
+            )
+            if task.adaptive:
+                self.__adjust_interval(task)
+        except Exception as e:
+            console.print_exception()
+            print("failed to fetch rss {}", e)
+            self.db.execute(
+                """
+                update rss_run set status = $1, failed_reason = $2 where id=$3
+                """,
+                [TASK_STATUS_FAILED, format_exc(e), task.run_id],
+            )
+
+    def __adjust_interval(self, task: RssTask) -> None:
+        runs: list[tuple[datetime, int]] = self.db.fetch_all(
+            """
+            select created_at, new_items from rss_run
+            where rss_id = $1 and status = $2
+            order by created_at desc
+            limit 11
+            """,
+            [task.rss_id, TASK_STATUS_SUCCESS],
+        )
+
+        interval = adaptive_interval(runs, task.interval, task.min_interval, task.max_interval)
+        if interval == task.interval:
+            return
+
+        logger.info("adjust interval of rss {} {} -> {}", task.rss_id, task.interval, interval)
+        self.db.execute(
+            """
+            update rss set
+                effective_interval_seconds = $1,
+                next_run_at = (select created_at from rss_run where id = $2) + make_interval(secs => $1)
+            where id = $3
+            """,
+            [interval, task.run_id, task.rss_id],
+        )
 
     def __pick_rss_item(self) -> None:
         while True:
@@ -939,14 +1373,37 @@ class Application:
             try:
                 self.__process_new_pick(pick)
             except Skip as e:
-                logger.info("skip torrent {} {} {}", pick.website, pick.guid, e.reason)
+                logger.info(
+                    "skip torrent {} {} {} {}, saved {}",
+                    pick.website,
+                    pick.guid,
+                    e.reason,
+                    e.detail,
+                    human_readable_size(e.size),
+                )
                 self.db.execute(
                     """
                     update rss_item set status = $1,
+                        skip_reason = $2,
+                        -- real size of torrent, for size saved by `skipped` command
+                        size = case when $5::int8 > 0 then $5 else size end,
                         updated_at = current_timestamp
-                    where guid = $2 and website = $3
+                    where guid = $3 and website = $4
                     """,
-                    [RSS_ITEM_STATUS_SKIPPED, pick.guid, pick.website],
+                    [RSS_ITEM_STATUS_SKIPPED, e.reason, pick.guid, pick.website, e.size],
+                )
+
+            except NoRoom as e:
+                logger.info("no room for {!r}, release it", pick.title)
+                self.db.execute(
+                    """
+                    update rss_item set status = $1,
+                        picked_node = '',
+                        size = $2,
+                        updated_at = current_timestamp
+                    where guid = $3 and website = $4
+                    """,
+                    [RSS_ITEM_STATUS_PENDING, e.size, pick.guid, pick.website],
                 )
 
             except Exception as e:
@@ -991,271 +1448,800 @@ class Application:
 
         try:
             info_hash = get_info_hash_v1_from_content(tc.content)
+            size = get_total_size_from_content(tc.content)
         except bencode2.BencodeDecodeError:
             print(pick.link)
             print(tc.text)
             raise
 
+        if size >= self.config.max_single_torrent_size:
+            raise Skip(
+                pick.guid,
+                pick.website,
+                SKIP_REASON_TOO_LARGE,
+                size=size,
+                detail=f"torrent size {human_readable_size(size)}",
+            )
+
+        if pick.size and abs(pick.size - size) > size // 10:
+            logger.warning(
+                "size of {!r} in rss is {}, but torrent is {}",
+                pick.title,
+                human_readable_size(pick.size),
+                human_readable_size(size),
+            )
+
+        torrent_info = parse_torrent_info(tc.content)
+        rejection = preflight(torrent_info, pick.title, SSD(self.config))
+        if rejection is not None:
+            raise Skip(
+                pick.guid,
+                pick.website,
+                f"{SKIP_REASON_PREFLIGHT}:{rejection.check}",
+                size=size,
+                detail=rejection.detail,
+            )
+
+        # only torrents to be added take room, skipped ones are never retried as no room
+        qb = self.__place_torrent(pick, size)
+
+        # size in rss may be missing or wrong, use real size for admission of next picks
         self.db.execute(
-            "update rss_item set info_hash = $1 where guid = $2 and website = $3",
-            [info_hash, pick.guid, pick.website],
+            """
+            update rss_item set info_hash = $1, size = $2, qb_instance = $3
+            where guid = $4 and website = $5
+            """,
+            [info_hash, size, qb.name, pick.guid, pick.website],
         )
 
-        self.qb.torrents_add(
+        video_index = main_video_index(torrent_info) if self.config.early_processing else None
+
+        qb.client.torrents_add(
             torrent_files=tc.content,
+            save_path=qb.save_path or None,
+            # main video file is downloaded first for `__process_early`
+            is_sequential_download=self.config.early_processing or None,
+            is_first_last_piece_priority=self.config.early_processing or None,
+            # `file_priorities` of qBittorrent can't be used with uploaded torrent file,
+            # set priority of main video file before any piece is downloaded instead.
+            is_paused=video_index is not None or None,
             category="pt-repost",
             tags="pt-repost",
             add_to_top_of_queue=False,
         )
 
+        if video_index is not None:
+            try:
+                self.__prioritize_file(qb, info_hash, video_index)
+            finally:
+                # torrent still paused if this failed is resumed by `__process_early`
+                qb.client.torrents_resume(info_hash)
+
+    def __prioritize_file(self, qb: Qb, info_hash: str, index: int) -> None:
+        # torrent is added by qBittorrent asynchronously
+        for _ in range(10):
+            try:
+                qb.client.torrents_file_priority(
+                    info_hash, file_ids=index, priority=QB_FILE_PRIORITY_MAXIMAL
+                )
+                return
+            except qbittorrentapi.NotFound404Error:
+                time.sleep(0.5)
+
+        logger.warning("torrent {} not found in qBittorrent {}", info_hash, qb.name)
+
+    def __place_torrent(self, pick: Pick, size: int) -> Qb:
+        """qBittorrent instance with most room left"""
+        name, left = self.__capacity(exclude=pick).best()
+        if left - size <= 0:
+            raise NoRoom(size)
+
+        return self.qb_instances[name]
+
+    def __capacity(self, exclude: Pick | None = None) -> Capacity:
+        """room of each qBittorrent instance, `exclude` is the pick being placed"""
+        rows: list[tuple[str, int, str, str, str]] = self.db.fetch_all(
+            """
+            select info_hash, size, qb_instance, guid, website from rss_item
+            where picked_node = $1 and status = any($2)
+            """,
+            [self.config.node_id, list(RSS_ITEM_STATUS_PROCESSING)],
+        )
+
+        processing: dict[str, list[tuple[str, int]]] = {}
+        total = 0
+        for info_hash, size, name, guid, website in rows:
+            if exclude is not None and (guid, website) == (exclude.guid, exclude.website):
+                continue
+            total += size
+            # claimed but not placed yet, or on unknown instance, only counted in node total
+            if not info_hash:
+                continue
+            qb = self.get_qb(name)
+            if qb is not None:
+                processing.setdefault(qb.name, []).append((info_hash, size))
+
+        capacity = Capacity(
+            node=self.config.max_processing_size - total
+            if self.config.max_processing_size > 0
+            else None,
+            rooms={
+                qb.name: qb.room(processing.get(qb.name, [])) for qb in self.qb_instances.values()
+            },
+        )
+
+        if self.config.adaptive_admission:
+            capacity.disk_of = {qb.name: qb.disk for qb in self.qb_instances.values()}
+            capacity.disks = self.__admission_budget()
+
+        return capacity
+
     def pick_rss_item(self) -> list[Pick]:
         logger.info("schedule for pick rss item")
-        picked: list[Pick] = []
 
-        # maybe use a SERIALIZABLE isolation_level instead
-        with self.db.connection() as conn, conn.transaction():
-            conn.execute("SET TRANSACTION ISOLATION LEVEL SERIALIZABLE")
-            current_processing = conn.execute(
-                """
-                    select size,status,info_hash from rss_item
-                    where picked_node = $1 and status = any($2)
-                    """,
-                [
-                    self.config.node_id,
-                    list(RSS_ITEM_STATUS_PROCESSING),
-                ],
-            ).fetchall()
+        current_processing = self.db.fetch_all(
+            """
+            select size,status,info_hash from rss_item
+            where picked_node = $1 and status = any($2)
+            """,
+            [
+                self.config.node_id,
+                list(RSS_ITEM_STATUS_PROCESSING),
+            ],
+        )
+
+        current_total_size = sum(t[0] for t in current_processing)
+
+        if len(current_processing) >= self.config.max_processing_per_node:
+            return []
+
+        capacity = self.__capacity()
+        # a torrent is placed on one instance, it must fit in room of that instance
+        _, rest = capacity.best()
+        if rest <= 0:
+            logger.info("no room for new torrent on any qBittorrent instance")
+            return []
+
+        if self.config.recent_release_seconds <= 0:
+            released_after = datetime.fromtimestamp(0, tz=timezone.utc)
+        else:
+            released_after = datetime.fromtimestamp(
+                time.time() - self.config.recent_release_seconds, tz=timezone.utc
+            ).astimezone()
+            logger.info("pick release data after {}", released_after.replace(microsecond=0))
 
-            current_total_size = sum(t[0] for t in current_processing)
-            rest = self.config.max_processing_size - current_total_size
+        def accept(pick: Pick) -> bool:
+            name, left = capacity.best()
+            if left - pick.size <= 0:
+                return False
 
-            if len(current_processing) >= self.config.max_processing_per_node:
-                return []
+            if pick.size >= self.config.max_single_torrent_size:
+                return False
 
-            if self.config.recent_release_seconds <= 0:
-                released_after = datetime.fromtimestamp(0, tz=timezone.utc)
+            capacity.take(name, pick.size)
+            return True
+
+        limit = self.config.max_processing_per_node - len(current_processing)
+
+        self.__skip_duplicated_releases()
+
+        scoring = None
+        if self.config.pick_order == PICK_ORDER_SCORE:
+            scoring = picker.Scoring(
+                website_weights=self.config.website_weights,
+                window=self.config.recent_release_seconds,
+                deadline_weight=self.config.deadline_weight,
+            )
+
+        with self.db.connection() as conn:
+            if self.config.pick_strategy == PICK_STRATEGY_KNAPSACK:
+                picked = self.__pick_knapsack(conn, capacity, limit, released_after, scoring)
             else:
-                released_after = datetime.fromtimestamp(
-                    time.time() - self.config.recent_release_seconds, tz=timezone.utc
-                ).astimezone()
-                logger.info("pick release data after {}", released_after.replace(microsecond=0))
+                picked = picker.claim(
+                    conn,
+                    node_id=self.config.node_id,
+                    accept=accept,
+                    limit=limit,
+                    batch_size=PICK_BATCH_SIZE,
+                    max_size=rest,
+                    released_after=released_after,
+                    min_seeders=self.config.min_seeders,
+                    title_filter=compile_filter(self.global_rules),
+                    scoring=scoring,
+                )
 
-            rss_items: list[tuple[str, str, str, datetime, int, str, str, str]] = conn.fetch_all(
-                """
-                    select guid,website,link,released_at,size,title,imdb_id,douban_id
-                    from rss_item where status = $1 and size <= $2 and released_at >= $3
-                    order by released_at desc
-                    """,
-                [
-                    RSS_ITEM_STATUS_PENDING,
-                    rest,
-                    released_after,
+        used_size = current_total_size + sum(p.size for p in picked)
+        used_count = len(current_processing) + len(picked)
+        logger.info(
+            "{} picked {} items, node utilization: {} size, {}/{} items",
+            self.config.pick_strategy,
+            len(picked),
+            # max-processing-size of node is optional when instances have their own limit
+            f"{used_size / self.config.max_processing_size:.1%}"
+            if self.config.max_processing_size > 0
+            else human_readable_size(used_size),
+            used_count,
+            self.config.max_processing_per_node,
+        )
+
+        return picked
+
+    def __sync_target_catalog(self) -> None:
+        if self.catalog is None or not self.catalog.due():
+            return
+
+        try:
+            releases = self.catalog.pull()
+        except Exception as e:
+            logger.warning("failed to sync target catalog: {}", e)
+            return
+
+        self.save_target_releases(releases)
+
+    def save_target_releases(self, releases: list[TargetRelease]) -> None:
+        if not releases:
+            return
+
+        self.db.execute(
+            """
+            insert into target_release (website, source_id, name, release_key, size)
+            select $1, t.source_id, t.name, t.release_key, t.size
+            from unnest($2::text[], $3::text[], $4::text[], $5::int8[])
+                as t(source_id, name, release_key, size)
+            on conflict (website, source_id) do update set
+                name = excluded.name,
+                release_key = excluded.release_key,
+                size = excluded.size
+            """,
+            [
+                self.config.target_website,
+                [r.source_id for r in releases],
+                [r.name for r in releases],
+                [r.release_key for r in releases],
+                [r.size for r in releases],
+            ],
+        )
+
+    def __skip_duplicated_releases(self) -> None:
+        """skip pending items of a release already downloading or done from another website or rss"""
+        # website, guid, title, skip_reason, item or release it duplicates
+        rows: list[tuple[str, str, str, str, str]] = self.db.fetch_all(
+            """
+            update rss_item set
+                status = $1,
+                skip_reason = $4,
+                updated_at = current_timestamp
+            from rss_item as other
+            where rss_item.status = $2
+                and rss_item.release_key != ''
+                and other.release_key = rss_item.release_key
+                and other.status = any($3)
+                and (
+                    rss_item.size = 0 or other.size = 0
+                    or abs(rss_item.size - other.size) <= greatest(rss_item.size, other.size) / 100
+                )
+            returning rss_item.website, rss_item.guid, rss_item.title, rss_item.skip_reason,
+                other.website || ' ' || other.guid
+            """,
+            [
+                RSS_ITEM_STATUS_SKIPPED,
+                RSS_ITEM_STATUS_PENDING,
+                [*RSS_ITEM_STATUS_PROCESSING, RSS_ITEM_STATUS_DONE],
+                SKIP_REASON_DUPLICATED_RELEASE,
+            ],
+        )
+
+        # already posted to target website, by us or others
+        rows += self.db.fetch_all(
+            """
+            update rss_item set
+                status = $1,
+                skip_reason = $4,
+                updated_at = current_timestamp
+            from target_release as t
+            where rss_item.status = $2
+                and rss_item.release_key != ''
+                and t.website = $3
+                and t.release_key = rss_item.release_key
+                and (
+                    rss_item.size = 0
+                    or abs(rss_item.size - t.size) <= greatest(rss_item.size, t.size) / 100
+                )
+            returning rss_item.website, rss_item.guid, rss_item.title, rss_item.skip_reason, t.name
+            """,
+            [
+                RSS_ITEM_STATUS_SKIPPED,
+                RSS_ITEM_STATUS_PENDING,
+                self.config.target_website,
+                SKIP_REASON_ON_TARGET,
+            ],
+        )
+
+        # same torrent from another website or rss, it would never be picked
+        rows += self.db.fetch_all(
+            """
+            update rss_item set
+                status = $1,
+                skip_reason = $3,
+                updated_at = current_timestamp
+            from rss_item as other
+            where rss_item.status = $2
+                and rss_item.rss_info_hash != ''
+                and other.info_hash = rss_item.rss_info_hash
+            returning rss_item.website, rss_item.guid, rss_item.title, rss_item.skip_reason,
+                other.website || ' ' || other.guid
+            """,
+            [RSS_ITEM_STATUS_SKIPPED, RSS_ITEM_STATUS_PENDING, SKIP_REASON_DUPLICATED_INFO_HASH],
+        )
+
+        for website, guid, title, reason, ref in rows:
+            logger.info("skip {} {} {!r}, {} {}", website, guid, title, reason, ref)
+
+    def __admission_budget(self) -> dict[str, int]:
+        """
+        budget of each disk, instances with same host and save path are counted once.
+
+        `free_space_on_disk` is free space of default save path of qBittorrent,
+        `save-path` of instance should be on same disk.
+        """
+        disks: dict[str, list[Qb]] = {}
+        for qb in self.qb_instances.values():
+            disks.setdefault(qb.disk, []).append(qb)
+
+        budgets: dict[str, int] = {}
+        for disk, instances in disks.items():
+            free_space: int = min(qb.state.server_state["free_space_on_disk"] for qb in instances)
+            dl_rate: int = sum(qb.state.server_state["dl_info_speed"] for qb in instances)
+
+            budget = admission_budget(
+                free_space=free_space,
+                min_free_space=self.config.min_free_space,
+                in_flight=[
+                    InFlight(amount_left=t.amount_left, eta=t.eta)
+                    for qb in instances
+                    for t in qb.state.torrents(category=QB_CATEGORY)
+                    if not t.state.is_complete
                 ],
+                dl_rate=dl_rate,
+                lookahead=self.config.admission_lookahead,
             )
 
-            for (
-                guid,
-                website,
-                link,
-                released_at,
-                size,
-                title,
-                imdb_id,
-                douban_id,
-            ) in rss_items:
-                if len(picked) + len(current_processing) >= self.config.max_processing_per_node:
-                    break
+            logger.info(
+                "admission budget of {} {}, free space {}, download speed {}/s",
+                disk,
+                human_readable_size(budget),
+                human_readable_size(free_space),
+                human_readable_size(dl_rate),
+            )
 
-                if rest - size <= 0:
-                    continue
+            budgets[disk] = budget
 
-                if size >= self.config.max_single_torrent_size:
-                    continue
+        return budgets
 
-                if self.config.excludes:
-                    if any(p.search(title) for p in self.config.excludes):
-                        continue
-
-                if self.config.includes:
-                    if all(p.search(title) for p in self.config.includes):
-                        continue
-
-                rest -= size
-                picked.append(
-                    Pick(
-                        guid=guid,
-                        website=website,
-                        link=link,
-                        released_at=released_at,
-                        size=size,
-                        title=title,
-                        imdb_id=imdb_id,
-                        douban_id=douban_id,
-                    )
+    def __pick_knapsack(
+        self,
+        conn: Connection,
+        capacity: Capacity,
+        limit: int,
+        released_after: datetime,
+        scoring: picker.Scoring | None,
+    ) -> list[Pick]:
+        # same as greedy strategy, a torrent must fit in room of the instance it's placed on
+        _, rest = capacity.best()
+        max_size = min(rest, self.config.max_single_torrent_size) - 1
+        if max_size <= 0:
+            return []
+
+        with conn.transaction():
+            if scoring is None:
+                candidates = picker.select_pending(
+                    conn,
+                    limit=PICK_KNAPSACK_CANDIDATES,
+                    max_size=max_size,
+                    released_after=released_after,
+                    min_seeders=self.config.min_seeders,
+                    after=None,
+                    lock=False,
                 )
-                conn.execute(
-                    """
-                        update rss_item
-                        set status = $1,
-                            picked_node = $2,
-                            updated_at = current_timestamp
-                        where guid = $3 and website = $4
-                        """,
-                    [RSS_ITEM_STATUS_DOWNLOADING, self.config.node_id, guid, website],
+            else:
+                candidates = picker.select_scored(
+                    conn,
+                    limit=PICK_KNAPSACK_CANDIDATES,
+                    max_size=max_size,
+                    released_after=released_after,
+                    min_seeders=self.config.min_seeders,
+                    scoring=scoring,
+                    lock=False,
                 )
 
-        return picked
+        title_filter = compile_filter(self.global_rules)
+        candidates = picker.dedupe_releases(
+            [p for p in candidates if picker.passes(p, title_filter)]
+        )
+
+        # maximize number of items, or total score.
+        # instances are filled one by one from the one with most room,
+        # `capacity` keeps budget of node and disks shared by them.
+        deadline = time.perf_counter() + self.config.pick_solver_timeout
+        selected: list[Pick] = []
+        while candidates and len(selected) < limit:
+            name, left = capacity.best()
+            chosen = set(
+                picker.knapsack(
+                    [c.size for c in candidates],
+                    [1.0 if scoring is None else c.score for c in candidates],
+                    capacity=left - 1,
+                    max_count=limit - len(selected),
+                    timeout=max(deadline - time.perf_counter(), 0),
+                )
+            )
+            if not chosen:
+                break
+
+            for i, c in enumerate(candidates):
+                if i in chosen:
+                    capacity.take(name, c.size)
+                    selected.append(c)
+            candidates = [c for i, c in enumerate(candidates) if i not in chosen]
+
+        return picker.claim_selected(conn, selected, self.config.node_id)
 
     def process_rss_run(
         self,
+        rss_id: int,
         url: str,
         exclude_url: str,
         website: str,
         includes: list[str | list[str]],
         excludes: list[str],
-    ) -> None:
+    ) -> tuple[str, int]:
+        """fetch and ingest rss, return fetch result of main rss url and number of new items"""
+        row = self.db.fetch_one(
+            """
+            select etag, last_modified, body_hash,
+                exclude_etag, exclude_last_modified, exclude_body_hash,
+                watermark_pub_date, watermark_guid
+            from rss where id = $1
+            """,
+            [rss_id],
+        )
+        assert row is not None, f"missing rss {rss_id}"
+        validators = FeedValidators(etag=row[0], last_modified=row[1], body_hash=row[2])
+        exclude_validators = FeedValidators(etag=row[3], last_modified=row[4], body_hash=row[5])
+        watermark = None
+        if row[6] is not None:
+            watermark = Watermark(pub_date=row[6], guid=row[7])
+
         if exclude_url:
-            self.__process_exclude_rss(
-                httpx.get(exclude_url, proxy=self.config.http_proxy, timeout=30).text,
-                website,
+            with open_feed(
+                exclude_url, exclude_validators, self.config.http_proxy or None, self.recorder
+            ) as feed:
+                exclude_items = []
+                if not feed.not_modified:
+                    exclude_items = list(iter_rss_items(feed.iter_bytes()))
+                exclude_result, exclude_validators = feed.finish()
+
+            if exclude_result == FETCH_RESULT_UPDATED:
+                self.__process_exclude_rss(exclude_items, website)
+
+            self.db.execute(
+                """
+                update rss set
+                    exclude_etag = $1,
+                    exclude_last_modified = $2,
+                    exclude_body_hash = $3
+                where id = $4
+                """,
+                [
+                    exclude_validators.etag,
+                    exclude_validators.last_modified,
+                    exclude_validators.body_hash,
+                    rss_id,
+                ],
             )
 
-        if self.config.debug:
-            debug_rss_url = self.config.data_dir.joinpath(xxhash.xxh3_64_hexdigest(url) + ".rss")
-            if debug_rss_url.exists():
-                rss_text = debug_rss_url.read_text(encoding="utf-8")
-            else:
-                res = httpx.get(url, proxy=self.config.http_proxy, timeout=30)
-                rss_text = res.text
-            if self.config.debug:
-                debug_rss_url.write_text(rss_text, encoding="utf-8")
-        else:
-            res = httpx.get(url, timeout=30, proxy=self.config.http_proxy or None)
-            rss_text = res.text
-
-        self.process_rss(
-            rss_text,
-            website,
-            includes=[self.compile_patterns(s) for s in includes],
-            excludes=[self._compile_pattern(s) for s in excludes],
-        )
+        # global rules are stored as verdict of each item, not applied here
+        title_filter = compile_filter(FilterRules.new(includes=includes, excludes=excludes))
+
+        received = 0
+        inserted = 0
+        newest: Watermark | None = None
+        with open_feed(url, validators, self.config.http_proxy or None, self.recorder) as feed:
+            if not feed.not_modified:
+                # items are ingested while feed is parsed, only one batch is kept in memory
+                for batch in batched(
+                    iter_rss_items(feed.iter_bytes(), watermark), RSS_INGEST_BATCH_SIZE
+                ):
+                    result = self.process_rss_items(batch, website, title_filter, rss_id=rss_id)
+                    inserted += result.inserted
+                    received += len(batch)
+                    mark = Watermark.of(batch)
+                    if mark is not None and (newest is None or mark.pub_date > newest.pub_date):
+                        newest = mark
+            fetch_result, validators = feed.finish()
 
-    @classmethod
-    def compile_patterns(cls, s: str | list[str]) -> re.Pattern[str] | list[re.Pattern[str]]:
-        if isinstance(s, list):
-            return [cls._compile_pattern(p) for p in s]
+        logger.info("rss {} {}, {} new items", rss_id, fetch_result, received)
 
-        return cls._compile_pattern(s)
+        # only save validators after items are stored, failed run will fetch full body again.
+        self.__save_fetch_state(rss_id, validators, newest)
 
-    @staticmethod
-    @functools.lru_cache(maxsize=1024)
-    def _compile_pattern(s: str) -> re.Pattern[str]:
-        return re.compile(s)
+        return fetch_result, inserted
 
-    def __process_exclude_rss(
+    def __save_fetch_state(
         self,
-        rss_text: str,
-        website: str,
+        rss_id: int,
+        validators: FeedValidators,
+        watermark: Watermark | None,
     ) -> None:
-        try:
-            et: ElementTree.Element = ElementTree.fromstring(rss_text)
-        except ElementTree.ParseError:
-            raise
-
-        for item_el in et.findall("channel/item"):
-            item = parse_rss_item(item_el)
-            self.db.execute(
-                """
-            insert into rss_item (guid, website, link, title, released_at, status, size, imdb_id, douban_id)
-             VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-             on conflict (guid, website) do update set status = excluded.status
+        self.db.execute(
+            """
+            update rss set
+                etag = $1,
+                last_modified = $2,
+                body_hash = $3,
+                watermark_pub_date = coalesce($4, watermark_pub_date),
+                watermark_guid = coalesce($5, watermark_guid)
+            where id = $6
             """,
-                [
-                    item.guid,  # 1
-                    website,  # 2
-                    item.link,  # 3
-                    item.title,  # 4
-                    item.pub_date or datetime.now().astimezone(),  # 5
-                    RSS_ITEM_STATUS_SKIPPED,  # 6
-                    item.size,  # 7
-                    item.imdb_id or "",  # 8
-                    item.douban_id or "",  # 9
-                ],
-            )
+            [
+                validators.etag,
+                validators.last_modified,
+                validators.body_hash,
+                watermark and watermark.pub_date,
+                watermark and watermark.guid,
+                rss_id,
+            ],
+        )
 
-    def __match_includes(
+    def backfill(
         self,
-        title: str,
-        patterns: list[re.Pattern[str] | list[re.Pattern[str]]],
-    ) -> bool:
-        if not patterns:
-            return True
+        url: str,
+        website: str,
+        title_filter: TitleFilter,
+        *,
+        page_size: int = 100,
+        max_pages: int = 100,
+        concurrency: int = 4,
+        restart: bool = False,
+    ) -> IngestResult:
+        """
+        page through a torznab search url with offset/limit and ingest all pages.
 
-        for pattern in patterns:
-            if isinstance(pattern, list):
-                if all(p.search(title) for p in pattern):
-                    return True
-            else:
-                if pattern.search(title):
-                    return True
+        pages are fetched concurrently in batches of `concurrency`,
+        offset of next batch is saved after each batch, so an interrupted backfill can be resumed.
+
+        indexers may cap `limit` below `page_size`, so pages are stepped by the size of
+        first page, and only an empty page or reported total is the end.
+        """
+        offset = 0
+        if not restart:
+            row = self.db.fetch_one("select next_offset, done from backfill where url = $1", [url])
+            if row is not None:
+                if row[1]:
+                    logger.info("backfill of {} is already done", url)
+                    return IngestResult()
+                offset = row[0]
+
+        total = IngestResult()
+        pages = 0
+        # effective page size, learned from the first page
+        step = 0
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="backfill"
+        ) as executor:
+            while pages < max_pages:
+                if step:
+                    offsets = [
+                        offset + i * step for i in range(min(concurrency, max_pages - pages))
+                    ]
+                else:
+                    offsets = [offset]
+                done = False
+
+                for page in executor.map(
+                    lambda o: fetch_torznab_page(
+                        url, o, page_size, proxy=self.config.http_proxy or None
+                    ),
+                    offsets,
+                ):
+                    result = self.process_rss_items(page.items, website, title_filter)
+                    total = IngestResult(
+                        inserted=total.inserted + result.inserted,
+                        db_seconds=total.db_seconds + result.db_seconds,
+                    )
+                    logger.info("backfill offset {}: {} items", page.offset, len(page.items))
+
+                    offset = page.offset + len(page.items)
+                    if page.last:
+                        done = True
+                        break
+                    step = step or len(page.items)
+
+                pages += len(offsets)
+
+                self.db.execute(
+                    """
+                    insert into backfill (url, website, next_offset, done) values ($1, $2, $3, $4)
+                    on conflict (url) do update set
+                        website = excluded.website,
+                        next_offset = excluded.next_offset,
+                        done = excluded.done,
+                        updated_at = current_timestamp
+                    """,
+                    [url, website, offset, done],
+                )
 
-        return False
+                if done:
+                    break
+
+        return total
+
+    def __process_exclude_rss(self, items: list[RssItem], website: str) -> None:
+        result = self.upsert_rss_items(
+            items, website, status=RSS_ITEM_STATUS_SKIPPED, skip_reason=SKIP_REASON_EXCLUDE_RSS
+        )
+        self.seen.add(website, (item.guid for item in items))
+
+        logger.info(
+            "exclude rss: {} items, {} inserted, {} updated",
+            len(items),
+            result.inserted,
+            result.updated,
+        )
 
     def process_rss(
         self,
-        rss_text: str,
+        rss_text: str | bytes,
         website: str,
-        includes: list[re.Pattern[str] | list[re.Pattern[str]]],
-        excludes: list[re.Pattern[str]],
-    ) -> None:
-        try:
-            et: ElementTree.Element = ElementTree.fromstring(rss_text)
-        except ElementTree.ParseError:
-            raise
-
-        items = []
+        title_filter: TitleFilter,
+    ) -> IngestResult:
+        if isinstance(rss_text, str):
+            rss_text = rss_text.encode()
 
-        for item_el in et.findall("channel/item"):
-            item = parse_rss_item(item_el)
+        return self.process_rss_items(list(iter_rss_items([rss_text])), website, title_filter)
 
-            if excludes:
-                if any(p.search(item.title) for p in excludes):
-                    continue
+    def process_rss_items(
+        self,
+        rss_items: list[RssItem],
+        website: str,
+        title_filter: TitleFilter,
+        rss_id: int | None = None,
+    ) -> IngestResult:
+        items = [item for item in rss_items if title_filter.match(item.title)]
+
+        unseen = self.seen.unseen(website, (item.guid for item in items))
+        new_items = [item for item in items if item.guid in unseen]
+
+        start = time.perf_counter()
+        result = self.insert_rss_items(new_items, website, rss_id)
+        self.refresh_torznab_stats([item for item in items if item.guid not in unseen], website)
+        result = dataclasses.replace(result, db_seconds=time.perf_counter() - start)
+
+        self.seen.add(website, unseen)
+        self.seen.record_known_misses(len(unseen) - result.inserted)
+
+        logger.info(
+            "{} items, {} not seen, {} inserted, {}",
+            len(items),
+            len(new_items),
+            result.inserted,
+            self.seen.stats(),
+        )
 
-            if not self.__match_includes(item.title, includes):
-                continue
+        return result
 
-            if self.config.excludes:
-                if any(p.search(item.title) for p in self.config.excludes):
-                    continue
+    def insert_rss_items(
+        self,
+        items: list[RssItem],
+        website: str,
+        rss_id: int | None = None,
+    ) -> IngestResult:
+        """insert new items as pending in one statement, existing items only get new seeders and grabs"""
+        if not items:
+            return IngestResult()
 
-            if self.config.includes:
-                if all(p.search(item.title) for p in self.config.includes):
-                    continue
+        rows = self.db.fetch_all(
+            """
+            insert into rss_item (
+                guid, website, link, title, released_at, status, size, imdb_id, douban_id,
+                rss_info_hash, files, seeders, grabs, filter_passed, release_key, filter_version, rss_id
+            )
+            select t.guid, $1, t.link, t.title, t.released_at, $2, t.size, t.imdb_id, t.douban_id,
+                t.rss_info_hash, t.files, t.seeders, t.grabs, t.filter_passed, t.release_key, $3, $17
+            from unnest(
+                $4::text[], $5::text[], $6::text[], $7::timestamptz[], $8::int8[], $9::text[], $10::text[],
+                $11::text[], $12::int4[], $13::int4[], $14::int4[], $15::bool[], $16::text[]
+            ) as t(
+                guid, link, title, released_at, size, imdb_id, douban_id,
+                rss_info_hash, files, seeders, grabs, filter_passed, release_key
+            )
+            on conflict (guid, website) do update set
+                seeders = coalesce(excluded.seeders, rss_item.seeders),
+                grabs = coalesce(excluded.grabs, rss_item.grabs)
+            where (rss_item.seeders, rss_item.grabs)
+                is distinct from (excluded.seeders, excluded.grabs)
+            returning (xmax = 0)
+            """,
+            [
+                website,
+                RSS_ITEM_STATUS_PENDING,
+                self.global_rules.version,
+                *rss_item_columns(items, compile_filter(self.global_rules)),
+                rss_id,
+            ],
+        )
 
-            items.append(item)
+        return IngestResult(inserted=sum(1 for (is_insert,) in rows if is_insert))
 
-        logger.info("{} items", len(items))
+    def refresh_torznab_stats(self, items: list[RssItem], website: str) -> None:
+        """update seeders and grabs of pending items already seen, `min-seeders` is checked with them"""
+        items = [item for item in items if item.seeders is not None or item.grabs is not None]
+        if not items:
+            return
 
-        for item in items:
-            self.db.execute(
-                """
-            insert into rss_item (guid, website, link, title, released_at, status, size, imdb_id, douban_id)
-             VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-             on conflict (guid, website) do nothing
+        self.db.execute(
+            """
+            update rss_item set
+                seeders = coalesce(t.seeders, rss_item.seeders),
+                grabs = coalesce(t.grabs, rss_item.grabs)
+            from unnest($1::text[], $2::int4[], $3::int4[]) as t(guid, seeders, grabs)
+            where rss_item.guid = t.guid and rss_item.website = $4 and rss_item.status = $5
+                and (rss_item.seeders, rss_item.grabs) is distinct from (t.seeders, t.grabs)
             """,
-                [
-                    item.guid,  # 1
-                    website,  # 2
-                    item.link,  # 3
-                    item.title,  # 4
-                    item.pub_date or datetime.now().astimezone(),  # 5
-                    RSS_ITEM_STATUS_PENDING,  # 6
-                    item.size,  # 7
-                    item.imdb_id or "",  # 8
-                    item.douban_id or "",  # 9
-                ],
+            [
+                [item.guid for item in items],
+                [item.seeders for item in items],
+                [item.grabs for item in items],
+                website,
+                RSS_ITEM_STATUS_PENDING,
+            ],
+        )
+
+    def upsert_rss_items(
+        self,
+        items: list[RssItem],
+        website: str,
+        status: str,
+        skip_reason: str = "",
+    ) -> IngestResult:
+        """insert items with status in one statement, or overwrite status of existing items"""
+        if not items:
+            return IngestResult()
+
+        rows: list[tuple[bool]] = self.db.fetch_all(
+            """
+            insert into rss_item (
+                guid, website, link, title, released_at, status, size, imdb_id, douban_id,
+                rss_info_hash, files, seeders, grabs, filter_passed, release_key, filter_version,
+                skip_reason
+            )
+            select t.guid, $1, t.link, t.title, t.released_at, $2, t.size, t.imdb_id, t.douban_id,
+                t.rss_info_hash, t.files, t.seeders, t.grabs, t.filter_passed, t.release_key, $3, $17
+            from unnest(
+                $4::text[], $5::text[], $6::text[], $7::timestamptz[], $8::int8[], $9::text[], $10::text[],
+                $11::text[], $12::int4[], $13::int4[], $14::int4[], $15::bool[], $16::text[]
+            ) as t(
+                guid, link, title, released_at, size, imdb_id, douban_id,
+                rss_info_hash, files, seeders, grabs, filter_passed, release_key
             )
+            on conflict (guid, website) do update set
+                status = excluded.status,
+                skip_reason = excluded.skip_reason
+            returning (xmax = 0)
+            """,
+            [
+                website,
+                status,
+                self.global_rules.version,
+                *rss_item_columns(items, compile_filter(self.global_rules)),
+                skip_reason,
+            ],
+        )
+
+        inserted = sum(1 for (is_insert,) in rows if is_insert)
+
+        return IngestResult(inserted=inserted, updated=len(rows) - inserted)
 
 
 pattern_episodes = re.compile(r"\bS\d+E(?P<episode>\d+)\b", re.IGNORECASE)
@@ -1275,13 +2261,11 @@ def fix_title(title: str, torrent: bytes, meta_info: FullSubjectInfo) -> str:
     if not meta_info.episode_count:
         return title
 
-    torrent_info: dict[str, Any] = _transform_info(bencode2.bdecode(torrent)[b"info"])
-    if not torrent_info.get("files"):
+    torrent_info = parse_torrent_info(torrent)
+    if not torrent_info.files:
         return title
 
-    torrent_files = parse_obj_as(list[File], torrent_info["files"])
-
-    torrent_files = [f for f in torrent_files if f.path[-1].endswith(video_ext)]
+    torrent_files = [f for f in torrent_info.files if f.name.endswith(video_ext)]
 
     if len(torrent_files) >= meta_info.episode_count:
         return title
@@ -1308,128 +2292,12 @@ def fix_title(title: str, torrent: bytes, meta_info: FullSubjectInfo) -> str:
     return pattern_season_only.sub(r"\1\2" + e + r"\3", title)
 
 
-def _transform_info(obj: dict[bytes, Any]) -> dict[str, Any]:
-    d = {}
-    for key, value in obj.items():
-        if key == b"pieces":
-            d[key.decode()] = value
-        else:
-            d[key.decode()] = _transform_value(value)
-    return d
-
-
-def _transform_dict(obj: dict[bytes, Any]) -> dict[str, Any]:
-    return {key.decode(): _transform_value(value) for key, value in obj.items()}
-
-
-def _transform_value(v: Any) -> Any:
-    if isinstance(v, bytes):
-        try:
-            return v.decode()
-        except UnicodeDecodeError:
-            return v
-    if isinstance(v, dict):
-        return _transform_dict(v)
-    if isinstance(v, list):
-        return [_transform_value(o) for o in v]
-    return v
-
-
-@dataclasses.dataclass(kw_only=True, slots=True)
-class File:
-    length: int
-    path: Annotated[tuple[str, ...], annotated_types.MinLen(1)]
-
-    @property
-    def name(self) -> str:
-        return self.path[-1]
-
-
-@dataclasses.dataclass(kw_only=True, slots=False, frozen=True)
-class TorrentInfo:
-    name: Annotated[str, annotated_types.MinLen(1)]
-    pieces: bytes
-    length: int | None = None
-    private: bool = False
-    files: Annotated[tuple[File, ...], Field(default_factory=tuple)]
-    piece_length: Annotated[int, Field(alias="piece length")]
-    # common used field for private tracker
-    source: str | None = None
-
-
-@dataclasses.dataclass(kw_only=True, slots=True)
-class Pick:
-    title: str
-    guid: str
-    website: str
-    link: str
-    released_at: datetime
-    size: int
-    imdb_id: str = ""
-    douban_id: str = ""
-
-
 @dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
-class RssItem:
-    title: str
-    guid: str
-    link: str
-    size: int
-    description: str = ""
-    pub_date: datetime | None = None
-
-    imdb_id: str | None = None
-    douban_id: str | None = None
-
-
-def parsedate_to_datetime(s: str | None) -> datetime:
-    assert s, "empty pubDate"
-    dt: datetime | None = _parsedate_to_datetime(s)
-    if dt is None:
-        raise ValueError(f"failed to parse pubDate as datetime {s}")
-    return dt
-
-
-pattern_douban_url = re.compile(r"https://movie\.douban\.com/subject/(\d+)/?")
-
-
-def parse_rss_item(item: ElementTree.Element) -> RssItem:
-    title = item.findtext("./title")
-    assert title
-
-    enclosure = item.find("./enclosure")
-    assert enclosure is not None, "missing enclosure item"
-    url = enclosure.attrib["url"]
-    assert url
-
-    guid = item.findtext("./guid")
-    assert guid
-
-    imdb_id = None
-    imdb_el = item.find('./{http://torznab.com/schemas/2015/feed}attr[@name="imdb"]')
-    if imdb_el:
-        imdb_id = imdb_el.attrib["value"]
-
-    description = item.findtext("./description") or ""
-
-    douban_id = None
-    if description:
-        m = pattern_douban_url.search(description)
-        if m:
-            douban_id = m.group(1)
-
-    pub_date = parsedate_to_datetime(item.findtext("pubDate"))
-
-    return RssItem(
-        title=title.strip(),
-        guid=guid,
-        link=url,
-        pub_date=pub_date,
-        description=description,
-        size=int(enclosure.attrib.get("length", 0)),
-        douban_id=douban_id,
-        imdb_id=imdb_id,
-    )
+class IngestResult:
+    inserted: int = 0
+    updated: int = 0
+    # time spent in database
+    db_seconds: float = 0
 
 
 T = TypeVar("T")
@@ -1444,44 +2312,3 @@ def first(s: list[T], default: T) -> T:
 
 class FailedToUploadImage(Exception):
     pass
-
-
-def main() -> None:
-    r = httpx.get(
-        "https://prowlarr.omv.trim21.me/1/api?apikey=d56943ccd47344129f117f16e34c21b5&extended=1&t=search&q=mweb",
-        timeout=40,
-    )
-    et = ElementTree.fromstring(r.content)
-    for item_el in et.findall("channel/item"):
-        item = parse_rss_item(item_el)
-        print(item)
-
-    #
-    # cfg = load_config(pathlib.Path(__file__, "../../config.toml").resolve())
-    #
-    # app = Application.new(cfg)
-    #
-    # guid, website, title, link, released_at, size, douban_id, imdb_id = app.db.fetch_one(
-    #     "select guid, website, title, link, released_at, size, douban_id, imdb_id from rss_item where title = $1",
-    #     ["The Fiery Priest 2 S02E11 2024 1080p DSNP WEB-DL H264 AAC-ADWeb"],
-    # )
-    #
-    # r = app.get_meta_info(
-    #     Pick(
-    #         guid=guid,
-    #         website=website,
-    #         title=title,
-    #         link=link,
-    #         released_at=released_at,
-    #         size=size,
-    #         douban_id=douban_id,
-    #         imdb_id=imdb_id,
-    #     )
-    # )
-    #
-    # print(r)
-    #
-
-
-if __name__ == "__main__":
-    main()
@@ -0,0 +1,247 @@
+"""
+benchmarks, run with `python -m pt_repost.bench --help`
+"""
+
+import concurrent.futures
+import itertools
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from psycopg import RawCursor
+
+from pt_repost import picker
+from pt_repost.application import Application
+from pt_repost.config import load_config, parse_go_duration_str
+from pt_repost.const import (
+    PICK_BATCH_SIZE,
+    PICK_ORDER_NEWEST,
+    PICK_ORDER_SCORE,
+    RSS_ITEM_STATUS_PENDING,
+)
+from pt_repost.db import Connection
+from pt_repost.filters import FilterRules, compile_filter
+from pt_repost.picker import Scoring
+from pt_repost.rss import RssItem
+from pt_repost.simulate import SimItem, simulate
+
+
+@click.group()
+def cli() -> None: ...
+
+
+def _random_titles(count: int) -> list[str]:
+    rng = random.Random(0)
+    names = ["The.Show", "Some Movie", "Dragon Ball DAIMA", "Another.Show", "电影"]
+    resolutions = ["720p", "1080p", "2160p"]
+    sources = ["NF", "AMZN", "DSNP", "iQIYI", "TX", "ATVP", ""]
+    video = ["H264", "H.265", "x265", "HEVC", "DV HDR H.265", "DoVi HEVC"]
+    groups = ["MWeb", "HHWEB", "CMCT", "CMCTV", "ADWeb", "FLUX", "NTb"]
+
+    return [
+        " ".join(
+            [
+                rng.choice(names),
+                f"S{rng.randint(1, 5):02d}E{rng.randint(1, 24):02d}",
+                rng.choice(resolutions),
+                rng.choice(sources),
+                "WEB-DL",
+                rng.choice(video) + "-" + rng.choice(groups),
+            ]
+        )
+        for _ in range(count)
+    ]
+
+
+@cli.command()
+@click.option("--titles", "count", default=20000, help="number of generated titles")
+@click.option("--patterns", default=30, help="number of exclude patterns")
+def filters(count: int, patterns: int) -> None:
+    """titles per second of per-pattern search and compiled filter"""
+    titles = _random_titles(count)
+
+    excludes = [
+        r"(?i)\b(dovi|DV|Dolby Vision)\b",
+        r"(?i)\b720p\b",
+        r"(?i)\bDragon Ball DAIMA\b",
+        r"(?i)\b(TX|iQIYI|KKTV|YOUKU|HAMi)\b",
+        r"(?i)\b1080p\b.*\b(x|h)265\b",
+        r"(?i)-cmct$",
+        r"(?i)-cmctv$",
+    ]
+    excludes.extend(
+        rf"(?i)\bkeyword{i}\b"
+        for i in itertools.islice(itertools.count(), patterns - len(excludes))
+    )
+
+    rules = FilterRules.new(
+        includes=[
+            [r"(?i)\bWEB-DL\b", r"(?i)\b(nf|netflix|amzn|ATVP|DSNP)\b", r"(?i)-(mweb|hhweb)$"],
+            [r"(?i)-(cmct|flux)$"],
+        ],
+        excludes=excludes[: len(excludes) // 2],
+        global_excludes=excludes[len(excludes) // 2 :],
+    )
+
+    # filter before compiled filter, one `search` for each pre-compiled pattern
+    feed_excludes = [re.compile(p) for p in rules.excludes]
+    feed_includes = [[re.compile(p) for p in g] for g in rules.includes]
+    global_excludes = [re.compile(p) for p in rules.global_excludes]
+
+    def match_separately(title: str) -> bool:
+        if any(p.search(title) for p in feed_excludes):
+            return False
+        if not any(all(p.search(title) for p in g) for g in feed_includes):
+            return False
+        return not any(p.search(title) for p in global_excludes)
+
+    start = time.perf_counter()
+    expected = [match_separately(title) for title in titles]
+    separately = time.perf_counter() - start
+
+    f = compile_filter(rules)
+    start = time.perf_counter()
+    actual = [f.match(title) for title in titles]
+    compiled = time.perf_counter() - start
+
+    assert expected == actual
+
+    click.echo(f"{count} titles, {patterns} patterns, {sum(actual)} matched")
+    click.echo(f"per-pattern search: {count / separately:>12,.0f} titles/s")
+    click.echo(f"compiled filter:    {count / compiled:>12,.0f} titles/s")
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option("--items", "count", default=5000, help="number of pending rss items")
+@click.option("--nodes", default="1,2,4,8", help="number of concurrent nodes to test")
+@click.option("--batch-size", default=PICK_BATCH_SIZE)
+def pick(config_file: str, count: int, nodes: str, batch_size: int) -> None:
+    """
+    claims per second of concurrent nodes, run against a test database.
+
+    each node keeps claiming `batch-size` items until all pending items are claimed.
+    """
+    cfg = load_config(config_file)
+    app = Application.new(cfg)
+
+    website = "bench-pick"
+    now = datetime.now(tz=timezone.utc)
+
+    app.db.execute("delete from rss_item where website = $1", [website])
+    app.insert_rss_items(
+        [
+            RssItem(
+                title=title,
+                guid=f"bench-{i}",
+                link="",
+                size=1,
+                pub_date=now - timedelta(seconds=i),
+            )
+            for i, title in enumerate(_random_titles(count))
+        ],
+        website,
+    )
+
+    def run_node(node_id: str) -> int:
+        with Connection.connect(cfg.pg_dsn(), cursor_factory=RawCursor) as conn:
+            claimed = 0
+            while True:
+                picked = picker.claim(
+                    conn,
+                    node_id=node_id,
+                    accept=lambda p: p.website == website,
+                    limit=batch_size,
+                    batch_size=batch_size,
+                    max_size=1,
+                    released_after=now - timedelta(days=1),
+                    title_filter=compile_filter(app.global_rules),
+                )
+                if not picked:
+                    return claimed
+                claimed += len(picked)
+
+    try:
+        for n in [int(x) for x in nodes.split(",")]:
+            app.db.execute(
+                "update rss_item set status = $1, picked_node = '' where website = $2",
+                [RSS_ITEM_STATUS_PENDING, website],
+            )
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=n) as executor:
+                start = time.perf_counter()
+                claimed = list(executor.map(run_node, [f"bench-node-{i}" for i in range(n)]))
+                elapsed = time.perf_counter() - start
+
+            # every item should be claimed by exactly one node
+            assert sum(claimed) == count, (sum(claimed), count)
+
+            click.echo(
+                f"{n:>3} nodes: {count / elapsed:>10,.0f} claims/s, claimed per node {claimed}"
+            )
+    finally:
+        app.db.execute("delete from rss_item where website = $1", [website])
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option("--days", default=30, help="replay rss_item released in last days")
+@click.option("--slots", default=4, help="number of items a node processes at same time")
+@click.option("--processing", default="1h", help="time to process an item")
+def schedule(config_file: str, days: int, slots: int, processing: str) -> None:
+    """replay historical rss_item, compare expired items of newest first and score order"""
+    cfg = load_config(config_file)
+    app = Application.new(cfg)
+
+    window = cfg.recent_release_seconds or 60 * 60 * 24
+    rows: list[tuple[str, datetime, float]] = app.db.fetch_all(
+        """
+        select i.website, i.released_at, coalesce(rss.priority, 0) from rss_item as i
+        left join rss on rss.id = i.rss_id
+        where i.released_at >= current_timestamp - make_interval(days => $1)
+        """,
+        [days],
+    )
+    items = [
+        SimItem(website=website, released_at=released_at, priority=priority)
+        for website, released_at, priority in rows
+    ]
+
+    for name, scoring in [
+        (PICK_ORDER_NEWEST, None),
+        (
+            PICK_ORDER_SCORE,
+            Scoring(
+                website_weights=cfg.website_weights,
+                window=window,
+                deadline_weight=cfg.deadline_weight,
+            ),
+        ),
+    ]:
+        result = simulate(
+            items,
+            scoring=scoring,
+            slots=slots,
+            processing=timedelta(seconds=parse_go_duration_str(processing)),
+            window=timedelta(seconds=window),
+        )
+        click.echo(
+            f"{name:<8} expired {result.expired.total():>6} of {len(items)}, "
+            f"processed by website {dict(result.processed.most_common())}"
+        )
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,73 @@
+"""
+catalog of releases already on target website.
+
+items in catalog are skipped by picker, before downloading torrent.
+catalog is fed by periodic sync from a `CatalogSource`, and by our own posts.
+"""
+
+from __future__ import annotations
+
+import abc
+import dataclasses
+import time
+
+import httpx
+
+from pt_repost.release import release_key
+from pt_repost.rss import iter_rss_items
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class TargetRelease:
+    # unique id of release on target website, like guid in rss or info hash
+    source_id: str
+    name: str
+    size: int
+
+    @property
+    def release_key(self) -> str:
+        return release_key(self.name)
+
+
+class CatalogSource(abc.ABC):
+    @abc.abstractmethod
+    def fetch(self) -> list[TargetRelease]:
+        """latest releases of target website"""
+
+
+class RssCatalogSource(CatalogSource):
+    """rss of target website, like `torrentrss.php` of NexusPHP"""
+
+    def __init__(self, url: str, proxy: str | None = None):
+        self.url = url
+        self.proxy = proxy
+
+    def fetch(self) -> list[TargetRelease]:
+        res = httpx.get(self.url, proxy=self.proxy, timeout=30, follow_redirects=True)
+        res.raise_for_status()
+        return [
+            TargetRelease(source_id=item.guid, name=item.title, size=item.size)
+            for item in iter_rss_items([res.content])
+        ]
+
+
+class StaticCatalogSource(CatalogSource):
+    def __init__(self, releases: list[TargetRelease] | None = None):
+        self.releases: list[TargetRelease] = releases or []
+
+    def fetch(self) -> list[TargetRelease]:
+        return list(self.releases)
+
+
+class TargetCatalog:
+    def __init__(self, source: CatalogSource, interval: int):
+        self.source = source
+        self.interval = interval
+        self.__synced_at: float | None = None
+
+    def due(self) -> bool:
+        return self.__synced_at is None or time.monotonic() - self.__synced_at >= self.interval
+
+    def pull(self) -> list[TargetRelease]:
+        self.__synced_at = time.monotonic()
+        return self.source.fetch()
@@ -0,0 +1,14 @@
+from pt_repost.catalog import StaticCatalogSource, TargetCatalog, TargetRelease
+from pt_repost.release import release_key
+
+
+def test_target_catalog() -> None:
+    source = StaticCatalogSource(
+        [TargetRelease(source_id="1", name="Movie.2024.1080p.WEB-DL.H.264-Group", size=100)]
+    )
+    catalog = TargetCatalog(source, interval=3600)
+
+    assert catalog.due()
+    (release,) = catalog.pull()
+    assert release.release_key == release_key("Movie 2024 1080p WEB-DL H.264-Group")
+    assert not catalog.due()
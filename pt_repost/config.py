@@ -5,7 +5,7 @@ import re
 import sys
 import uuid
 from pathlib import Path
-from typing import Annotated, Any
+from typing import Annotated, Any, Literal
 
 import durationpy
 import orjson
@@ -53,6 +53,30 @@ def parse_go_duration_str(s: Any) -> Any:
     return s
 
 
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class QbInstance:
+    url: HttpUrl
+    # saved in rss_item.qb_instance, default to host:port of url
+    name: str = ""
+    # save path of new torrents, empty for default save path of qBittorrent
+    save_path: Annotated[str, Field("", alias="save-path")]
+    # total size of processing torrents on this instance, 0 for free disk space of qBittorrent
+    max_processing_size: Annotated[ByteSize, Field(0, alias="max-processing-size")]
+
+    @property
+    def key(self) -> str:
+        return self.name or f"{self.url.host}:{self.url.port}"
+
+
+def parse_qb_instances(v: Any) -> Any:
+    """`qb-url` may be a url, or a list of urls or instance tables"""
+    if isinstance(v, str):
+        v = [v]
+    if isinstance(v, list):
+        return [{"url": x} if isinstance(x, str) else x for x in v]
+    return v
+
+
 @dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
 class Rss:
     url: str
@@ -61,6 +85,12 @@ class Rss:
     includes: Annotated[list[str | list[str]], Field(default_factory=list)]
     excludes: Annotated[list[str | list[str]], Field(default_factory=list)]
     interval: Annotated[int, Field(60 * 30), BeforeValidator(parse_go_duration_str)]
+    # adjust interval by rate of new items, limited in [min_interval, max_interval]
+    adaptive: bool = False
+    min_interval: Annotated[int, Field(60 * 5), BeforeValidator(parse_go_duration_str)]
+    max_interval: Annotated[int, Field(60 * 60 * 2), BeforeValidator(parse_go_duration_str)]
+    # rss_item from rss with higher priority are picked first when pick order is "score"
+    priority: float = 0
 
 
 @dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
@@ -76,6 +106,17 @@ class Config:
     ) or hex(uuid.getnode())
 
     target_website: Annotated[str, Field(alias="target-website")]
+    # rss of target website, releases in it are skipped before downloading
+    target_catalog_url: Annotated[str, Field("", alias="target-catalog-url")]
+    target_catalog_interval: Annotated[
+        int, Field(60 * 60, alias="target-catalog-interval"), BeforeValidator(parse_go_duration_str)
+    ]
+    # prioritize main video file, and generate mediainfo and screenshots before torrent finished
+    early_processing: Annotated[bool, Field(False, alias="early-processing")]
+    # trackers of uploading torrent are checked again after this time, or tracker changed
+    tracker_check_interval: Annotated[
+        int, Field(60 * 10, alias="tracker-check-interval"), BeforeValidator(parse_go_duration_str)
+    ]
 
     images: Image
     website: Website
@@ -89,6 +130,30 @@ class Config:
     max_processing_size: Annotated[ByteSize, Field("100GiB", alias="max-processing-size")]
     max_single_torrent_size: Annotated[ByteSize, Field("100GiB", alias="max-single-torrent-size")]
     max_processing_per_node: Annotated[int, Field(100000, alias="max-processing-per-node")]
+    # skip rss item with less seeders, only for indexers providing torznab `seeders`
+    min_seeders: Annotated[int, Field(0, alias="min-seeders", ge=0)]
+    # limit new torrents by free disk space and download speed of qBittorrent
+    adaptive_admission: Annotated[bool, Field(False, alias="adaptive-admission")]
+    min_free_space: Annotated[ByteSize, Field("10GiB", alias="min-free-space")]
+    # with adaptive admission, only add new torrents if downloading ones will finish in this time
+    admission_lookahead: Annotated[
+        int, Field(60 * 60, alias="admission-lookahead"), BeforeValidator(parse_go_duration_str)
+    ]
+    # "greedy" or "knapsack"
+    pick_strategy: Annotated[Literal["greedy", "knapsack"], Field("greedy", alias="pick-strategy")]
+    # time budget of knapsack solver in seconds, best solution found so far is used after timeout
+    pick_solver_timeout: Annotated[float, Field(1, alias="pick-solver-timeout", gt=0)]
+    # "newest" or "score"
+    pick_order: Annotated[Literal["newest", "score"], Field("newest", alias="pick-order")]
+    # weight of source website when pick order is "score", default to 1
+    website_weights: Annotated[
+        dict[str, float], Field(default_factory=dict, alias="website-weights")
+    ]
+    # weight of deadline `released_at + recent-release` when pick order is "score"
+    deadline_weight: Annotated[float, Field(1, alias="deadline-weight", ge=0)]
+    rss_fetch_concurrency: Annotated[int, Field(4, alias="rss-fetch-concurrency", ge=1)]
+    # number of (guid, website) kept in memory to skip known rss items, 0 to disable
+    seen_cache_size: Annotated[int, Field(100000, alias="seen-cache-size", ge=0)]
     recent_release_seconds: Annotated[
         int, Field(0, alias="recent-release"), BeforeValidator(parse_go_duration_str)
     ]
@@ -106,9 +171,17 @@ class Config:
     pg_password: str | None = None
 
     data_dir: Annotated[pathlib.Path, Field("", alias="data-dir")]
+    # save every fetched rss body to `{data-dir}/feeds`, for `replay` command
+    record_feeds: Annotated[bool, Field(False, alias="record-feeds")]
+    # bearer token of `/api/torrent-finished` of ui, endpoint is disabled if empty
+    notify_token: Annotated[str, Field("", alias="notify-token")]
     tmdb_api_token: Annotated[str, Field(alias="tmdb-api-token")]
     db_path: Path = Path(os.getcwd(), "data.db")
-    qb_url: Annotated[HttpUrl, Field(alias="qb-url")]
+    qb_instances: Annotated[
+        list[QbInstance],
+        Field(alias="qb-url", min_length=1),
+        BeforeValidator(parse_qb_instances),
+    ]
     qb_backup_dir: Annotated[str, Field("", alias="qb-backup-dir")]
 
     includes: Annotated[list[re.Pattern[str]], Field(default_factory=list)]
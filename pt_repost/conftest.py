@@ -0,0 +1,33 @@
+import os
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from psycopg import RawCursor, sql
+
+from pt_repost.db import Connection
+
+# tests using database are skipped without it, tables are created in a temporary schema
+PG_DSN = os.environ.get("PT_REPOST_TEST_PG_DSN", "")
+
+
+@pytest.fixture
+def pg_dsn() -> str:
+    if not PG_DSN:
+        pytest.skip("PT_REPOST_TEST_PG_DSN is not set")
+    return PG_DSN
+
+
+@pytest.fixture
+def conn(pg_dsn: str) -> Iterator[Connection]:
+    schema = "pt_repost_test_" + uuid.uuid4().hex
+    with Connection.connect(pg_dsn, autocommit=True, cursor_factory=RawCursor) as c:
+        c.execute(sql.SQL("create schema {}").format(sql.Identifier(schema)))
+        try:
+            c.execute(sql.SQL("set search_path to {}").format(sql.Identifier(schema)))
+            for sql_file in sorted(Path(__file__, "../sql/").resolve().iterdir()):
+                c.execute(sql_file.read_text(encoding="utf-8"))
+            yield c
+        finally:
+            c.execute(sql.SQL("drop schema {} cascade").format(sql.Identifier(schema)))
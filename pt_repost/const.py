@@ -9,6 +9,11 @@ TASK_STATUS_RUNNING: Final = "running"
 TASK_STATUS_SUCCESS: Final = "success"
 TASK_STATUS_FAILED: Final = "failed"
 
+# fetch_result of rss_run
+FETCH_RESULT_UPDATED: Final = "updated"
+FETCH_RESULT_NOT_MODIFIED: Final = "not-modified"  # http 304
+FETCH_RESULT_UNCHANGED: Final = "unchanged"  # same body hash as last fetch
+
 # status of rss_item
 RSS_ITEM_STATUS_PENDING: Final = "pending"
 RSS_ITEM_STATUS_SKIPPED: Final = "skipped"
@@ -19,13 +24,45 @@ RSS_ITEM_STATUS_REMOVED_FROM_SITE: Final = "removed-by-site"  # 被站点删除
 RSS_ITEM_STATUS_REMOVED_FROM_DOWNLOAD_CLIENT: Final = "removed-by-client"  # 被从客户端删除
 RSS_ITEM_STATUS_FAILED: Final = "failed"
 
+# rss_item.skip_reason, fixed values so `skipped` command can sum size by reason,
+# detail of each item is logged.
+SKIP_REASON_TOO_LARGE: Final = "too-large"
+SKIP_REASON_PREFLIGHT: Final = "preflight"  # `preflight:{check}`
+SKIP_REASON_EXCLUDE_RSS: Final = "exclude-rss"
+SKIP_REASON_DUPLICATED_RELEASE: Final = "duplicated-release"
+SKIP_REASON_ON_TARGET: Final = "exists-on-target"
+SKIP_REASON_DUPLICATED_INFO_HASH: Final = "duplicated-info-hash"
+
 RSS_ITEM_STATUS_PROCESSING: Final = (
     RSS_ITEM_STATUS_DOWNLOADING,
     RSS_ITEM_STATUS_UPLOADING,
 )
 
+# rss_item locked and claimed in one transaction by picker
+PICK_BATCH_SIZE: Final = 20
+
+# rss items are ingested in batches while feed is parsed
+RSS_INGEST_BATCH_SIZE: Final = 500
+
+# pick strategy
+PICK_STRATEGY_GREEDY: Final = "greedy"  # newest first
+PICK_STRATEGY_KNAPSACK: Final = "knapsack"  # max number of items fit in max-processing-size
+# newest pending items considered by knapsack strategy
+PICK_KNAPSACK_CANDIDATES: Final = 200
+
+# pick order
+PICK_ORDER_NEWEST: Final = "newest"
+PICK_ORDER_SCORE: Final = "score"  # see `pt_repost.picker.Scoring`
+
 SSD_REMOVED_MESSAGE: Final = "Torrent not registered with this tracker"
 
+# tracker message of torrent removed by target website, key is lowercase `target-website`
+REMOVED_MESSAGES: Final[dict[str, frozenset[str]]] = {
+    "ssd": frozenset({SSD_REMOVED_MESSAGE}),
+}
+# used for target website without entry in `REMOVED_MESSAGES`
+DEFAULT_REMOVED_MESSAGES: Final = frozenset({SSD_REMOVED_MESSAGE})
+
 DEFAULT_HEADERS: Final = {
     "user-agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
@@ -35,3 +72,13 @@ DEFAULT_HEADERS: Final = {
 
 
 QB_CATEGORY: Final = "pt-repost"
+
+# screenshots of each post
+SCREENSHOT_COUNT: Final = 4
+# recorded snapshots kept for each feed, oldest ones are removed
+FEED_SNAPSHOTS_PER_FEED: Final = 100
+# with early processing, mediainfo is generated when this size at start and end of video file exist
+EARLY_MEDIAINFO_SIZE: Final = 32 * 1024 * 1024
+
+# payload is info hash of finished torrent, sent by `notify` command or server
+NOTIFY_CHANNEL_TORRENT_FINISHED: Final = "pt_repost_torrent_finished"
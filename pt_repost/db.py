@@ -3,7 +3,7 @@ from collections.abc import Sequence
 from typing import Any
 
 import psycopg.connection
-from psycopg import RawCursor
+from psycopg import RawCursor, sql
 from psycopg_pool import ConnectionPool
 from typing_extensions import LiteralString
 
@@ -24,6 +24,41 @@ class Connection(psycopg.connection.Connection):
         return self.execute(sql, args).fetchall()
 
 
+class Listener:
+    """dedicated connection receiving `pg_notify` of a channel, reconnect after connection lost"""
+
+    def __init__(self, conn_info: str, channel: str):
+        self.__conn_info = conn_info
+        self.__channel = channel
+        self.__conn: psycopg.Connection[Any] | None = None
+
+    def wait(self, timeout: float) -> list[str]:
+        """
+        payloads of notifications, returns after first notification or timeout.
+        """
+        if self.__conn is None:
+            conn = psycopg.connect(self.__conn_info, autocommit=True)
+            conn.execute(sql.SQL("listen {}").format(sql.Identifier(self.__channel)))
+            self.__conn = conn
+
+        try:
+            payloads = [n.payload for n in self.__conn.notifies(timeout=timeout, stop_after=1)]
+            # notifications sent at same time
+            payloads.extend(n.payload for n in self.__conn.notifies(timeout=0))
+        except psycopg.OperationalError:
+            self.__conn.close()
+            self.__conn = None
+            raise
+
+        return payloads
+
+
+def notify(conn_info: str, channel: str, payload: str) -> None:
+    """`pg_notify` with a single connection, for short-lived process like `notify` command"""
+    with Connection.connect(conn_info, autocommit=True, cursor_factory=RawCursor) as conn:
+        conn.execute("select pg_notify($1, $2)", [channel, payload])
+
+
 class Database:
     def __init__(self, config: Config):
         self.__conn_info = config.pg_dsn()
@@ -31,7 +66,8 @@ class Database:
         self.db = ConnectionPool(
             self.__conn_info,
             kwargs={"cursor_factory": RawCursor},
-            max_size=3,
+            # rss are fetched concurrently, each worker may hold a connection
+            max_size=3 + config.rss_fetch_concurrency,
             min_size=1,
             connection_class=Connection,
         )
@@ -42,6 +78,9 @@ class Database:
     def lock(self, key: str) -> dlock.Lock:
         return dlock.Lock(self.__conn_info, key, scope="session")
 
+    def listen(self, channel: str) -> Listener:
+        return Listener(self.__conn_info, channel)
+
     def execute(self, sql: LiteralString, args: Sequence[Any] = ()) -> Any:
         with self.db.connection() as conn:
             conn.execute(sql, args)
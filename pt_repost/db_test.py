@@ -0,0 +1,23 @@
+import uuid
+
+from pt_repost.db import Listener, notify
+
+
+def test_notify(pg_dsn: str) -> None:
+    channel = "pt_repost_test_" + uuid.uuid4().hex
+    listener = Listener(pg_dsn, channel)
+
+    # first wait starts listening
+    assert listener.wait(0.1) == []
+
+    notify(pg_dsn, channel, "a")
+    notify(pg_dsn, channel, "b")
+
+    received = listener.wait(5)
+    while len(received) < 2:
+        more = listener.wait(5)
+        assert more, "notification not received"
+        received.extend(more)
+
+    assert received == ["a", "b"]
+    assert listener.wait(0.1) == []
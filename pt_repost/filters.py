@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import re
+import sre_constants
+import sre_parse
+from collections.abc import Callable, Sequence
+from typing import cast
+
+import orjson
+import xxhash
+
+pattern_leading_flags = re.compile(r"\(\?([aiLmsux]+)\)")
+pattern_backref = re.compile(r"\\[1-9]|\(\?P=")
+
+# returns a truthy value if title match
+_Matcher = Callable[[str], object]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=False)
+class FilterRules:
+    """
+    includes: groups of regex, patterns in same group are "and", groups are "or".
+    excludes: regex, skip title if any pattern match.
+    global_includes: skip title if all patterns match.
+    global_excludes: skip title if any pattern match.
+    """
+
+    includes: tuple[tuple[str, ...], ...] = ()
+    excludes: tuple[str, ...] = ()
+    global_includes: tuple[str, ...] = ()
+    global_excludes: tuple[str, ...] = ()
+
+    @classmethod
+    def new(
+        cls,
+        includes: Sequence[str | Sequence[str] | re.Pattern[str] | Sequence[re.Pattern[str]]] = (),
+        excludes: Sequence[str | re.Pattern[str]] = (),
+        global_includes: Sequence[str | re.Pattern[str]] = (),
+        global_excludes: Sequence[str | re.Pattern[str]] = (),
+    ) -> FilterRules:
+        return cls(
+            includes=tuple(
+                (_source(g),) if isinstance(g, str | re.Pattern) else tuple(_source(p) for p in g)
+                for g in includes
+            ),
+            excludes=tuple(_source(p) for p in excludes),
+            global_includes=tuple(_source(p) for p in global_includes),
+            global_excludes=tuple(_source(p) for p in global_excludes),
+        )
+
+    @functools.cached_property
+    def version(self) -> str:
+        return xxhash.xxh3_64_hexdigest(orjson.dumps(dataclasses.astuple(self)))
+
+
+def _source(p: str | re.Pattern[str]) -> str:
+    if isinstance(p, str):
+        return p
+    return p.pattern
+
+
+class TitleFilter:
+    """
+    all rules of a rss compiled to at most 3 regex,
+    title is checked with one pass of each combined regex instead of one `search` per pattern.
+    """
+
+    def __init__(self, rules: FilterRules):
+        self.rules = rules
+        self.__excludes = _compile_any(rules.excludes + rules.global_excludes)
+        self.__includes = _compile_any_group(rules.includes)
+        self.__global_includes = (
+            _compile_any_group((rules.global_includes,)) if rules.global_includes else None
+        )
+
+    def match(self, title: str) -> bool:
+        if self.__excludes is not None and self.__excludes(title):
+            return False
+
+        if self.__includes is not None and not self.__includes(title):
+            return False
+
+        return self.__global_includes is None or not self.__global_includes(title)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_filter(rules: FilterRules) -> TitleFilter:
+    return TitleFilter(rules)
+
+
+def _split_flags(pattern: str) -> tuple[str, str]:
+    """`(?i)abc` -> ("i", "abc")"""
+    flags = ""
+    while m := pattern_leading_flags.match(pattern):
+        flags += m.group(1)
+        pattern = pattern[m.end() :]
+    return "".join(sorted(set(flags))), pattern
+
+
+def _scoped(flags: str, pattern: str) -> str:
+    """
+    wrap pattern in a group with scoped flags, `(?i:abc)`.
+
+    global flags are only allowed at the start of the whole regex.
+    """
+    if not flags:
+        return f"(?:{pattern})"
+
+    if "x" in flags:
+        # comment in verbose pattern may eat the closing parenthesis
+        return f"(?{flags}:{pattern}\n)"
+
+    return f"(?{flags}:{pattern})"
+
+
+def _starts_with_word_boundary(flags: str, pattern: str) -> bool:
+    if not pattern.startswith(r"\b"):
+        return False
+
+    # top level alternation like `\bfoo|bar` will be parsed as a BRANCH
+    parsed = sre_parse.parse(f"(?{flags}){pattern}" if flags else pattern)
+    if not parsed.data:
+        return False
+
+    op, av = parsed.data[0]
+    # typeshed doesn't know argument of AT is a code
+    return op == sre_constants.AT and cast(object, av) == sre_constants.AT_BOUNDARY
+
+
+def _alternation(patterns: Sequence[str]) -> str:
+    r"""
+    combine patterns as a single alternation.
+
+    `re` doesn't optimize alternation, each branch is tried at each position.
+    patterns with same flags are grouped, and leading `\b` is factored out,
+    so most positions are rejected by a single `\b` check instead of one check per branch.
+    """
+    by_flags: dict[str, tuple[list[str], list[str]]] = {}
+    for pattern in patterns:
+        flags, body = _split_flags(pattern)
+        boundary, other = by_flags.setdefault(flags, ([], []))
+        if _starts_with_word_boundary(flags, body):
+            boundary.append(body[2:])
+        else:
+            other.append(body)
+
+    alternation = []
+    for flags, (boundary, other) in by_flags.items():
+        # comment in verbose pattern may eat the closing parenthesis
+        end = "\n)" if "x" in flags else ")"
+        branches = [f"(?:{p}{end}" for p in other]
+        if boundary:
+            branches.insert(0, r"\b(?:" + "|".join(f"(?:{p}{end}" for p in boundary) + ")")
+        alternation.append(_scoped(flags, "|".join(branches)))
+
+    return "|".join(alternation)
+
+
+def _combinable(patterns: Sequence[str]) -> bool:
+    """groups and backrefs are numbered across the combined regex, can't be merged safely"""
+    for p in patterns:
+        if pattern_backref.search(p):
+            return False
+        if re.compile(p).groupindex:
+            return False
+    return True
+
+
+def _compile_any(patterns: Sequence[str]) -> _Matcher | None:
+    """match if any pattern match"""
+    if not patterns:
+        return None
+
+    if not _combinable(patterns):
+        compiled = [re.compile(p) for p in patterns]
+        return lambda title: any(p.search(title) for p in compiled)
+
+    return re.compile(_alternation(patterns)).search
+
+
+def _compile_any_group(groups: Sequence[Sequence[str]]) -> _Matcher | None:
+    """match if all patterns in any group match"""
+    if not groups:
+        return None
+
+    if not _combinable([p for g in groups for p in g]):
+        compiled = [[re.compile(p) for p in g] for g in groups]
+        return lambda title: any(all(p.search(title) for p in g) for g in compiled)
+
+    # `(?=(?s:.*)p)` anchored at the start is equal to `search(p)`,
+    # so a group of lookahead is "and" of searches.
+    return re.compile(
+        r"\A(?:"
+        + "|".join(
+            "".join(r"(?=(?s:.*)" + _scoped(*_split_flags(p)) + ")" for p in g) for g in groups
+        )
+        + ")"
+    ).match
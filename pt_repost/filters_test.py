@@ -0,0 +1,71 @@
+import re
+
+import pytest
+
+from pt_repost.filters import FilterRules, compile_filter
+
+titles = [
+    "The Fiery Priest 2 S02E11 2024 1080p DSNP WEB-DL H264 AAC-ADWeb",
+    "Show S01E01 2160p NF WEB-DL DDP5.1 Atmos DV HDR H.265-MWeb",
+    "Show S01E01 2160p AMZN WEB-DL DDP5.1 H.265-HHWEB",
+    "Show S01 1080p WEB-DL H265 AAC-HHWEB",
+    "Movie 2024 720p BluRay x264-CMCT",
+    "Movie 2024 2160p UHD BluRay REMUX DoVi HEVC-cmctv",
+    "Dragon Ball DAIMA S01E10 1080p WEB-DL x264",
+    "Some.Show.S02E03.2160p.iQIYI.WEB-DL.AAC2.0.H.265-MWeb",
+    "电影 2024 2160p WEB-DL",
+]
+
+rules = [
+    FilterRules(),
+    FilterRules.new(
+        includes=[
+            [r"(?i)\bWEB-DL\b", r"(?i)\b(nf|netflix|amzn|ATVP|DSNP)\b", r"(?i)-(mweb|hhweb)$"],
+            [r"(?i)-cmct"],
+        ],
+        excludes=[r"(?i)\b720p\b"],
+        global_excludes=[
+            r"(?i)\b(dovi|DV|Dolby Vision)\b",
+            r"(?i)\b(TX|iQIYI|KKTV|YOUKU|HAMi)\b",
+            r"(?i)\b1080p\b.*\b(x|h)265\b",
+            r"(?i)-cmctv$",
+        ],
+    ),
+    FilterRules.new(includes=[r"^Show", []], global_includes=[r"2160p", r"(?i)web-dl"]),
+    FilterRules.new(
+        # can't be combined, named group and backref
+        includes=[[r"(?P<a>S\d+)", r"(?i)web-dl"]],
+        excludes=[r"(\d)\1"],
+    ),
+    FilterRules.new(excludes=["(?x) h\\.265  # comment"]),
+]
+
+
+def match_separately(rules: FilterRules, title: str) -> bool:
+    """reference implementation, with one `re.search` for each pattern"""
+    if any(re.search(p, title) for p in rules.excludes):
+        return False
+
+    if rules.includes and not any(
+        all(re.search(p, title) for p in group) for group in rules.includes
+    ):
+        return False
+
+    if any(re.search(p, title) for p in rules.global_excludes):
+        return False
+
+    return not (rules.global_includes and all(re.search(p, title) for p in rules.global_includes))
+
+
+@pytest.mark.parametrize("r", rules)
+def test_compiled_filter_match_reference(r: FilterRules) -> None:
+    f = compile_filter(r)
+    for title in titles:
+        assert f.match(title) == match_separately(r, title), title
+
+
+def test_compile_filter_cached() -> None:
+    assert compile_filter(FilterRules.new(excludes=["a"])) is compile_filter(
+        FilterRules.new(excludes=["a"])
+    )
+    assert FilterRules.new(excludes=["a"]).version != FilterRules.new(excludes=["b"]).version
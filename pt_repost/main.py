@@ -1,9 +1,18 @@
+import time
+from pathlib import Path
+
 import click
 import uvicorn
 
+from pt_repost import db
 from pt_repost.application import Application
 from pt_repost.config import load_config
+from pt_repost.const import NOTIFY_CHANNEL_TORRENT_FINISHED, RSS_ITEM_STATUS_SKIPPED
+from pt_repost.filters import FilterRules, compile_filter
+from pt_repost.rss import iter_rss_items
 from pt_repost.server import create_app
+from pt_repost.snapshot import load_snapshots
+from pt_repost.utils import human_readable_size
 
 
 @click.group()
@@ -36,3 +45,165 @@ def daemon(config_file: str) -> None:
 @click.option("--host", default="127.0.0.1")
 def server(config_file: str, port: int, host: str) -> None:
     uvicorn.run(lambda: create_app(config_file), port=port, host=host)
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option(
+    "--dir",
+    "snapshot_dir",
+    default=None,
+    type=click.Path(exists=True, file_okay=False),
+    help="snapshots directory, default to {data-dir}/feeds",
+)
+@click.option(
+    "--website",
+    default="replay",
+    help="website of replayed items, existing items of this website are deleted",
+)
+def replay(config_file: str, snapshot_dir: str | None, website: str) -> None:
+    """ingest recorded rss snapshots without network, report throughput"""
+    cfg = load_config(config_file)
+    if website in {rss.website for rss in cfg.rss}:
+        raise click.BadParameter(
+            f"{website!r} is a website of configured rss, its items would be deleted",
+            param_hint="--website",
+        )
+
+    app = Application.new(cfg)
+
+    snapshots = load_snapshots(
+        Path(snapshot_dir) if snapshot_dir else cfg.data_dir.joinpath("feeds")
+    )
+    if not snapshots:
+        click.echo("no snapshot found")
+        return
+
+    # global rules are stored as verdict of each item, same as daemon
+    title_filter = compile_filter(FilterRules.new())
+
+    app.db.execute("delete from rss_item where website = $1", [website])
+
+    items = 0
+    inserted = 0
+    parse_seconds = 0.0
+    db_seconds = 0.0
+
+    start = time.perf_counter()
+    for snapshot in snapshots:
+        t = time.perf_counter()
+        rss_items = list(iter_rss_items(snapshot.iter_bytes()))
+        parse_seconds += time.perf_counter() - t
+
+        result = app.process_rss_items(rss_items, website, title_filter)
+
+        items += len(rss_items)
+        inserted += result.inserted
+        db_seconds += result.db_seconds
+    total = time.perf_counter() - start
+
+    app.db.execute("delete from rss_item where website = $1", [website])
+
+    click.echo(f"{len(snapshots)} snapshots, {items} items, {inserted} inserted")
+    click.echo(f"total: {total:>8.3f}s {items / max(total, 1e-9):>12,.0f} items/s")
+    click.echo(f"parse: {parse_seconds:>8.3f}s {items / max(parse_seconds, 1e-9):>12,.0f} items/s")
+    click.echo(f"db:    {db_seconds:>8.3f}s")
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option("--url", required=True, help="torznab search url, like `.../api?t=search&q=mweb`")
+@click.option("--website", required=True)
+@click.option("--include", "includes", multiple=True, help="title regex, all must match")
+@click.option("--exclude", "excludes", multiple=True, help="title regex, skip if any match")
+@click.option("--page-size", default=100)
+@click.option("--max-pages", default=100)
+@click.option("--concurrency", default=4)
+@click.option("--restart", is_flag=True, help="ignore saved progress and start from offset 0")
+def backfill(
+    config_file: str,
+    url: str,
+    website: str,
+    includes: tuple[str, ...],
+    excludes: tuple[str, ...],
+    page_size: int,
+    max_pages: int,
+    concurrency: int,
+    restart: bool,
+) -> None:
+    """ingest search results of a torznab indexer, resume from last progress by default"""
+    cfg = load_config(config_file)
+    app = Application.new(cfg)
+
+    title_filter = compile_filter(
+        FilterRules.new(
+            includes=[includes] if includes else [],
+            excludes=excludes,
+        )
+    )
+
+    result = app.backfill(
+        url,
+        website,
+        title_filter,
+        page_size=page_size,
+        max_pages=max_pages,
+        concurrency=concurrency,
+        restart=restart,
+    )
+
+    click.echo(f"{result.inserted} items inserted")
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+def skipped(config_file: str) -> None:
+    """report skipped items and size not downloaded, by reason"""
+    cfg = load_config(config_file)
+    app = Application.new(cfg)
+
+    rows: list[tuple[str, int, int]] = app.db.fetch_all(
+        """
+        select skip_reason, count(*), coalesce(sum(size), 0)::int8 from rss_item
+        where status = $1 and skip_reason != ''
+        group by skip_reason
+        order by 3 desc
+        """,
+        [RSS_ITEM_STATUS_SKIPPED],
+    )
+
+    for reason, count, size in rows:
+        click.echo(f"{human_readable_size(size):>12} {count:>6} {reason}")
+
+
+@cli.command()
+@click.option(
+    "--config-file",
+    "config_file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.argument("info_hash")
+def notify(config_file: str, info_hash: str) -> None:
+    """
+    notify daemon that a torrent finished downloading.
+
+    for "run external program on torrent finished" of qBittorrent: `notify %I`
+    """
+    cfg = load_config(config_file)
+    db.notify(cfg.pg_dsn(), NOTIFY_CHANNEL_TORRENT_FINISHED, info_hash.lower())
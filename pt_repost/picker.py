@@ -0,0 +1,544 @@
+"""
+claim pending rss_item for a node.
+
+rows are claimed in small batches with `for update skip locked`,
+rows locked by another node are skipped instead of waited or causing serialization failure.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+import time
+from collections.abc import Callable, Sequence
+from datetime import datetime
+
+from pt_repost.const import (
+    RSS_ITEM_STATUS_DOWNLOADING,
+    RSS_ITEM_STATUS_PENDING,
+    RSS_ITEM_STATUS_PROCESSING,
+)
+from pt_repost.db import Connection
+from pt_repost.filters import TitleFilter
+from pt_repost.release import same_size
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class Pick:
+    title: str
+    guid: str
+    website: str
+    link: str
+    released_at: datetime
+    size: int
+    imdb_id: str = ""
+    douban_id: str = ""
+    release_key: str = ""
+    # verdict of global filter, evaluated with rules of `filter_version`
+    filter_passed: bool = True
+    filter_version: str = ""
+    # only set when picked by score, `rss_id` is 0 for items not from rss
+    score: float = 0
+    rss_id: int = 0
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class Scoring:
+    """
+    score of a pending item is
+
+        weight of website * (1 + priority of rss) / (1 + processing items of website)
+        + deadline_weight * (now - released_at) / window
+
+    first part shares nodes between websites by weight,
+    a website with many processing items gets lower score.
+    second part grows as item approaches `released_at + window`, after which it's never picked.
+
+    score is computed in SQL by `select_scored`, `score` is same formula for simulation.
+    """
+
+    website_weights: dict[str, float]
+    # recent release window in seconds, deadline term is disabled if 0
+    window: int
+    deadline_weight: float
+
+    def score(
+        self,
+        *,
+        website: str,
+        priority: float,
+        released_at: datetime,
+        now: datetime,
+        processing: dict[str, int],
+    ) -> float:
+        s = self.website_weights.get(website, 1) * (1 + priority) / (1 + processing.get(website, 0))
+        if self.window > 0:
+            s += self.deadline_weight * (now - released_at).total_seconds() / self.window
+        return s
+
+
+# (released_at, guid, website) of last row in previous batch
+Cursor = tuple[datetime, str, str]
+# (released_at, guid) of last row of each (website, rss_id) group in previous batches
+ScoredCursor = dict[tuple[str, int], tuple[datetime, str]]
+
+
+def select_pending(
+    conn: Connection,
+    *,
+    limit: int,
+    max_size: int,
+    released_after: datetime,
+    min_seeders: int,
+    after: Cursor | None,
+    lock: bool = True,
+) -> list[Pick]:
+    """
+    lock next batch of pending rss_item passed global filter, newest first.
+
+    items passed another rules version are also returned, check them with `passes`.
+    items failed are not in pick index, they are evaluated again by `refresh_filter_verdicts`.
+    must be called in a transaction if lock is true.
+    """
+    rows: list[tuple[str, str, str, datetime, int, str, str, str, str, bool, str]] = conn.fetch_all(
+        """
+        select guid,website,link,released_at,size,title,imdb_id,douban_id,release_key,
+            filter_passed,filter_version
+        from rss_item where status = $1 and filter_passed
+        and size <= $2 and released_at >= $3
+        and (seeders is null or seeders >= $4)
+        and (
+            rss_info_hash = ''
+            or not exists (
+                select 1 from rss_item other where other.info_hash = rss_item.rss_info_hash
+            )
+        )
+        and ($5::timestamptz is null or (released_at, guid, website) < ($5, $6, $7))
+        order by released_at desc, guid desc, website desc
+        limit $8
+        """
+        + (" for update skip locked" if lock else ""),
+        [
+            RSS_ITEM_STATUS_PENDING,
+            max_size,
+            released_after,
+            min_seeders,
+            *(after or (None, "", "")),
+            limit,
+        ],
+    )
+
+    return [
+        Pick(
+            guid=guid,
+            website=website,
+            link=link,
+            released_at=released_at,
+            size=size,
+            title=title,
+            imdb_id=imdb_id,
+            douban_id=douban_id,
+            release_key=key,
+            filter_passed=passed,
+            filter_version=version,
+        )
+        for (
+            guid,
+            website,
+            link,
+            released_at,
+            size,
+            title,
+            imdb_id,
+            douban_id,
+            key,
+            passed,
+            version,
+        ) in rows
+    ]
+
+
+def select_scored(
+    conn: Connection,
+    *,
+    limit: int,
+    max_size: int,
+    released_after: datetime,
+    min_seeders: int,
+    scoring: Scoring,
+    after: ScoredCursor | None = None,
+    lock: bool = True,
+) -> list[Pick]:
+    """
+    same as `select_pending`, but ordered by score of `scoring`.
+
+    score is a constant of (website, rss) group plus a term linear in `released_at`,
+    so order of items in a group doesn't change between batches.
+    each group is read in index order from its own cursor in `after`,
+    at most `limit` items of each group are scored and merged.
+    """
+    # older items get higher score with deadline term
+    if scoring.window > 0 and scoring.deadline_weight > 0:
+        direction, op, start = "asc", ">", "-infinity"
+    else:
+        direction, op, start = "desc", "<", "infinity"
+    cursor = list((after or {}).items())
+
+    rows: list[tuple[str, str, int, str, datetime, int, str, str, str, str, bool, str, float]] = (
+        conn.fetch_all(
+            f"""
+        with recursive groups(website, rss_id) as (
+            (
+                select website, coalesce(rss_id, 0) from rss_item
+                where status = $1 and filter_passed
+                order by website, coalesce(rss_id, 0)
+                limit 1
+            )
+            union all
+            select n.website, n.rss_id from groups as g
+            cross join lateral (
+                select website, coalesce(rss_id, 0) as rss_id from rss_item
+                where status = $1 and filter_passed
+                and (website, coalesce(rss_id, 0)) > (g.website, g.rss_id)
+                order by website, coalesce(rss_id, 0)
+                limit 1
+            ) as n
+        ),
+        processing as (
+            select website, count(*) as n from rss_item where status = any($11) group by website
+        ),
+        top as (
+            select i.guid, i.website, g.rss_id,
+                coalesce(w.weight, 1) * (1 + coalesce(rss.priority, 0)) / (1 + coalesce(p.n, 0))
+                + case
+                    when $13::float8 > 0
+                    then $14::float8 * extract(epoch from current_timestamp - i.released_at)::float8 / $13::float8
+                    else 0
+                end as score
+            from groups as g
+            left join unnest($9::text[], $10::float8[]) as w(website, weight) on w.website = g.website
+            left join processing as p on p.website = g.website
+            left join rss on rss.id = g.rss_id
+            left join unnest($5::text[], $6::int4[], $7::timestamptz[], $8::text[])
+                as c(website, rss_id, released_at, guid)
+                on c.website = g.website and c.rss_id = g.rss_id
+            cross join lateral (
+                select guid, website, released_at from rss_item
+                where status = $1 and filter_passed
+                and website = g.website and coalesce(rss_id, 0) = g.rss_id
+                and (released_at, guid) {op} (coalesce(c.released_at, '{start}'), coalesce(c.guid, ''))
+                and size <= $2 and released_at >= $3
+                and (seeders is null or seeders >= $4)
+                and (
+                    rss_info_hash = ''
+                    or not exists (
+                        select 1 from rss_item other where other.info_hash = rss_item.rss_info_hash
+                    )
+                )
+                order by released_at {direction}, guid {direction}
+                limit $12
+            ) as i
+            order by score desc, i.released_at desc, i.guid {direction}
+            limit $12
+        )
+        select i.guid, i.website, top.rss_id, i.link, i.released_at, i.size, i.title, i.imdb_id,
+            i.douban_id, i.release_key, i.filter_passed, i.filter_version, top.score
+        from top
+        join rss_item as i on i.guid = top.guid and i.website = top.website
+        where i.status = $1
+        order by top.score desc, i.released_at desc, i.guid {direction}
+        """
+            + (" for update of i skip locked" if lock else ""),
+            [
+                RSS_ITEM_STATUS_PENDING,
+                max_size,
+                released_after,
+                min_seeders,
+                [website for (website, _), _ in cursor],
+                [rss_id for (_, rss_id), _ in cursor],
+                [released_at for _, (released_at, _) in cursor],
+                [guid for _, (_, guid) in cursor],
+                list(scoring.website_weights),
+                list(scoring.website_weights.values()),
+                list(RSS_ITEM_STATUS_PROCESSING),
+                limit,
+                scoring.window,
+                scoring.deadline_weight,
+            ],
+        )
+    )
+
+    return [
+        Pick(
+            guid=guid,
+            website=website,
+            rss_id=rss_id,
+            link=link,
+            released_at=released_at,
+            size=size,
+            title=title,
+            imdb_id=imdb_id,
+            douban_id=douban_id,
+            release_key=key,
+            filter_passed=passed,
+            filter_version=version,
+            score=score,
+        )
+        for (
+            guid,
+            website,
+            rss_id,
+            link,
+            released_at,
+            size,
+            title,
+            imdb_id,
+            douban_id,
+            key,
+            passed,
+            version,
+            score,
+        ) in rows
+    ]
+
+
+def passes(p: Pick, title_filter: TitleFilter) -> bool:
+    """
+    verdict of global filter.
+
+    verdict stored by a node with other rules is evaluated again, it's not hidden or trusted.
+    """
+    if p.filter_version == title_filter.rules.version:
+        return p.filter_passed
+    return title_filter.match(p.title)
+
+
+def mark_picked(conn: Connection, picks: list[Pick], node_id: str) -> None:
+    if not picks:
+        return
+
+    conn.execute(
+        """
+        update rss_item
+        set status = $1,
+            picked_node = $2,
+            updated_at = current_timestamp
+        from unnest($3::text[], $4::text[]) as t(guid, website)
+        where rss_item.guid = t.guid and rss_item.website = t.website
+        """,
+        [
+            RSS_ITEM_STATUS_DOWNLOADING,
+            node_id,
+            [p.guid for p in picks],
+            [p.website for p in picks],
+        ],
+    )
+
+
+def claim(
+    conn: Connection,
+    *,
+    node_id: str,
+    accept: Callable[[Pick], bool],
+    limit: int,
+    batch_size: int,
+    max_size: int,
+    released_after: datetime,
+    title_filter: TitleFilter,
+    min_seeders: int = 0,
+    scoring: Scoring | None = None,
+) -> list[Pick]:
+    """
+    claim at most `limit` pending rss_item accepted by `accept`, newest first or by score.
+
+    `accept` is called in order for items passed `title_filter`, and may keep state,
+    like size budget of node.
+    each batch is a short transaction, rows rejected by `accept` are left as pending,
+    and each pending row is visited at most once.
+    """
+    picked: list[Pick] = []
+    after: Cursor | None = None
+    scored_after: ScoredCursor = {}
+    # same release from multiple websites may be pending at same time
+    releases: dict[str, list[int]] = {}
+
+    while True:
+        with conn.transaction():
+            if scoring is None:
+                batch = select_pending(
+                    conn,
+                    limit=batch_size,
+                    max_size=max_size,
+                    released_after=released_after,
+                    min_seeders=min_seeders,
+                    after=after,
+                )
+            else:
+                batch = select_scored(
+                    conn,
+                    limit=batch_size,
+                    max_size=max_size,
+                    released_after=released_after,
+                    min_seeders=min_seeders,
+                    scoring=scoring,
+                    after=scored_after,
+                )
+            accepted: list[Pick] = []
+            for p in batch:
+                if len(picked) + len(accepted) >= limit:
+                    break
+                if not passes(p, title_filter):
+                    continue
+                if p.release_key and any(
+                    same_size(p.size, size) for size in releases.get(p.release_key, [])
+                ):
+                    continue
+                if accept(p):
+                    accepted.append(p)
+                    if p.release_key:
+                        releases.setdefault(p.release_key, []).append(p.size)
+            mark_picked(conn, accepted, node_id)
+
+        picked.extend(accepted)
+
+        if len(batch) < batch_size or len(picked) >= limit:
+            return picked
+
+        last = batch[-1]
+        after = (last.released_at, last.guid, last.website)
+        # batch is in score order, which is same as order in each group
+        for p in batch:
+            scored_after[(p.website, p.rss_id)] = (p.released_at, p.guid)
+
+
+def claim_selected(conn: Connection, picks: list[Pick], node_id: str) -> list[Pick]:
+    """claim picks selected without lock, picks claimed by other nodes meanwhile are dropped"""
+    if not picks:
+        return []
+
+    with conn.transaction():
+        rows: list[tuple[str, str]] = conn.fetch_all(
+            """
+            select rss_item.guid, rss_item.website from rss_item
+            join unnest($1::text[], $2::text[]) as t(guid, website)
+                on rss_item.guid = t.guid and rss_item.website = t.website
+            where rss_item.status = $3
+            for update of rss_item skip locked
+            """,
+            [[p.guid for p in picks], [p.website for p in picks], RSS_ITEM_STATUS_PENDING],
+        )
+        locked = set(rows)
+        claimed = [p for p in picks if (p.guid, p.website) in locked]
+        mark_picked(conn, claimed, node_id)
+
+    return claimed
+
+
+def dedupe_releases(picks: list[Pick]) -> list[Pick]:
+    """keep first pick of each release"""
+    releases: dict[str, list[int]] = {}
+    result = []
+    for p in picks:
+        sizes = releases.setdefault(p.release_key, []) if p.release_key else []
+        if any(same_size(p.size, size) for size in sizes):
+            continue
+        sizes.append(p.size)
+        result.append(p)
+    return result
+
+
+class _Timeout(Exception):
+    pass
+
+
+def knapsack(
+    sizes: Sequence[int],
+    values: Sequence[float],
+    *,
+    capacity: int,
+    max_count: int,
+    timeout: float,
+) -> list[int]:
+    """
+    select items with max total value, total size <= capacity and at most `max_count` items.
+    items with value <= 0 never increase total value, they are not selected.
+
+    branch and bound search, starting from greedy solution by value density.
+    search stops after `timeout` seconds and returns best solution found so far.
+    return indexes of selected items in input order.
+    """
+    deadline = time.perf_counter() + timeout
+
+    order = sorted(
+        (i for i in range(len(sizes)) if sizes[i] <= capacity and values[i] > 0),
+        key=lambda i: values[i] / sizes[i] if sizes[i] else math.inf,
+        reverse=True,
+    )
+    n = len(order)
+
+    best: list[int] = []
+    best_value = 0.0
+
+    # greedy by value density, as initial solution
+    size = 0
+    for i in order:
+        if len(best) >= max_count:
+            break
+        if size + sizes[i] <= capacity:
+            size += sizes[i]
+            best.append(i)
+            best_value += values[i]
+
+    def bound(k: int, size: int, value: float, count: int) -> float:
+        """
+        upper bound of value with remaining items,
+        min of fractional relaxation of capacity and best `max_count - count` items.
+        """
+        room = capacity - size
+        by_capacity = value
+        for i in order[k:]:
+            if sizes[i] <= room:
+                room -= sizes[i]
+                by_capacity += values[i]
+            else:
+                by_capacity += values[i] * room / sizes[i]
+                break
+
+        slots = max_count - count
+        if slots >= n - k:
+            return by_capacity
+
+        by_count = value + sum(sorted((values[i] for i in order[k:]), reverse=True)[:slots])
+        return min(by_capacity, by_count)
+
+    chosen: list[int] = []
+
+    def search(k: int, size: int, value: float) -> None:
+        nonlocal best, best_value
+
+        if time.perf_counter() > deadline:
+            raise _Timeout
+
+        if value > best_value:
+            best, best_value = chosen.copy(), value
+
+        if k == n or len(chosen) >= max_count:
+            return
+
+        if bound(k, size, value, len(chosen)) <= best_value:
+            return
+
+        i = order[k]
+        if size + sizes[i] <= capacity:
+            chosen.append(i)
+            search(k + 1, size + sizes[i], value + values[i])
+            chosen.pop()
+
+        search(k + 1, size, value)
+
+    try:
+        search(0, 0, 0.0)
+    except _Timeout:
+        pass
+
+    return sorted(best)
@@ -0,0 +1,184 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pt_repost import picker
+from pt_repost.const import RSS_ITEM_STATUS_DOWNLOADING, RSS_ITEM_STATUS_PENDING
+from pt_repost.db import Connection
+from pt_repost.filters import FilterRules, compile_filter
+from pt_repost.picker import Pick, knapsack
+
+
+def test_knapsack_fill_capacity() -> None:
+    # newest first greedy picks only the first item
+    assert knapsack([8, 5, 4], [1, 1, 1], capacity=10, max_count=10, timeout=1) == [1, 2]
+
+
+def test_knapsack_max_count() -> None:
+    assert knapsack([1, 2, 3, 4], [1, 1, 1, 1], capacity=100, max_count=2, timeout=1) == [0, 1]
+    assert knapsack([1, 5, 1], [1, 10, 1], capacity=100, max_count=1, timeout=1) == [1]
+
+
+def test_knapsack_weighted() -> None:
+    assert knapsack([6, 5, 5], [7, 5, 5], capacity=10, max_count=10, timeout=1) == [1, 2]
+    assert knapsack([11, 1], [100, 1], capacity=10, max_count=10, timeout=1) == [1]
+
+
+def test_knapsack_non_positive_value() -> None:
+    assert knapsack([1, 1, 1], [1, 0, -1], capacity=10, max_count=10, timeout=1) == [0]
+    assert knapsack([1, 1, 1], [1, 0, -1], capacity=10, max_count=10, timeout=0) == [0]
+
+
+def test_knapsack_timeout() -> None:
+    # greedy solution by value density is returned if solver has no time
+    assert knapsack([6, 5, 5], [7, 5, 5], capacity=10, max_count=10, timeout=0) == [0]
+
+
+def test_dedupe_releases() -> None:
+    now = datetime.now()
+
+    def pick(guid: str, key: str, size: int) -> Pick:
+        return Pick(
+            title="", guid=guid, website="", link="", released_at=now, size=size, release_key=key
+        )
+
+    picks = [pick("1", "a", 100), pick("2", "a", 100), pick("3", "a", 200), pick("4", "", 100)]
+    assert [p.guid for p in picker.dedupe_releases(picks + [pick("5", "", 100)])] == [
+        "1",
+        "3",
+        "4",
+        "5",
+    ]
+
+
+def test_passes() -> None:
+    f = compile_filter(FilterRules.new(global_excludes=["CAM"]))
+
+    def pick(title: str, passed: bool, version: str) -> Pick:
+        return Pick(
+            title=title,
+            guid=title,
+            website="a",
+            link="",
+            released_at=datetime.now(),
+            size=1,
+            filter_passed=passed,
+            filter_version=version,
+        )
+
+    assert not picker.passes(pick("Movie 1080p", False, f.rules.version), f)
+    # verdict of another version is evaluated again, in both direction
+    assert picker.passes(pick("Movie 1080p", False, "old"), f)
+    assert not picker.passes(pick("Movie CAM", True, "old"), f)
+
+
+def test_claim(conn: Connection) -> None:
+    title_filter = compile_filter(FilterRules.new(global_excludes=["x265"]))
+    version = title_filter.rules.version
+
+    # guid, title, hour of release, size, status, verdict, version, info hash, rss info hash, seeders
+    rows = [
+        ("a", "A", 12, 100, RSS_ITEM_STATUS_PENDING, True, version, "", "", None),
+        ("b", "B x265", 11, 100, RSS_ITEM_STATUS_PENDING, False, version, "", "", None),
+        # verdict of other rules is evaluated again
+        ("c", "C x265", 10, 100, RSS_ITEM_STATUS_PENDING, True, "old", "", "", None),
+        ("d", "D", 9, 100, RSS_ITEM_STATUS_PENDING, True, version, "", "h1", None),
+        ("e", "E", 8, 100, RSS_ITEM_STATUS_DOWNLOADING, True, version, "h1", "", None),
+        ("f", "F", 7, 100, RSS_ITEM_STATUS_PENDING, True, version, "", "", 0),
+        ("g", "G", 6, 1000, RSS_ITEM_STATUS_PENDING, True, version, "", "", 10),
+        ("h", "H", 5, 100, RSS_ITEM_STATUS_PENDING, True, version, "", "", None),
+        ("i", "I", 4, 100, RSS_ITEM_STATUS_PENDING, True, version, "", "", None),
+    ]
+    conn.execute(
+        """
+        insert into rss_item (
+            guid, website, link, title, released_at, size, status,
+            filter_passed, filter_version, info_hash, rss_info_hash, seeders
+        )
+        select t.guid, 'w', '', t.title, $1::timestamptz + make_interval(hours => t.hour), t.size,
+            t.status, t.filter_passed, t.filter_version, t.info_hash, t.rss_info_hash, t.seeders
+        from unnest(
+            $2::text[], $3::text[], $4::int4[], $5::int8[], $6::text[],
+            $7::bool[], $8::text[], $9::text[], $10::text[], $11::int4[]
+        ) as t(
+            guid, title, hour, size, status,
+            filter_passed, filter_version, info_hash, rss_info_hash, seeders
+        )
+        """,
+        [datetime(2025, 1, 1, tzinfo=timezone.utc), *(list(col) for col in zip(*rows))],
+    )
+
+    rest = 250
+
+    def accept(p: Pick) -> bool:
+        nonlocal rest
+        if rest - p.size <= 0:
+            return False
+        rest -= p.size
+        return True
+
+    picked = picker.claim(
+        conn,
+        node_id="node",
+        accept=accept,
+        limit=10,
+        batch_size=2,
+        max_size=10000,
+        released_after=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        title_filter=title_filter,
+        min_seeders=1,
+    )
+
+    assert [p.guid for p in picked] == ["a", "h"]
+
+    status = dict(
+        conn.fetch_all("select guid, status || ':' || picked_node from rss_item order by guid")
+    )
+    assert status["a"] == status["h"] == f"{RSS_ITEM_STATUS_DOWNLOADING}:node"
+    # rejected by budget or filters, left pending
+    for guid in ["b", "c", "d", "f", "g", "i"]:
+        assert status[guid] == f"{RSS_ITEM_STATUS_PENDING}:"
+
+
+@pytest.mark.parametrize(
+    ("deadline_weight", "expected"),
+    [
+        # website weight shared by processing items, newest first in each website
+        (0, ["a3", "b2", "a2", "a1", "b1"]),
+        # deadline term dominates, oldest first
+        (1000, ["a1", "a2", "a3", "b1", "b2"]),
+    ],
+)
+def test_claim_scored(conn: Connection, deadline_weight: float, expected: list[str]) -> None:
+    title_filter = compile_filter(FilterRules.new())
+    conn.execute(
+        """
+        insert into rss_item (guid, website, link, title, released_at, size, status, filter_version)
+        select t.guid, left(t.guid, 1), '', t.guid, $1::timestamptz + make_interval(hours => t.hour),
+            100, $2, $3
+        from unnest($4::text[], $5::int4[]) as t(guid, hour)
+        """,
+        [
+            datetime(2025, 1, 1, tzinfo=timezone.utc),
+            RSS_ITEM_STATUS_PENDING,
+            title_filter.rules.version,
+            ["a1", "a2", "a3", "b1", "b2"],
+            [1, 2, 3, 4, 5],
+        ],
+    )
+
+    picked = picker.claim(
+        conn,
+        node_id="node",
+        accept=lambda p: True,
+        limit=10,
+        batch_size=1,
+        max_size=10000,
+        released_after=datetime(2000, 1, 1, tzinfo=timezone.utc),
+        title_filter=title_filter,
+        scoring=picker.Scoring(
+            website_weights={"a": 2, "b": 1}, window=86400, deadline_weight=deadline_weight
+        ),
+    )
+
+    assert [p.guid for p in picked] == expected
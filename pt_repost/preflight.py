@@ -0,0 +1,22 @@
+"""
+check a torrent before adding it to qBittorrent.
+
+torrent that will be rejected after download is skipped early,
+by file list of torrent and codec/resolution predicted from release name.
+"""
+
+from __future__ import annotations
+
+from pt_repost.config import video_ext
+from pt_repost.torrent import TorrentInfo
+from pt_repost.website import Rejection, Website
+
+
+def preflight(info: TorrentInfo, release_name: str, website: Website) -> Rejection | None:
+    """return reason if torrent should be skipped"""
+    files = info.file_list()
+
+    if not any(f.name.lower().endswith(video_ext) for f in files):
+        return Rejection("no-video", "no video file in torrent")
+
+    return website.preflight(release_name)
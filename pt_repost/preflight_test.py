@@ -0,0 +1,57 @@
+import bencode2
+
+from pt_repost.preflight import preflight
+from pt_repost.torrent import parse_torrent_info
+from pt_repost.website import SSD, Rejection
+
+
+def make_torrent(files: list[tuple[str, int]]) -> bytes:
+    return bencode2.bencode(
+        {
+            b"info": {
+                b"name": b"release",
+                b"piece length": 16384,
+                b"pieces": b"\x00" * 20,
+                b"files": [{b"length": length, b"path": [name.encode()]} for name, length in files],
+            }
+        }
+    )
+
+
+def test_single_file() -> None:
+    info = parse_torrent_info(
+        bencode2.bencode(
+            {
+                b"info": {
+                    b"name": b"a.mkv",
+                    b"piece length": 16384,
+                    b"pieces": b"\x00" * 20,
+                    b"length": 100,
+                }
+            }
+        )
+    )
+
+    assert [(f.name, f.length) for f in info.file_list()] == [("a.mkv", 100)]
+
+
+def test_preflight() -> None:
+    # preflight doesn't use config
+    ssd = SSD.__new__(SSD)
+    video = parse_torrent_info(make_torrent([("a.mkv", 100), ("a.nfo", 1)]))
+
+    name = "Some.Movie.2024.1080p.WEB-DL.H264.AAC-Group"
+    assert preflight(video, name, ssd) is None
+    assert preflight(parse_torrent_info(make_torrent([("a.iso", 100)])), name, ssd) == Rejection(
+        "no-video", "no video file in torrent"
+    )
+
+    r = preflight(video, "Some.Movie.2024.1080p.BluRay.VC-1.DTS-HD.MA.5.1-Group", ssd)
+    assert r is not None
+    assert r.check == "video-codec"
+
+    r = preflight(video, "Some.Movie.2024.1080p.WEB-DL.H264.Opus-Group", ssd)
+    assert r is not None
+    assert r.check == "audio-codec"
+    # unknown codec is left to mediainfo
+    assert preflight(video, "Some.Movie.2024-Group", ssd) is None
@@ -0,0 +1,282 @@
+"""
+local mirror of qBittorrent state.
+
+`/api/v2/sync/maindata` with `rid` of last response only returns changed fields,
+so cost of a sync scales with changes, not with number of torrents in qBittorrent.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import random
+import time
+from collections.abc import Collection, Sequence
+from pathlib import Path
+from typing import Any, cast
+
+import qbittorrentapi
+from qbittorrentapi import TorrentState
+from sslog import logger
+
+from pt_repost.config import QbInstance, video_ext
+from pt_repost.const import DEFAULT_REMOVED_MESSAGES, REMOVED_MESSAGES
+from pt_repost.torrent import TorrentInfo
+from pt_repost.utils import parse_obj_as
+
+# state of piece in `torrents/pieceStates`
+QB_PIECE_DOWNLOADED = 2
+
+QB_FILE_PRIORITY_MAXIMAL = 7
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class QbFile:
+    index: int
+    name: str
+    size: int
+    priority: int
+    progress: float
+    # first and last piece of file, inclusive
+    piece_range: tuple[int, int] = (0, 0)
+
+
+@dataclasses.dataclass(kw_only=True, frozen=True)
+class QbTorrent:
+    name: str
+    hash: str
+    state: TorrentState
+    category: str = ""
+
+    save_path: str  # final download path
+    completed: int
+
+    uploaded: int
+
+    total_size: int
+    size: int
+    amount_left: int
+
+    num_seeds: int
+
+    eta: int = 0
+    # incomplete torrent is saved here if temp path is enabled
+    download_path: str = ""
+    # url of current working tracker, empty if no tracker is working
+    tracker: str = ""
+
+    @property
+    def progress(self) -> float:
+        """downloaded ratio saved in `rss_item.progress`, 0 before metadata is known"""
+        return self.completed / self.total_size if self.total_size else 0
+
+
+@dataclasses.dataclass(kw_only=True, frozen=True)
+class QbTracker:
+    msg: str
+    tier: int
+
+
+def main_video_file(files: Sequence[QbFile]) -> QbFile | None:
+    """largest video file of torrent, used for mediainfo and screenshots"""
+    return max(
+        (f for f in files if f.name.lower().endswith(video_ext)),
+        key=lambda f: f.size,
+        default=None,
+    )
+
+
+def main_video_index(info: TorrentInfo) -> int | None:
+    """
+    index of main video file in torrent file, same as file index of qBittorrent.
+
+    qBittorrent doesn't count pad files in file index.
+    """
+    files = [f for f in info.file_list() if not f.pad]
+    videos = [(f.length, i) for i, f in enumerate(files) if f.name.lower().endswith(video_ext)]
+    if not videos:
+        return None
+    # first one of largest files, same as `main_video_file`
+    return max(videos, key=lambda x: (x[0], -x[1]))[1]
+
+
+def local_file(t: QbTorrent, f: QbFile) -> Path | None:
+    """path of file on disk, may be in temp path and with `.!qB` extension if not finished"""
+    for d in (t.save_path, t.download_path):
+        if not d:
+            continue
+        for suffix in ("", ".!qB"):
+            p = Path(d, f.name + suffix)
+            if p.exists():
+                return p
+    return None
+
+
+def header_ready(piece_states: Sequence[int], piece_range: tuple[int, int], pieces: int) -> bool:
+    """first and last `pieces` pieces of a file are downloaded"""
+    first, last = piece_range
+    head = range(first, min(first + pieces, last + 1))
+    tail = range(max(last - pieces + 1, first), last + 1)
+    return all(piece_states[i] == QB_PIECE_DOWNLOADED for i in (*head, *tail))
+
+
+class QbMirror:
+    """
+    torrents and server state of qBittorrent, updated by `sync`.
+
+    all stages of a tick read from same snapshot,
+    a torrent is parsed again only when qBittorrent reports it changed.
+    """
+
+    def __init__(self, client: qbittorrentapi.Client):
+        self.__client = client
+        self.__rid = 0
+        self.__raw: dict[str, dict[str, Any]] = {}
+        self.__torrents: dict[str, QbTorrent] = {}
+        self.server_state: dict[str, Any] = {}
+
+    def sync(self) -> None:
+        self.apply(cast(dict[str, Any], self.__client.sync_maindata(rid=self.__rid)))
+
+    def apply(self, data: dict[str, Any]) -> None:
+        """apply a response of `sync/maindata`"""
+        if data.get("full_update"):
+            self.__raw.clear()
+            self.__torrents.clear()
+            self.server_state = {}
+
+        for info_hash in data.get("torrents_removed", []):
+            self.__raw.pop(info_hash, None)
+            self.__torrents.pop(info_hash, None)
+
+        for info_hash, changed in data.get("torrents", {}).items():
+            raw = self.__raw.setdefault(info_hash, {"hash": info_hash})
+            raw.update(changed)
+            self.__torrents[info_hash] = parse_obj_as(QbTorrent, raw)
+
+        self.server_state.update(data.get("server_state", {}))
+        self.__rid = data["rid"]
+
+    def get(self, info_hash: str) -> QbTorrent | None:
+        return self.__torrents.get(info_hash)
+
+    def torrents(self, *, category: str | None = None) -> list[QbTorrent]:
+        if category is None:
+            return list(self.__torrents.values())
+        return [t for t in self.__torrents.values() if t.category == category]
+
+    def seeding(self) -> list[QbTorrent]:
+        """same as `status_filter="seeding"` of `torrents/info`"""
+        return [t for t in self.__torrents.values() if t.state.is_uploading]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class _TrackerEntry:
+    tracker: str
+    expire_at: float
+    messages: tuple[str, ...]
+
+
+class TrackerCache:
+    """
+    tracker messages of torrents.
+
+    `torrents/trackers` is requested again only when `tracker` of torrent in maindata changed,
+    or cached messages expired. ttl has random jitter,
+    so torrents checked at same time are refreshed in different ticks.
+    """
+
+    def __init__(self, client: qbittorrentapi.Client, ttl: float, jitter: float = 0.2):
+        self.__client = client
+        self.__ttl = ttl
+        self.__jitter = jitter
+        self.__entries: dict[str, _TrackerEntry] = {}
+
+    def messages(self, t: QbTorrent, now: float | None = None) -> tuple[str, ...]:
+        if now is None:
+            now = time.monotonic()
+
+        entry = self.__entries.get(t.hash)
+        if entry is not None and entry.tracker == t.tracker and entry.expire_at > now:
+            return entry.messages
+
+        trackers = parse_obj_as(list[QbTracker], self.__client.torrents_trackers(t.hash))
+        entry = _TrackerEntry(
+            tracker=t.tracker,
+            expire_at=now + self.__ttl * (1 + random.uniform(-self.__jitter, self.__jitter)),
+            # tier of DHT, PeX and LSD is -1
+            messages=tuple(tracker.msg for tracker in trackers if tracker.tier >= 0),
+        )
+        self.__entries[t.hash] = entry
+        return entry.messages
+
+    def retain(self, hashes: Collection[str]) -> None:
+        """drop torrents not in hashes"""
+        for info_hash in self.__entries.keys() - set(hashes):
+            del self.__entries[info_hash]
+
+
+def removed_messages(target_website: str) -> frozenset[str]:
+    """tracker messages of torrent removed by target website"""
+    messages = REMOVED_MESSAGES.get(target_website.strip().lower())
+    if messages is None:
+        logger.warning(
+            "no tracker message of removed torrent for target website {!r}, using default",
+            target_website,
+        )
+        return DEFAULT_REMOVED_MESSAGES
+    return messages
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Qb:
+    """a qBittorrent instance, with its own state mirror and tracker cache"""
+
+    name: str
+    save_path: str
+    # host and save path, instances on same disk share its free space
+    disk: str
+    max_processing_size: int
+    client: qbittorrentapi.Client
+    state: QbMirror
+    trackers: TrackerCache
+
+    @classmethod
+    def new(cls, instance: QbInstance, tracker_check_interval: int) -> Qb:
+        client = qbittorrentapi.Client(
+            host=str(instance.url),
+            password=instance.url.password,
+            username=instance.url.username,
+            SIMPLE_RESPONSES=True,
+            FORCE_SCHEME_FROM_HOST=True,
+            VERBOSE_RESPONSE_LOGGING=False,
+            RAISE_NOTIMPLEMENTEDERROR_FOR_UNIMPLEMENTED_API_ENDPOINTS=True,
+            REQUESTS_ARGS={"timeout": 10},
+        )
+
+        return cls(
+            name=instance.key,
+            save_path=instance.save_path,
+            disk=f"{instance.url.host}:{instance.save_path}",
+            max_processing_size=instance.max_processing_size,
+            client=client,
+            state=QbMirror(client),
+            trackers=TrackerCache(client, tracker_check_interval),
+        )
+
+    def room(self, processing: Collection[tuple[str, int]]) -> int:
+        """
+        bytes left for new torrents, by (info_hash, size) of processing torrents on this instance.
+
+        without `max_processing_size`, it's free disk space minus bytes not downloaded yet.
+        """
+        if self.max_processing_size:
+            return self.max_processing_size - sum(size for _, size in processing)
+
+        left = 0
+        for info_hash, size in processing:
+            t = self.state.get(info_hash)
+            # added after last sync
+            left += size if t is None else t.amount_left
+
+        free_space: int = self.state.server_state.get("free_space_on_disk", 0)
+        return free_space - left
@@ -0,0 +1,216 @@
+from typing import Any, cast
+
+from qbittorrentapi import TorrentState
+
+from pt_repost.const import DEFAULT_REMOVED_MESSAGES, SSD_REMOVED_MESSAGE
+from pt_repost.qb import (
+    Qb,
+    QbFile,
+    QbMirror,
+    TrackerCache,
+    header_ready,
+    main_video_file,
+    main_video_index,
+    removed_messages,
+)
+from pt_repost.torrent import File, TorrentInfo
+
+
+def torrent(**kwargs: Any) -> dict[str, Any]:
+    return {
+        "name": "a",
+        "state": "downloading",
+        "category": "pt-repost",
+        "save_path": "/downloads",
+        "completed": 0,
+        "uploaded": 0,
+        "total_size": 100,
+        "size": 100,
+        "amount_left": 100,
+        "num_seeds": 1,
+        "eta": 10,
+    } | kwargs
+
+
+def test_apply_delta() -> None:
+    m = QbMirror(cast(Any, None))
+    m.apply(
+        {
+            "rid": 1,
+            "full_update": True,
+            "torrents": {"a": torrent(), "b": torrent(name="b", category="")},
+            "server_state": {"free_space_on_disk": 1000, "dl_info_speed": 10},
+        }
+    )
+
+    assert [t.hash for t in m.torrents(category="pt-repost")] == ["a"]
+    assert not m.seeding()
+
+    # only changed fields
+    m.apply(
+        {
+            "rid": 2,
+            "torrents": {"a": {"state": "uploading", "completed": 100}},
+            "torrents_removed": ["b"],
+            "server_state": {"dl_info_speed": 0},
+        }
+    )
+
+    a = m.get("a")
+    assert a is not None
+    assert a.state == TorrentState.UPLOADING
+    assert a.completed == 100
+    assert a.total_size == 100
+    assert m.get("b") is None
+    assert [t.hash for t in m.seeding()] == ["a"]
+    assert m.server_state == {"free_space_on_disk": 1000, "dl_info_speed": 0}
+
+    m.apply({"rid": 3, "full_update": True, "torrents": {"c": torrent()}})
+    assert [t.hash for t in m.torrents()] == ["c"]
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.msg = ""
+
+    def torrents_trackers(self, info_hash: str) -> list[dict[str, Any]]:
+        self.calls += 1
+        return [{"msg": "", "tier": -1}, {"msg": self.msg, "tier": 0}]
+
+
+def test_tracker_cache() -> None:
+    client = FakeClient()
+    cache = TrackerCache(cast(Any, client), ttl=100, jitter=0)
+    m = QbMirror(cast(Any, None))
+    m.apply({"rid": 1, "torrents": {"a": torrent(tracker="https://t/announce")}})
+    a = m.get("a")
+    assert a is not None
+
+    assert cache.messages(a, now=0) == ("",)
+    client.msg = "Torrent not registered with this tracker"
+    assert cache.messages(a, now=50) == ("",)
+    assert client.calls == 1
+
+    # tracker stopped working
+    m.apply({"rid": 2, "torrents": {"a": {"tracker": ""}}})
+    a = m.get("a")
+    assert a is not None
+    assert cache.messages(a, now=60) == ("Torrent not registered with this tracker",)
+    assert client.calls == 2
+
+    assert cache.messages(a, now=170)
+    assert client.calls == 3
+
+    cache.retain([])
+    cache.messages(a, now=171)
+    assert client.calls == 4
+
+
+def test_room() -> None:
+    m = QbMirror(cast(Any, None))
+    m.apply(
+        {
+            "rid": 1,
+            "torrents": {"a": torrent(amount_left=30)},
+            "server_state": {"free_space_on_disk": 1000},
+        }
+    )
+
+    def qb(max_processing_size: int) -> Qb:
+        return Qb(
+            name="qb",
+            save_path="",
+            disk="127.0.0.1:",
+            max_processing_size=max_processing_size,
+            client=cast(Any, None),
+            state=m,
+            trackers=cast(Any, None),
+        )
+
+    processing = [("a", 100), ("b", 200)]
+    assert qb(500).room(processing) == 200
+    # b is not synced yet
+    assert qb(0).room(processing) == 1000 - 30 - 200
+
+
+def test_header_ready() -> None:
+    # file in piece 2..7
+    states = [0, 0, 2, 2, 1, 0, 2, 2, 0]
+    assert header_ready(states, (2, 7), pieces=2)
+    assert not header_ready(states, (2, 7), pieces=3)
+    assert header_ready([2], (0, 0), pieces=4)
+
+
+def test_main_video_file() -> None:
+    files = [
+        QbFile(index=0, name="a/a.nfo", size=300, priority=1, progress=0),
+        QbFile(index=1, name="a/a.S01E01.mkv", size=100, priority=1, progress=0),
+        QbFile(index=2, name="a/a.S01E02.MKV", size=200, priority=1, progress=0),
+    ]
+    video = main_video_file(files)
+    assert video is not None
+    assert video.index == 2
+    assert main_video_file(files[:1]) is None
+
+
+def test_progress() -> None:
+    m = QbMirror(cast(Any, None))
+    m.apply(
+        {
+            "rid": 1,
+            "full_update": True,
+            # `progress` of qBittorrent is ignored
+            "torrents": {
+                "a": torrent(completed=25, progress=0.3),
+                "b": torrent(total_size=0, size=0, amount_left=0),
+            },
+        }
+    )
+
+    a, b = m.get("a"), m.get("b")
+    assert a is not None and b is not None
+    assert a.progress == 0.25
+    # metadata not downloaded yet
+    assert b.progress == 0
+
+
+def test_main_video_index() -> None:
+    info = TorrentInfo(
+        name="a",
+        pieces=b"",
+        piece_length=16384,
+        files=(
+            File(length=300, path=("a.nfo",)),
+            File(length=100, path=("sample.mkv",)),
+            File(length=200, path=("a.mkv",)),
+            File(length=200, path=("b.mkv",)),
+        ),
+    )
+    assert main_video_index(info) == 2
+
+    single = TorrentInfo(name="a.mp4", pieces=b"", piece_length=16384, length=100, files=())
+    assert main_video_index(single) == 0
+
+
+def test_main_video_index_pad_files() -> None:
+    info = TorrentInfo(
+        name="a",
+        pieces=b"",
+        piece_length=16384,
+        files=(
+            File(length=300, path=("a.nfo",)),
+            File(length=16084, path=(".pad", "16084"), attr="p"),
+            File(length=100, path=("sample.mkv",)),
+            File(length=16284, path=(".pad", "16284")),
+            File(length=200, path=("a.mkv",)),
+            File(length=100, path=("_____padding_file_0_",)),
+        ),
+    )
+    assert main_video_index(info) == 2
+
+
+def test_removed_messages() -> None:
+    assert removed_messages("SSD") == removed_messages("ssd") == {SSD_REMOVED_MESSAGE}
+    # unknown target website falls back to default
+    assert removed_messages("unknown") == DEFAULT_REMOVED_MESSAGES
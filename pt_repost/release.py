@@ -0,0 +1,39 @@
+"""
+release key to detect same release from different websites or rss.
+
+titles of same release differ in separators and a few spellings,
+`The.Show.S01E01.1080p.NF.WEB-DL.DD+5.1.H.264-Group` and
+`The Show S01E01 1080p NF WEB-DL DDP 5.1 H.264-Group` have same key.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Final
+
+# tags added by website, like `[FREE]` or `[中字]`
+pattern_bracket: Final = re.compile(r"\[[^\]]*\]|【[^】]*】")
+pattern_non_word: Final = re.compile(r"[\W_]+")
+
+_aliases: Final = [
+    (re.compile(r"dd\+", re.IGNORECASE), "ddp"),
+    (re.compile(r"\bweb[\W_]?dl\b", re.IGNORECASE), "webdl"),
+    (re.compile(r"\bweb[\W_]?rip\b", re.IGNORECASE), "webrip"),
+    (re.compile(r"\bblu[\W_]?ray\b", re.IGNORECASE), "bluray"),
+]
+
+
+def release_key(title: str) -> str:
+    key = unicodedata.normalize("NFKC", title)
+    key = pattern_bracket.sub(" ", key)
+    for pattern, repl in _aliases:
+        key = pattern.sub(repl, key)
+    return pattern_non_word.sub("", key).lower()
+
+
+def same_size(a: int, b: int) -> bool:
+    """size in rss may be rounded by website, unknown size (0) matches any size"""
+    if not a or not b:
+        return True
+    return abs(a - b) <= max(a, b) // 100
@@ -0,0 +1,21 @@
+from pt_repost.release import release_key, same_size
+
+
+def test_release_key() -> None:
+    assert release_key("The.Show.S01E01.1080p.NF.WEB-DL.DD+5.1.H.264-Group") == release_key(
+        "The Show S01E01 1080p NF WEBDL DDP 5.1 H.264-Group [FREE]"
+    )
+    assert release_key("Ｔｈｅ Show 2024 2160p WEB-DL") == release_key("the.show.2024.2160p.web-dl")
+
+    assert release_key("The.Show.S01E01.1080p.NF.WEB-DL.H.264-Group") != release_key(
+        "The.Show.S01E02.1080p.NF.WEB-DL.H.264-Group"
+    )
+    assert release_key("Movie 2024 1080p WEB-DL H.264-A") != release_key(
+        "Movie 2024 1080p WEB-DL H.264-B"
+    )
+
+
+def test_same_size() -> None:
+    assert same_size(0, 100)
+    assert same_size(10_000, 10_050)
+    assert not same_size(10_000, 12_000)
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import re
+from collections.abc import Generator, Iterable, Iterator
+from datetime import datetime
+from email.utils import parsedate_to_datetime as _parsedate_to_datetime
+from typing import Any, cast
+from xml.etree import ElementTree
+
+import httpx
+import xxhash
+
+from pt_repost.const import (
+    FETCH_RESULT_NOT_MODIFIED,
+    FETCH_RESULT_UNCHANGED,
+    FETCH_RESULT_UPDATED,
+)
+from pt_repost.filters import TitleFilter
+from pt_repost.release import release_key
+from pt_repost.snapshot import FeedRecorder, Recording
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class RssItem:
+    title: str
+    guid: str
+    link: str
+    size: int
+    description: str = ""
+    pub_date: datetime | None = None
+
+    imdb_id: str | None = None
+    douban_id: str | None = None
+
+    # torznab attributes, None if missing in feed
+    info_hash: str | None = None
+    files: int | None = None
+    seeders: int | None = None
+    grabs: int | None = None
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class Watermark:
+    """newest item of a feed we have already ingested"""
+
+    pub_date: datetime
+    guid: str
+
+    def reached(self, item: RssItem) -> bool:
+        if item.guid == self.guid:
+            return True
+        if item.pub_date is None:
+            return False
+        return item.pub_date < self.pub_date
+
+    @classmethod
+    def of(cls, items: Iterable[RssItem]) -> Watermark | None:
+        newest = max(
+            (item for item in items if item.pub_date is not None),
+            key=lambda item: item.pub_date,  # type: ignore[arg-type,return-value]
+            default=None,
+        )
+        if newest is None:
+            return None
+
+        assert newest.pub_date is not None
+        return cls(pub_date=newest.pub_date, guid=newest.guid)
+
+
+def iter_rss_items(
+    chunks: Iterable[bytes],
+    watermark: Watermark | None = None,
+) -> Iterator[RssItem]:
+    """
+    parse rss `channel/item` incrementally.
+
+    parsed item elements are removed from the tree, so memory usage doesn't grow with feed size.
+
+    feed are expected to be newest-first,
+    stop as soon as an item at or below watermark is found.
+    """
+    parser: ElementTree.XMLPullParser[ElementTree.Element] = ElementTree.XMLPullParser(
+        events=("start", "end")
+    )
+    stack: list[ElementTree.Element] = []
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        # we only subscribe to "start" and "end" events, which are all elements.
+        for event, el in cast(Iterator[tuple[str, ElementTree.Element]], parser.read_events()):
+            if event == "start":
+                stack.append(el)
+                continue
+
+            stack.pop()
+
+            # only `rss/channel/item`
+            if el.tag != "item" or len(stack) != 2 or stack[-1].tag != "channel":
+                continue
+
+            item = parse_rss_item(el)
+            stack[-1].remove(el)
+
+            if watermark is not None and watermark.reached(item):
+                return
+
+            yield item
+
+    parser.close()
+
+
+def rss_item_columns(items: list[RssItem], global_filter: TitleFilter) -> list[list[Any]]:
+    """
+    transpose items to column arrays for `unnest`,
+    with verdict of global filter and release key as last columns.
+
+    items with duplicated guid are dropped,
+    postgres doesn't allow a single `insert ... on conflict` to affect same row twice.
+    """
+    unique: dict[str, RssItem] = {}
+    for item in items:
+        unique.setdefault(item.guid, item)
+
+    now = datetime.now().astimezone()
+
+    values = list(unique.values())
+
+    return [
+        [item.guid for item in values],
+        [item.link for item in values],
+        [item.title for item in values],
+        [item.pub_date or now for item in values],
+        [item.size for item in values],
+        [item.imdb_id or "" for item in values],
+        [item.douban_id or "" for item in values],
+        [item.info_hash or "" for item in values],
+        [item.files for item in values],
+        [item.seeders for item in values],
+        [item.grabs for item in values],
+        [global_filter.match(item.title) for item in values],
+        [release_key(item.title) for item in values],
+    ]
+
+
+def parsedate_to_datetime(s: str | None) -> datetime:
+    assert s, "empty pubDate"
+    dt: datetime | None = _parsedate_to_datetime(s)
+    if dt is None:
+        raise ValueError(f"failed to parse pubDate as datetime {s}")
+    return dt
+
+
+pattern_douban_url = re.compile(r"https://movie\.douban\.com/subject/(\d+)/?")
+pattern_info_hash = re.compile(r"[0-9a-f]{40}")
+
+TORZNAB_ATTR = "{http://torznab.com/schemas/2015/feed}attr"
+
+
+def parse_rss_item(item: ElementTree.Element) -> RssItem:
+    title = item.findtext("./title")
+    assert title
+
+    enclosure = item.find("./enclosure")
+    assert enclosure is not None, "missing enclosure item"
+    url = enclosure.attrib["url"]
+    assert url
+
+    guid = item.findtext("./guid")
+    assert guid
+
+    attrs = {
+        el.attrib.get("name", ""): el.attrib.get("value", "")
+        for el in item.iterfind("./" + TORZNAB_ATTR)
+    }
+
+    description = item.findtext("./description") or ""
+
+    douban_id = None
+    if description:
+        m = pattern_douban_url.search(description)
+        if m:
+            douban_id = m.group(1)
+
+    pub_date = parsedate_to_datetime(item.findtext("pubDate"))
+
+    # some indexers set enclosure length to 0, torznab size is the real torrent size.
+    size = _int_attr(attrs, "size") or int(enclosure.attrib.get("length", 0))
+
+    info_hash = attrs.get("infohash", "").lower()
+
+    return RssItem(
+        title=title.strip(),
+        guid=guid,
+        link=url,
+        pub_date=pub_date,
+        description=description,
+        size=size,
+        douban_id=douban_id,
+        imdb_id=_imdb_id(attrs),
+        info_hash=info_hash if pattern_info_hash.fullmatch(info_hash) else None,
+        files=_int_attr(attrs, "files"),
+        seeders=_int_attr(attrs, "seeders"),
+        grabs=_int_attr(attrs, "grabs"),
+    )
+
+
+def _int_attr(attrs: dict[str, str], name: str) -> int | None:
+    try:
+        return int(attrs[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def _imdb_id(attrs: dict[str, str]) -> str | None:
+    """torznab `imdb` is numeric part only, `imdbid` has `tt` prefix"""
+    if value := attrs.get("imdbid"):
+        return value
+
+    value = attrs.get("imdb", "")
+    if not value.isdigit() or int(value) == 0:
+        return None
+
+    return "tt" + value.rjust(7, "0")
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class FeedValidators:
+    etag: str = ""
+    last_modified: str = ""
+    body_hash: str = ""
+
+
+class FeedResponse:
+    def __init__(
+        self,
+        res: httpx.Response,
+        validators: FeedValidators,
+        recording: Recording | None = None,
+    ):
+        self.not_modified: bool = res.status_code == 304
+        self.__res = res
+        self.__previous = validators
+        self.__chunks = res.iter_bytes()
+        self.__hash = xxhash.xxh3_128()
+        self.__recording = recording
+
+    def iter_bytes(self) -> Iterator[bytes]:
+        for chunk in self.__chunks:
+            self.__consume(chunk)
+            yield chunk
+
+    def __consume(self, chunk: bytes) -> None:
+        self.__hash.update(chunk)
+        if self.__recording is not None:
+            self.__recording.write(chunk)
+
+    def finish(self) -> tuple[str, FeedValidators]:
+        """
+        read rest of the body, return fetch result and validators for next fetch.
+
+        body hash is used as fallback for servers which don't support ETag or Last-Modified.
+        it's only known after the body is read, so an unchanged body is still parsed,
+        parsing stops at watermark and the rest of the body is only hashed.
+        """
+        if self.not_modified:
+            return FETCH_RESULT_NOT_MODIFIED, self.__previous
+
+        for chunk in self.__chunks:
+            self.__consume(chunk)
+
+        if self.__recording is not None:
+            self.__recording.close()
+
+        current = FeedValidators(
+            etag=self.__res.headers.get("etag", ""),
+            last_modified=self.__res.headers.get("last-modified", ""),
+            body_hash=self.__hash.hexdigest(),
+        )
+
+        if self.__previous.body_hash and self.__previous.body_hash == current.body_hash:
+            return FETCH_RESULT_UNCHANGED, current
+
+        return FETCH_RESULT_UPDATED, current
+
+
+@contextlib.contextmanager
+def open_feed(
+    url: str,
+    validators: FeedValidators,
+    proxy: str | None = None,
+    recorder: FeedRecorder | None = None,
+    transport: httpx.BaseTransport | None = None,
+) -> Generator[FeedResponse, None, None]:
+    """
+    conditional GET with validators from last fetch, body is streamed.
+
+    full body is saved as a snapshot if recorder is set.
+    `transport` is only used by tests.
+    """
+    headers = {}
+    if validators.etag:
+        headers["if-none-match"] = validators.etag
+    if validators.last_modified:
+        headers["if-modified-since"] = validators.last_modified
+
+    with (
+        httpx.Client(timeout=30, proxy=proxy, transport=transport) as client,
+        client.stream("GET", url, headers=headers) as res,
+    ):
+        if res.status_code != 304:
+            res.raise_for_status()
+
+        recording = None
+        if recorder is not None and res.status_code != 304:
+            recording = recorder.open(url, res)
+
+        try:
+            yield FeedResponse(res, validators, recording)
+        finally:
+            # recording is closed by `FeedResponse.finish`, unless parsing or ingest raised
+            if recording is not None:
+                recording.discard()
+
+
+TORZNAB_RESPONSE = (
+    "{http://torznab.com/schemas/2015/feed}response",
+    "{http://www.newznab.com/DTD/2010/feeds/attributes/}response",
+)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class TorznabPage:
+    offset: int
+    items: list[RssItem]
+    # `torznab:response@total`, None if indexer doesn't report it
+    total: int | None = None
+
+    @property
+    def last(self) -> bool:
+        """
+        indexers may cap `limit` below the requested page size,
+        so only an empty page or reaching reported total is the end.
+        """
+        if not self.items:
+            return True
+        return self.total is not None and self.offset + len(self.items) >= self.total
+
+
+def fetch_torznab_page(
+    url: str,
+    offset: int,
+    limit: int,
+    proxy: str | None = None,
+    transport: httpx.BaseTransport | None = None,
+) -> TorznabPage:
+    """
+    fetch a page of torznab search result with offset/limit.
+
+    `transport` is only used by tests.
+    """
+    with httpx.Client(timeout=60, proxy=proxy, transport=transport) as client:
+        res = client.get(url, params={"offset": offset, "limit": limit})
+        res.raise_for_status()
+
+    total = None
+    channel = ElementTree.fromstring(res.content).find("./channel")
+    if channel is not None:
+        for tag in TORZNAB_RESPONSE:
+            el = channel.find("./" + tag)
+            if el is not None:
+                total = _int_attr(dict(el.attrib), "total")
+                break
+
+    return TorznabPage(offset=offset, items=list(iter_rss_items([res.content])), total=total)
@@ -0,0 +1,287 @@
+import dataclasses
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+
+from pt_repost.const import FETCH_RESULT_NOT_MODIFIED, FETCH_RESULT_UNCHANGED, FETCH_RESULT_UPDATED
+from pt_repost.filters import FilterRules, compile_filter
+from pt_repost.release import release_key
+from pt_repost.rss import (
+    FeedValidators,
+    Watermark,
+    fetch_torznab_page,
+    iter_rss_items,
+    open_feed,
+    rss_item_columns,
+)
+from pt_repost.snapshot import FeedRecorder, load_snapshots
+
+feed = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
+<channel>
+<title>test</title>
+<item>
+  <title>Show S01E03 2160p WEB-DL H265 AAC-Group</title>
+  <guid>3</guid>
+  <pubDate>Wed, 01 Jan 2025 03:00:00 +0000</pubDate>
+  <enclosure url="https://example.com/3.torrent" length="300" type="application/x-bittorrent"/>
+</item>
+<item>
+  <title>Show S01E02 2160p WEB-DL H265 AAC-Group</title>
+  <guid>2</guid>
+  <pubDate>Wed, 01 Jan 2025 02:00:00 +0000</pubDate>
+  <enclosure url="https://example.com/2.torrent" length="200" type="application/x-bittorrent"/>
+</item>
+<item>
+  <title>Show S01E01 2160p WEB-DL H265 AAC-Group</title>
+  <guid>1</guid>
+  <pubDate>Wed, 01 Jan 2025 01:00:00 +0000</pubDate>
+  <enclosure url="https://example.com/1.torrent" length="100" type="application/x-bittorrent"/>
+</item>
+</channel>
+</rss>
+"""
+
+
+def chunked(b: bytes, size: int = 7) -> list[bytes]:
+    return [b[i : i + size] for i in range(0, len(b), size)]
+
+
+def test_iter_rss_items() -> None:
+    items = list(iter_rss_items(chunked(feed)))
+
+    assert [item.guid for item in items] == ["3", "2", "1"]
+    assert items[0].size == 300
+    assert items[0].title == "Show S01E03 2160p WEB-DL H265 AAC-Group"
+
+
+def test_iter_rss_items_stop_at_watermark() -> None:
+    by_guid = Watermark(pub_date=datetime(2025, 1, 1, 2, tzinfo=timezone.utc), guid="2")
+    assert [item.guid for item in iter_rss_items(chunked(feed), by_guid)] == ["3"]
+
+    by_pub_date = Watermark(pub_date=datetime(2025, 1, 1, 2, 30, tzinfo=timezone.utc), guid="x")
+    assert [item.guid for item in iter_rss_items(chunked(feed), by_pub_date)] == ["3"]
+
+
+def test_rss_item_columns() -> None:
+    items = list(iter_rss_items([feed]))
+    title_filter = compile_filter(FilterRules.new(global_excludes=["E02"]))
+
+    # same guid in a feed can't be inserted twice in one statement, first one is kept
+    duplicated = dataclasses.replace(items[0], title="duplicated")
+    columns = rss_item_columns([*items, duplicated], title_filter)
+
+    assert len(columns) == 13
+    assert all(len(column) == 3 for column in columns)
+    guid, _, title, *_, passed, key = columns
+    assert guid == ["3", "2", "1"]
+    assert title[0] == items[0].title
+    assert passed == [True, False, True]
+    assert key == [release_key(item.title) for item in items]
+
+
+def test_watermark_of() -> None:
+    items = list(iter_rss_items([feed]))
+
+    assert Watermark.of(items) == Watermark(
+        pub_date=datetime(2025, 1, 1, 3, tzinfo=timezone.utc), guid="3"
+    )
+    assert Watermark.of([]) is None
+
+
+def test_parse_torznab_attrs() -> None:
+    torznab = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
+<channel>
+<item>
+  <title>Some Movie 2024 1080p WEB-DL H264-Group</title>
+  <guid>1</guid>
+  <pubDate>Wed, 01 Jan 2025 01:00:00 +0000</pubDate>
+  <enclosure url="https://example.com/1.torrent" length="0" type="application/x-bittorrent"/>
+  <torznab:attr name="imdb" value="123456"/>
+  <torznab:attr name="infohash" value="0123456789ABCDEF0123456789ABCDEF01234567"/>
+  <torznab:attr name="size" value="1000"/>
+  <torznab:attr name="files" value="3"/>
+  <torznab:attr name="seeders" value="10"/>
+  <torznab:attr name="grabs" value="bad"/>
+</item>
+</channel>
+</rss>
+"""
+    (item,) = iter_rss_items([torznab])
+
+    assert item.imdb_id == "tt0123456"
+    assert item.info_hash == "0123456789abcdef0123456789abcdef01234567"
+    assert item.size == 1000
+    assert item.files == 3
+    assert item.seeders == 10
+    assert item.grabs is None
+
+    plain = next(iter_rss_items([feed]))
+    assert plain.imdb_id is None
+    assert plain.info_hash is None
+    assert plain.seeders is None
+
+
+def feed_server(requests: list[httpx.Request]) -> httpx.MockTransport:
+    """304 if etag matches, body without etag otherwise"""
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        requests.append(req)
+        if req.headers.get("if-none-match") == '"1"':
+            return httpx.Response(304)
+        if req.url.path == "/etag":
+            return httpx.Response(200, headers={"etag": '"1"'}, content=feed)
+        return httpx.Response(200, content=feed)
+
+    return httpx.MockTransport(handler)
+
+
+def test_open_feed_not_modified() -> None:
+    requests: list[httpx.Request] = []
+    transport = feed_server(requests)
+    url = "https://example.com/etag"
+
+    with open_feed(url, FeedValidators(), transport=transport) as res:
+        assert not res.not_modified
+        assert len(list(iter_rss_items(res.iter_bytes()))) == 3
+        result, validators = res.finish()
+    assert result == FETCH_RESULT_UPDATED
+    assert validators.etag == '"1"'
+
+    with open_feed(url, validators, transport=transport) as res:
+        assert res.not_modified
+        result, next_validators = res.finish()
+    assert result == FETCH_RESULT_NOT_MODIFIED
+    assert next_validators == validators
+    assert requests[-1].headers["if-none-match"] == '"1"'
+
+
+def test_open_feed_unchanged() -> None:
+    transport = feed_server([])
+    url = "https://example.com/rss"
+
+    with open_feed(url, FeedValidators(), transport=transport) as res:
+        result, validators = res.finish()
+    assert result == FETCH_RESULT_UPDATED
+    assert validators.body_hash
+
+    # body is fully hashed, even if parsing stopped at watermark
+    watermark = Watermark(pub_date=datetime(2025, 1, 1, 3, tzinfo=timezone.utc), guid="3")
+    with open_feed(url, validators, transport=transport) as res:
+        assert list(iter_rss_items(res.iter_bytes(), watermark)) == []
+        result, next_validators = res.finish()
+    assert result == FETCH_RESULT_UNCHANGED
+    assert next_validators == validators
+
+
+def test_open_feed_last_modified() -> None:
+    last_modified = "Wed, 01 Jan 2025 03:00:00 GMT"
+    requests: list[httpx.Request] = []
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        requests.append(req)
+        if req.headers.get("if-modified-since") == last_modified:
+            return httpx.Response(304)
+        return httpx.Response(200, headers={"last-modified": last_modified}, content=feed)
+
+    transport = httpx.MockTransport(handler)
+    url = "https://example.com/rss"
+
+    with open_feed(url, FeedValidators(), transport=transport) as res:
+        result, validators = res.finish()
+    assert result == FETCH_RESULT_UPDATED
+    assert validators.last_modified == last_modified
+    assert "if-modified-since" not in requests[0].headers
+
+    with open_feed(url, validators, transport=transport) as res:
+        assert res.not_modified
+        result, _ = res.finish()
+    assert result == FETCH_RESULT_NOT_MODIFIED
+    assert "if-none-match" not in requests[1].headers
+
+
+def test_open_feed_body_changed() -> None:
+    # body hash of another body, feed without etag or last-modified is fetched and parsed again
+    previous = FeedValidators(body_hash="0" * 32)
+
+    with open_feed("https://example.com/rss", previous, transport=feed_server([])) as res:
+        assert len(list(iter_rss_items(res.iter_bytes()))) == 3
+        result, validators = res.finish()
+    assert result == FETCH_RESULT_UPDATED
+    assert validators.body_hash != previous.body_hash
+
+
+def test_open_feed_discard_recording(tmp_path: Path) -> None:
+    recorder = FeedRecorder(tmp_path)
+    transport = feed_server([])
+
+    def ingest() -> None:
+        with open_feed(
+            "https://example.com/rss", FeedValidators(), recorder=recorder, transport=transport
+        ) as res:
+            next(res.iter_bytes())
+            raise ValueError("ingest failed")
+
+    with pytest.raises(ValueError, match="ingest failed"):
+        ingest()
+
+    assert not load_snapshots(tmp_path)
+    assert not list(tmp_path.rglob("*.xml"))
+
+    with open_feed(
+        "https://example.com/rss", FeedValidators(), recorder=recorder, transport=transport
+    ) as res:
+        res.finish()
+
+    (snapshot,) = load_snapshots(tmp_path)
+    assert snapshot.read_body() == feed
+
+
+def torznab_server(count: int, cap: int, *, total: bool) -> httpx.MockTransport:
+    """search result of `count` items, `limit` is capped at `cap` like some indexers do"""
+
+    def handler(req: httpx.Request) -> httpx.Response:
+        offset = int(req.url.params["offset"])
+        limit = min(int(req.url.params["limit"]), cap)
+        items = "".join(
+            f"""<item>
+  <title>Show S01E{i:02d} 2160p WEB-DL H265 AAC-Group</title>
+  <guid>{i}</guid>
+  <pubDate>Wed, 01 Jan 2025 01:00:00 +0000</pubDate>
+  <enclosure url="https://example.com/{i}.torrent" length="100" type="application/x-bittorrent"/>
+</item>"""
+            for i in range(offset, min(offset + limit, count))
+        )
+        response = f'<torznab:response offset="{offset}" total="{count}"/>' if total else ""
+        return httpx.Response(
+            200,
+            content=f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:torznab="http://torznab.com/schemas/2015/feed">
+<channel>{response}{items}</channel>
+</rss>""".encode(),
+        )
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.parametrize("total", [True, False])
+def test_fetch_torznab_page_capped_limit(total: bool) -> None:
+    transport = torznab_server(5, cap=2, total=total)
+    url = "https://example.com/api?t=search&limit=1"
+
+    guids: list[str] = []
+    offset = 0
+    while True:
+        page = fetch_torznab_page(url, offset, 100, transport=transport)
+        guids.extend(item.guid for item in page.items)
+        offset += len(page.items)
+        if page.last:
+            break
+
+    # short pages are not the end
+    assert guids == ["0", "1", "2", "3", "4"]
+    assert page.total == (5 if total else None)
+    assert bool(page.items) == total
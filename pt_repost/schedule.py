@@ -0,0 +1,115 @@
+import dataclasses
+from collections.abc import Sequence
+from datetime import datetime
+from typing import cast
+
+from pt_repost.const import TASK_STATUS_RUNNING
+from pt_repost.db import Connection
+
+
+def adaptive_interval(
+    runs: Sequence[tuple[datetime, int]],
+    current: int,
+    min_interval: int,
+    max_interval: int,
+) -> int:
+    """
+    interval to expect about one new item per poll, limited in [min_interval, max_interval].
+
+    runs: (created_at, new_items) of recent successful runs, newest first.
+    new items of a run are released between previous run and itself,
+    so new items of the oldest run is not counted.
+    """
+    if len(runs) < 2:
+        return current
+
+    span = (runs[0][0] - runs[-1][0]).total_seconds()
+    new_items = sum(n for _, n in runs[:-1])
+
+    if span <= 0:
+        return current
+
+    if new_items <= 0:
+        return max_interval
+
+    return int(min(max(span / new_items, min_interval), max_interval))
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class RssTask:
+    rss_id: int
+    run_id: int
+    url: str
+    exclude_url: str
+    website: str
+    includes: list[str | list[str]]
+    excludes: list[str]
+
+    adaptive: bool
+    min_interval: int
+    max_interval: int
+    # current effective interval
+    interval: int
+
+
+def claim_due_rss(conn: Connection, now: datetime, node_id: str) -> list[RssTask]:
+    """
+    claim all due rss in one statement, each claimed rss gets a running rss_run.
+
+    rss claimed by other nodes are locked and skipped.
+    """
+    rows = cast(
+        list[tuple[int, int, str, str, str, list[str | list[str]], list[str], bool, int, int, int]],
+        conn.fetch_all(
+            """
+            with due as (
+                select id from rss
+                where next_run_at <= $1
+                order by next_run_at
+                for update skip locked
+            ), run as (
+                insert into rss_run (rss_id, node_id, created_at, status)
+                select id, $2, $1, $3 from due
+                returning id, rss_id
+            )
+            update rss set
+                next_run_at = $1 + make_interval(secs => rss.effective_interval_seconds),
+                last_run_id = run.id
+            from run
+            where rss.id = run.rss_id
+            returning rss.id, run.id, rss.url, rss.exclude_url, rss.website, rss.includes, rss.excludes,
+                rss.adaptive, rss.min_interval_seconds, rss.max_interval_seconds,
+                rss.effective_interval_seconds
+            """,
+            [now, node_id, TASK_STATUS_RUNNING],
+        ),
+    )
+
+    return [
+        RssTask(
+            rss_id=rss_id,
+            run_id=run_id,
+            url=url,
+            exclude_url=exclude_url,
+            website=website,
+            includes=includes,
+            excludes=excludes,
+            adaptive=adaptive,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            interval=interval,
+        )
+        for (
+            rss_id,
+            run_id,
+            url,
+            exclude_url,
+            website,
+            includes,
+            excludes,
+            adaptive,
+            min_interval,
+            max_interval,
+            interval,
+        ) in rows
+    ]
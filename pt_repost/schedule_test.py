@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+
+from pt_repost.const import TASK_STATUS_RUNNING
+from pt_repost.db import Connection
+from pt_repost.schedule import adaptive_interval, claim_due_rss
+
+now = datetime(2025, 1, 1)
+
+
+def runs(*new_items: int, every: timedelta = timedelta(minutes=30)) -> list[tuple[datetime, int]]:
+    return [(now - every * i, n) for i, n in enumerate(new_items)]
+
+
+def test_adaptive_interval() -> None:
+    # not enough history
+    assert adaptive_interval(runs(3), 1800, 300, 7200) == 1800
+
+    # quiet rss
+    assert adaptive_interval(runs(0, 0, 0, 5), 1800, 300, 7200) == 7200
+
+    # 1 item per hour
+    assert adaptive_interval(runs(1, 0, 1, 0, 0), 1800, 300, 7200) == 3600
+
+    # busy rss
+    assert adaptive_interval(runs(10, 10, 10), 1800, 300, 7200) == 300
+
+
+def insert_rss(conn: Connection, website: str, next_run_at: datetime) -> int:
+    return conn.fetch_val(
+        """
+        insert into rss (url, website, includes, excludes, next_run_at)
+        values ($1, $2, '[]', '[]', $3)
+        returning id
+        """,
+        [f"https://{website}/rss", website, next_run_at],
+    )
+
+
+def test_claim_due_rss(conn: Connection) -> None:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    due = {
+        insert_rss(conn, "a", datetime.min.replace(tzinfo=timezone.utc)),
+        insert_rss(conn, "b", now - timedelta(minutes=1)),
+    }
+    insert_rss(conn, "c", now + timedelta(minutes=1))
+
+    # all due rss are claimed in one tick, each with its own run
+    tasks = claim_due_rss(conn, now, "node")
+    assert {t.rss_id for t in tasks} == due
+    assert len({t.run_id for t in tasks}) == 2
+
+    runs = conn.fetch_all("select rss_id, node_id, status from rss_run order by rss_id")
+    assert runs == [(rss_id, "node", TASK_STATUS_RUNNING) for rss_id in sorted(due)]
+
+
+def test_claim_due_rss_next_run_at(conn: Connection) -> None:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rss_id = insert_rss(conn, "a", now)
+    conn.execute("update rss set effective_interval_seconds = 600 where id = $1", [rss_id])
+
+    (task,) = claim_due_rss(conn, now, "node")
+    assert task.interval == 600
+
+    # claimed rss is scheduled by its interval, no history of rss_run is scanned
+    row = conn.fetch_one("select next_run_at, last_run_id from rss where id = $1", [rss_id])
+    assert row == (now + timedelta(seconds=600), task.run_id)
+
+    assert claim_due_rss(conn, now + timedelta(seconds=599), "node") == []
+    assert [t.rss_id for t in claim_due_rss(conn, now + timedelta(seconds=600), "node")] == [rss_id]
@@ -0,0 +1,71 @@
+import collections
+import dataclasses
+import threading
+from collections.abc import Iterable
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class SeenCacheStats:
+    size: int
+    capacity: int
+    hits: int
+    misses: int
+    # missed items which are already in database, cache is too small if this keep growing
+    known_misses: int
+
+
+class SeenCache:
+    """
+    bounded LRU set of (guid, website) which are already stored in `rss_item`.
+
+    it's exact, an item is never reported as seen unless it has been added,
+    so there is no false positive, only misses of evicted items.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.__keys: collections.OrderedDict[tuple[str, str], None] = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__known_misses = 0
+
+    def unseen(self, website: str, guids: Iterable[str]) -> set[str]:
+        result = set()
+        with self.__lock:
+            for guid in guids:
+                key = (guid, website)
+                if key in self.__keys:
+                    self.__keys.move_to_end(key)
+                    self.__hits += 1
+                else:
+                    self.__misses += 1
+                    result.add(guid)
+
+        return result
+
+    def add(self, website: str, guids: Iterable[str]) -> None:
+        if self.capacity <= 0:
+            return
+
+        with self.__lock:
+            for guid in guids:
+                self.__keys[(guid, website)] = None
+                self.__keys.move_to_end((guid, website))
+
+            while len(self.__keys) > self.capacity:
+                self.__keys.popitem(last=False)
+
+    def record_known_misses(self, count: int) -> None:
+        with self.__lock:
+            self.__known_misses += count
+
+    def stats(self) -> SeenCacheStats:
+        with self.__lock:
+            return SeenCacheStats(
+                size=len(self.__keys),
+                capacity=self.capacity,
+                hits=self.__hits,
+                misses=self.__misses,
+                known_misses=self.__known_misses,
+            )
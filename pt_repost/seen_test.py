@@ -0,0 +1,21 @@
+from pt_repost.seen import SeenCache
+
+
+def test_seen_cache() -> None:
+    cache = SeenCache(capacity=2)
+
+    assert cache.unseen("a", ["1", "2"]) == {"1", "2"}
+    cache.add("a", ["1", "2"])
+
+    assert cache.unseen("a", ["1", "2", "3"]) == {"3"}
+    assert cache.unseen("b", ["1"]) == {"1"}
+
+    # "1" is used most recently, "2" is evicted
+    cache.unseen("a", ["1"])
+    cache.add("a", ["3"])
+    assert cache.unseen("a", ["1", "2", "3"]) == {"2"}
+
+    stats = cache.stats()
+    assert stats.size == 2
+    assert stats.hits == 5
+    assert stats.misses == 5
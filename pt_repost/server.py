@@ -1,3 +1,4 @@
+import secrets
 from collections.abc import Mapping
 from contextlib import asynccontextmanager
 from pathlib import Path
@@ -6,12 +7,12 @@ from typing import Annotated, Any, AsyncGenerator, Protocol
 import asyncpg
 import fastapi
 import orjson
-from fastapi import Depends, Request
+from fastapi import Depends, Header, HTTPException, Request
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse, JSONResponse
 
 from pt_repost.config import load_config
-from pt_repost.const import RSS_ITEM_STATUS_SKIPPED
+from pt_repost.const import NOTIFY_CHANNEL_TORRENT_FINISHED, RSS_ITEM_STATUS_SKIPPED
 
 
 class ORJSONResponse(JSONResponse):
@@ -80,6 +81,23 @@ def create_app(config_file: str | None) -> fastapi.FastAPI:
             ctx={"torrents": torrents},
         )
 
+    async def torrent_finished(
+        info_hash: str, authorization: Annotated[str, Header()] = ""
+    ) -> dict[str, Any]:
+        """same as `notify` command, for webhook. disabled without `notify-token`"""
+        if not cfg.notify_token or not secrets.compare_digest(
+            authorization, f"Bearer {cfg.notify_token}"
+        ):
+            raise HTTPException(403)
+
+        await pool.execute(
+            "select pg_notify($1, $2)", NOTIFY_CHANNEL_TORRENT_FINISHED, info_hash.lower()
+        )
+        return {"ok": True}
+
+    # registered without decorator, handler stays typed even if fastapi is not
+    app.post("/api/torrent-finished/{info_hash}", response_class=ORJSONResponse)(torrent_finished)
+
     @app.get("/{website}/{guid}")
     async def rss_item(website: str, guid: str, render: Render) -> HTMLResponse:
         torrent = await pool.fetchrow(
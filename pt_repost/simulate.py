@@ -0,0 +1,88 @@
+"""
+simulate picking of a node with historical rss_item, to compare pick order.
+
+run with `python -m pt_repost.bench schedule`.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from collections import Counter
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+
+from pt_repost.picker import Scoring
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class SimItem:
+    website: str
+    released_at: datetime
+    priority: float = 0
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class SimResult:
+    processed: Counter[str]
+    # not picked before `released_at + window`
+    expired: Counter[str]
+
+
+def simulate(
+    items: Sequence[SimItem],
+    *,
+    scoring: Scoring | None,
+    slots: int,
+    processing: timedelta,
+    window: timedelta,
+    tick: timedelta = timedelta(minutes=1),
+) -> SimResult:
+    """
+    node can process `slots` items at same time, each item takes `processing`.
+
+    pending items are picked newest first if scoring is None, otherwise by score.
+    """
+    queue = sorted(items, key=lambda i: i.released_at)
+    result = SimResult(processed=Counter(), expired=Counter())
+    if not queue:
+        return result
+
+    now = queue[0].released_at
+    arrived = 0
+    pending: list[SimItem] = []
+    running: list[tuple[datetime, str]] = []
+
+    while arrived < len(queue) or pending:
+        running = [r for r in running if r[0] > now]
+
+        while arrived < len(queue) and queue[arrived].released_at <= now:
+            pending.append(queue[arrived])
+            arrived += 1
+
+        for item in pending:
+            if item.released_at + window < now:
+                result.expired[item.website] += 1
+        pending = [item for item in pending if item.released_at + window >= now]
+
+        while pending and len(running) < slots:
+            if scoring is None:
+                best = max(pending, key=lambda i: i.released_at)
+            else:
+                count = Counter(website for _, website in running)
+                best = max(
+                    pending,
+                    key=lambda i: scoring.score(
+                        website=i.website,
+                        priority=i.priority,
+                        released_at=i.released_at,
+                        now=now,
+                        processing=count,
+                    ),
+                )
+            pending.remove(best)
+            running.append((now + processing, best.website))
+            result.processed[best.website] += 1
+
+        now += tick
+
+    return result
@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+
+from pt_repost.picker import Scoring
+from pt_repost.simulate import SimItem, simulate
+
+
+def test_score_order_expire_less() -> None:
+    start = datetime(2025, 1, 1)
+
+    # website "a" floods 2 bursts, website "b" release an item every 10 minutes
+    items = [
+        SimItem(website="a", released_at=start + offset + timedelta(seconds=i))
+        for offset in [timedelta(0), timedelta(hours=3)]
+        for i in range(40)
+    ]
+    items.extend(
+        SimItem(website="b", released_at=start + timedelta(minutes=10 * i)) for i in range(36)
+    )
+
+    window = timedelta(hours=4)
+
+    def run(scoring: Scoring | None) -> int:
+        result = simulate(
+            items,
+            scoring=scoring,
+            slots=4,
+            processing=timedelta(minutes=30),
+            window=window,
+        )
+        assert result.processed.total() + result.expired.total() == len(items)
+        return result.expired.total()
+
+    newest = run(None)
+    scored = run(
+        Scoring(
+            website_weights={},
+            window=int(window.total_seconds()),
+            deadline_weight=1,
+        )
+    )
+
+    assert scored < newest
@@ -0,0 +1,144 @@
+"""
+feed snapshots, saved by recorder when fetching rss and used by `replay` command.
+
+layout: `{root}/{xxh3_64(url)}/{fetched_at}.json` for url, status and headers,
+and `{fetched_at}.xml` for raw body.
+
+credentials in url and headers are redacted, only newest snapshots of each feed are kept.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import re
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO
+
+import httpx
+import orjson
+import xxhash
+import yarl
+
+from pt_repost.const import FEED_SNAPSHOTS_PER_FEED
+
+# query parameters and headers may contain credentials, like passkey of private trackers
+pattern_credential = re.compile(r"key|pass|token|sign|auth|secret|uid|session|cookie", re.I)
+REDACTED = "***"
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True, slots=True)
+class Snapshot:
+    url: str
+    fetched_at: datetime
+    status_code: int
+    headers: dict[str, str]
+    body_path: Path
+
+    def read_body(self) -> bytes:
+        return self.body_path.read_bytes()
+
+    def iter_bytes(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        with self.body_path.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+class Recording:
+    """body of a response is written as it's streamed"""
+
+    def __init__(self, meta_path: Path, body_path: Path, meta: dict[str, object]):
+        self.__meta_path = meta_path
+        self.__meta = meta
+        self.__body_path = body_path
+        self.__body: IO[bytes] = body_path.open("wb")
+
+    def write(self, chunk: bytes) -> None:
+        self.__body.write(chunk)
+
+    def close(self) -> None:
+        if self.__body.closed:
+            return
+        self.__body.close()
+        # meta is written last, snapshot without meta is incomplete and ignored by replay.
+        self.__meta_path.write_bytes(orjson.dumps(self.__meta, option=orjson.OPT_INDENT_2))
+
+    def discard(self) -> None:
+        """drop body of a failed fetch, no-op if already closed"""
+        if self.__body.closed:
+            return
+        self.__body.close()
+        self.__body_path.unlink(missing_ok=True)
+
+
+def redact_url(url: str) -> str:
+    u = yarl.URL(url)
+    if u.user is not None or u.password is not None:
+        u = u.with_user(None)
+    if not u.query:
+        return str(u)
+    return str(
+        u.with_query(
+            [(k, REDACTED if pattern_credential.search(k) else v) for k, v in u.query.items()]
+        )
+    )
+
+
+def redact_headers(headers: httpx.Headers) -> dict[str, str]:
+    return {k: v for k, v in headers.items() if not pattern_credential.search(k)}
+
+
+class FeedRecorder:
+    def __init__(self, root: Path, keep: int = FEED_SNAPSHOTS_PER_FEED):
+        self.root = root
+        self.keep = keep
+
+    def open(self, url: str, res: httpx.Response) -> Recording:
+        fetched_at = datetime.now(tz=timezone.utc)
+        d = self.root.joinpath(xxhash.xxh3_64_hexdigest(url.encode()))
+        d.mkdir(parents=True, exist_ok=True)
+        self.__prune(d)
+
+        name = fetched_at.strftime("%Y%m%dT%H%M%S.%fZ")
+        return Recording(
+            meta_path=d.joinpath(name + ".json"),
+            body_path=d.joinpath(name + ".xml"),
+            meta={
+                "url": redact_url(url),
+                "fetched_at": fetched_at.isoformat(),
+                "status_code": res.status_code,
+                "headers": redact_headers(res.headers),
+            },
+        )
+
+    def __prune(self, d: Path) -> None:
+        """remove oldest snapshots of a feed, so there are at most `keep` with the new one"""
+        # names are fetch time, sorted by name is sorted by time
+        metas = sorted(d.glob("*.json"))
+        for meta_path in metas[: max(len(metas) - self.keep + 1, 0)]:
+            meta_path.with_suffix(".xml").unlink(missing_ok=True)
+            meta_path.unlink()
+
+
+def load_snapshots(root: Path) -> list[Snapshot]:
+    """all complete snapshots in directory, ordered by fetch time"""
+    snapshots = []
+    for meta_path in root.rglob("*.json"):
+        body_path = meta_path.with_suffix(".xml")
+        if not body_path.exists():
+            continue
+
+        meta = orjson.loads(meta_path.read_bytes())
+        snapshots.append(
+            Snapshot(
+                url=meta["url"],
+                fetched_at=datetime.fromisoformat(meta["fetched_at"]),
+                status_code=meta["status_code"],
+                headers=meta["headers"],
+                body_path=body_path,
+            )
+        )
+
+    snapshots.sort(key=lambda s: s.fetched_at)
+    return snapshots
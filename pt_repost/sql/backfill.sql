@@ -0,0 +1,9 @@
+-- progress of `backfill` command, resumed from next_offset if interrupted
+create table if not exists backfill
+(
+    url text primary key not null,
+    website text not null,
+    next_offset int8 not null default 0,
+    done bool not null default false,
+    updated_at timestamptz not null default current_timestamp
+);
@@ -2,4 +2,7 @@ create table if not exists mediainfo(
     info_hash text primary key,
     mediainfo_text text not null,
     mediainfo_json text not null
-)
+);
+
+-- generated from incomplete file by early processing, regenerated after torrent finished
+alter table mediainfo add column if not exists provisional bool not null default false;
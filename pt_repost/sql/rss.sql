@@ -25,3 +25,36 @@ create table if not exists tmdb_info
     tmdb_id int8 not null,
     tmdb_type text not null
 );
+
+alter table rss add column if not exists etag text not null default '';
+alter table rss add column if not exists last_modified text not null default '';
+alter table rss add column if not exists body_hash text not null default '';
+alter table rss add column if not exists exclude_etag text not null default '';
+alter table rss add column if not exists exclude_last_modified text not null default '';
+alter table rss add column if not exists exclude_body_hash text not null default '';
+
+alter table rss_run add column if not exists fetch_result text not null default '';
+
+-- newest item of last successful run, feed parsing stops at it
+alter table rss add column if not exists watermark_pub_date timestamptz;
+alter table rss add column if not exists watermark_guid text not null default '';
+-- `FilterRules.version` of feed and global rules, items skipped by old rules are before watermark
+alter table rss add column if not exists rules_version text not null default '';
+
+-- rss are claimed by `next_run_at <= now()`, scheduling doesn't need to scan rss_run history
+alter table rss add column if not exists next_run_at timestamptz not null default '-infinity';
+alter table rss add column if not exists last_run_id int8;
+
+create index if not exists rss_next_run_at_idx on rss (next_run_at);
+create index if not exists rss_run_rss_id_created_at_idx on rss_run (rss_id, created_at);
+
+alter table rss add column if not exists adaptive bool not null default false;
+alter table rss add column if not exists min_interval_seconds int4 not null default 300;
+alter table rss add column if not exists max_interval_seconds int4 not null default 7200;
+-- interval actually used for scheduling, equal to interval_seconds if adaptive is disabled
+alter table rss add column if not exists effective_interval_seconds int4 not null default 600;
+
+-- number of new rss_item inserted by this run
+alter table rss_run add column if not exists new_items int4 not null default 0;
+
+alter table rss add column if not exists priority float8 not null default 0;
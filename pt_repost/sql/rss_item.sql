@@ -22,3 +22,61 @@ create table if not exists rss_item
 
     primary key (guid, website)
 );
+
+-- torznab attributes from rss, null if indexer doesn't provide them
+alter table rss_item add column if not exists rss_info_hash text not null default '';
+alter table rss_item add column if not exists files int4;
+alter table rss_item add column if not exists seeders int4;
+alter table rss_item add column if not exists grabs int4;
+
+create index if not exists rss_item_info_hash_idx on rss_item (info_hash);
+
+-- verdict of global includes/excludes, evaluated at ingest.
+-- filter_version is `FilterRules.version`, pending items are re-evaluated when rules changed.
+alter table rss_item add column if not exists filter_passed bool not null default true;
+alter table rss_item add column if not exists filter_version text not null default '';
+
+-- picker scans pending items passed global filter newest first, see `pt_repost/picker.py`.
+-- items failed global filter stay out of index, `refresh_filter_verdicts` evaluates them again
+-- when rules changed, passed verdict of another rules version is evaluated again by picker.
+drop index if exists rss_item_pending_idx;
+drop index if exists rss_item_pick_idx;
+drop index if exists rss_item_pending_pick_idx;
+create index if not exists rss_item_pending_passed_idx
+    on rss_item (released_at desc, guid desc, website desc)
+    where status = 'pending' and filter_passed;
+
+-- rss which ingested this item, null for items from backfill
+alter table rss_item add column if not exists rss_id int4;
+
+-- score of picker is constant in a (website, rss_id) group plus a term linear in released_at,
+-- `picker.select_scored` reads each group in this order and merges them.
+create index if not exists rss_item_pending_group_idx
+    on rss_item (website, (coalesce(rss_id, 0)), released_at, guid)
+    where status = 'pending' and filter_passed;
+
+-- canonical title, see `pt_repost/release.py`
+alter table rss_item add column if not exists release_key text not null default '';
+create index if not exists rss_item_release_key_idx on rss_item (release_key) where release_key != '';
+
+-- why item is skipped, bandwidth saved by each reason is `sum(size) group by skip_reason`
+alter table rss_item add column if not exists skip_reason text not null default '';
+-- duplicated releases used to be skipped with failed_reason
+update rss_item set skip_reason = failed_reason, failed_reason = ''
+where status = 'skipped' and skip_reason = '' and failed_reason != '';
+-- skip_reason used to include detail of each item
+update rss_item set skip_reason = 'too-large' where skip_reason like 'torrent size % is too large';
+update rss_item set skip_reason = 'exclude-rss' where skip_reason = 'exclude rss';
+update rss_item set skip_reason = 'preflight:no-video' where skip_reason = 'preflight: no video file in torrent';
+update rss_item set skip_reason = 'preflight:video-codec' where skip_reason like 'preflight: unsupported video codec %';
+update rss_item set skip_reason = 'preflight:audio-codec' where skip_reason like 'preflight: unsupported audio codec %';
+update rss_item set skip_reason = 'duplicated-release' where skip_reason like 'duplicated release %';
+update rss_item set skip_reason = 'exists-on-target' where skip_reason like 'exists on target website %';
+update rss_item set skip_reason = 'duplicated-info-hash' where skip_reason like 'duplicated info hash %';
+
+-- state and eta of downloading torrent in qBittorrent, updated with progress
+alter table rss_item add column if not exists qb_state text not null default '';
+alter table rss_item add column if not exists eta int8;
+
+-- `Qb.name` of qBittorrent instance holding the torrent, empty for first instance
+alter table rss_item add column if not exists qb_instance text not null default '';
@@ -0,0 +1,14 @@
+-- releases already on target website, see `pt_repost/catalog.py`
+create table if not exists target_release
+(
+    website text not null,
+    source_id text not null,
+    name text not null,
+    release_key text not null,
+    size int8 not null,
+    created_at timestamptz not null default current_timestamp,
+
+    primary key (website, source_id)
+);
+
+create index if not exists target_release_release_key_idx on target_release (website, release_key);
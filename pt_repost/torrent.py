@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Annotated, Any
+
+import annotated_types
+import bencode2
+from pydantic import Field
+
+from pt_repost.utils import parse_obj_as
+
+
+def _transform_info(obj: dict[bytes, Any]) -> dict[str, Any]:
+    d = {}
+    for key, value in obj.items():
+        if key == b"pieces":
+            d[key.decode()] = value
+        else:
+            d[key.decode()] = _transform_value(value)
+    return d
+
+
+def _transform_dict(obj: dict[bytes, Any]) -> dict[str, Any]:
+    return {key.decode(): _transform_value(value) for key, value in obj.items()}
+
+
+def _transform_value(v: Any) -> Any:
+    if isinstance(v, bytes):
+        try:
+            return v.decode()
+        except UnicodeDecodeError:
+            return v
+    if isinstance(v, dict):
+        return _transform_dict(v)
+    if isinstance(v, list):
+        return [_transform_value(o) for o in v]
+    return v
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class File:
+    length: int
+    path: Annotated[tuple[str, ...], annotated_types.MinLen(1)]
+    # BEP 47 file attributes, `p` for pad file
+    attr: str = ""
+
+    @property
+    def name(self) -> str:
+        return self.path[-1]
+
+    @property
+    def pad(self) -> bool:
+        """BEP 47 pad file, or `.pad/N` and BitComet padding file without `attr`"""
+        return (
+            "p" in self.attr or self.path[0] == ".pad" or self.name.startswith("_____padding_file_")
+        )
+
+
+@dataclasses.dataclass(kw_only=True, slots=False, frozen=True)
+class TorrentInfo:
+    name: Annotated[str, annotated_types.MinLen(1)]
+    pieces: bytes
+    length: int | None = None
+    private: bool = False
+    files: Annotated[tuple[File, ...], Field(default_factory=tuple)]
+    piece_length: Annotated[int, Field(alias="piece length")]
+    # common used field for private tracker
+    source: str | None = None
+
+    def file_list(self) -> tuple[File, ...]:
+        """single file torrent has `length` instead of `files`"""
+        if self.files:
+            return self.files
+        return (File(length=self.length or 0, path=(self.name,)),)
+
+
+def parse_torrent_info(content: bytes) -> TorrentInfo:
+    return parse_obj_as(TorrentInfo, _transform_info(bencode2.bdecode(content)[b"info"]))
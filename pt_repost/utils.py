@@ -5,7 +5,7 @@ import shlex
 import subprocess
 import sys
 import tempfile
-from collections.abc import Hashable
+from collections.abc import Hashable, Iterable, Iterator
 from datetime import timedelta
 from pathlib import Path
 from shutil import which
@@ -234,6 +234,13 @@ def get_info_hash_v1_from_content(content: bytes) -> str:
     return hashlib.sha1(enc).hexdigest()
 
 
+def get_total_size_from_content(content: bytes) -> int:
+    info = bdecode(content)[b"info"]
+    if b"length" in info:
+        return int(info[b"length"])
+    return sum(int(f[b"length"]) for f in info[b"files"])
+
+
 _J = TypeVar("_J", bound=Hashable)
 
 
@@ -243,6 +250,18 @@ def dedupe(seq: list[_J]) -> list[_J]:
     return [x for x in seq if not (x in seen or seen_add(x))]
 
 
+def batched(it: Iterable[_T], n: int) -> Iterator[list[_T]]:
+    """itertools.batched of python 3.12"""
+    batch: list[_T] = []
+    for x in it:
+        batch.append(x)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 def an2cn(i: int) -> str:
     match i:
         case 1:
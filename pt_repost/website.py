@@ -1,4 +1,5 @@
 import abc
+import dataclasses
 import re
 from http.cookies import SimpleCookie
 from typing import Any
@@ -21,15 +22,65 @@ pattern_hdr10_vivid = re.compile(r"\bHDR Vivid\b", re.IGNORECASE)
 pattern_ssd_jpg_whitelist = re.compile(r"-(CMCTV|HHWEB|PTerWEB|CatEDU|OurTV)$", re.IGNORECASE)
 
 
+@dataclasses.dataclass(frozen=True, slots=True)
+class Rejection:
+    """reason of `Website.preflight`, `check` is a fixed name and `detail` is about the release"""
+
+    check: str
+    detail: str
+
+
 class Website(abc.ABC):
     @abc.abstractmethod
     def parse_mediainfo_as_options(self, filename: str, m: MediaInfo) -> dict[str, Any]: ...
 
+    @abc.abstractmethod
+    def preflight(self, release_name: str) -> Rejection | None:
+        """
+        predict from release name if it will be rejected by `parse_mediainfo_as_options`,
+        before downloading. return reason or None.
+        """
+
+
+# value of guessit `video_codec` and `audio_codec` supported by SSD, see `parse_mediainfo_as_options`
+ssd_video_codecs = {"H.264", "H.265"}
+ssd_audio_codecs = {
+    "Dolby Digital",
+    "Dolby Digital Plus",
+    "Dolby TrueHD",
+    "Dolby Atmos",
+    "DTS",
+    "DTS-HD",
+    "DTS:X",
+    "AAC",
+    "FLAC",
+    "MP3",
+    "LPCM",
+}
+
 
 class SSD(Website):
     def __init__(self, cfg: Config):
         self.cfg = cfg
 
+    def preflight(self, release_name: str) -> Rejection | None:
+        guess: dict[str, Any] = guessit.guessit(release_name)
+
+        # unknown codec is not rejected, mediainfo will tell.
+        # unknown resolution is posted as other, not rejected.
+        video_codec = guess.get("video_codec")
+        if video_codec and video_codec not in ssd_video_codecs:
+            return Rejection("video-codec", f"unsupported video codec {video_codec}")
+
+        audio_codec = guess.get("audio_codec")
+        if isinstance(audio_codec, str):
+            audio_codec = [audio_codec]
+        for codec in audio_codec or []:
+            if codec not in ssd_audio_codecs:
+                return Rejection("audio-codec", f"unsupported audio codec {codec}")
+
+        return None
+
     def parse_mediainfo_as_options(self, release_name: str, m: MediaInfo) -> dict[str, Any]:
         options: dict[str, Any] = {}
 